@@ -0,0 +1,138 @@
+from pymongo import ReplaceOne
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from database import (
+    DatabaseManager, contact_requests_collection, guestbook_collection,
+    contact_requests_archive_collection, guestbook_archive_collection
+)
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'true').lower() == 'true'
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_INTERVAL_SECONDS', 3600))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+ARCHIVE_MAX_BATCHES = int(os.environ.get('ARCHIVE_MAX_BATCHES', 100))
+# Archived documents expire after this many days (0 keeps them forever)
+ARCHIVE_TTL_DAYS = int(os.environ.get('ARCHIVE_TTL_DAYS', 0))
+
+CONTACT_ARCHIVE_HANDLED_DAYS = int(os.environ.get('CONTACT_ARCHIVE_HANDLED_DAYS', 30))
+CONTACT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CONTACT_ARCHIVE_AFTER_DAYS', 365))
+GUESTBOOK_UNAPPROVED_DAYS = int(os.environ.get('GUESTBOOK_UNAPPROVED_DAYS', 30))
+# "archive" moves old unapproved entries, "expire" lets a TTL index delete them
+GUESTBOOK_UNAPPROVED_ACTION = os.environ.get('GUESTBOOK_UNAPPROVED_ACTION', 'archive')
+
+class ArchivePolicy:
+    def __init__(self, name: str, collection, archive, build_filter: Callable[[datetime], Dict[str, Any]]):
+        self.name = name
+        self.collection = collection
+        self.archive = archive
+        self.build_filter = build_filter
+
+ARCHIVE_POLICIES: List[ArchivePolicy] = [
+    ArchivePolicy(
+        "contact_requests.handled",
+        contact_requests_collection, contact_requests_archive_collection,
+        lambda now: {"handled": True, "created_at": {"$lt": now - timedelta(days=CONTACT_ARCHIVE_HANDLED_DAYS)}}
+    ),
+    ArchivePolicy(
+        "contact_requests.age",
+        contact_requests_collection, contact_requests_archive_collection,
+        lambda now: {"created_at": {"$lt": now - timedelta(days=CONTACT_ARCHIVE_AFTER_DAYS)}}
+    ),
+]
+if GUESTBOOK_UNAPPROVED_ACTION == 'archive':
+    ARCHIVE_POLICIES.append(ArchivePolicy(
+        "guestbook.unapproved",
+        guestbook_collection, guestbook_archive_collection,
+        lambda now: {"approved": False, "created_at": {"$lt": now - timedelta(days=GUESTBOOK_UNAPPROVED_DAYS)}}
+    ))
+
+async def ensure_archive_indexes():
+    """Create the TTL indexes required by the configured policies"""
+    ttl_seconds = ARCHIVE_TTL_DAYS * 86400
+    await DatabaseManager.ensure_ttl_index(contact_requests_archive_collection, "archived_at", ttl_seconds)
+    await DatabaseManager.ensure_ttl_index(guestbook_archive_collection, "archived_at", ttl_seconds)
+
+    unapproved_ttl = GUESTBOOK_UNAPPROVED_DAYS * 86400 if GUESTBOOK_UNAPPROVED_ACTION == 'expire' else None
+    await DatabaseManager.ensure_ttl_index(
+        guestbook_collection, "created_at", unapproved_ttl,
+        name="created_at_unapproved_ttl", partialFilterExpression={"approved": False}
+    )
+
+async def move_to_archive(collection, archive, docs: List[dict], now: datetime, **fields) -> int:
+    """Copy documents into the archive (stamped with archived_at and `fields`), then delete them"""
+    if not docs:
+        return 0
+    # Upsert first so a crash between the two steps never loses documents
+    await archive.bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, dict(doc, archived_at=now, **fields), upsert=True) for doc in docs],
+        ordered=False
+    )
+    result = await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+    return result.deleted_count
+
+class Archiver:
+    """Moves cold documents from the hot collections into their archive collections"""
+
+    def __init__(self, policies: List[ArchivePolicy]):
+        self.policies = policies
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_policy(self, policy: ArchivePolicy, now: datetime) -> int:
+        query = policy.build_filter(now)
+        moved = 0
+        for _ in range(ARCHIVE_MAX_BATCHES):
+            docs = await policy.collection.find(query).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+            if not docs:
+                break
+
+            moved += await move_to_archive(policy.collection, policy.archive, docs, now)
+            if len(docs) < ARCHIVE_BATCH_SIZE:
+                break
+        return moved
+
+    async def run_once(self) -> Dict[str, int]:
+        """Apply every policy once and return how many documents each one moved"""
+        now = datetime.utcnow()
+        moved = {}
+        for policy in self.policies:
+            moved[policy.name] = await self.run_policy(policy, now)
+        self.last_run = {"at": now, "moved": moved}
+        if any(moved.values()):
+            logger.info("Archived documents: %s", moved)
+        return moved
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Archival run failed")
+            await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+    def start(self):
+        if ARCHIVE_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+async def find_with_archive(collection, archive, query: Dict[str, Any], sort_field: str, limit: int) -> List[dict]:
+    """Read the newest documents across a hot collection and its archive"""
+    hot = await collection.find(query).sort(sort_field, -1).limit(limit).to_list(limit)
+    cold = await archive.find(query).sort(sort_field, -1).limit(limit).to_list(limit)
+    docs = sorted(hot + cold, key=lambda doc: doc.get(sort_field) or datetime.min, reverse=True)
+    return docs[:limit]
+
+archiver = Archiver(ARCHIVE_POLICIES)
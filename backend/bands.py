@@ -0,0 +1,53 @@
+from typing import Optional
+import re
+
+# Amateur band plan (lower and upper edge in MHz)
+BAND_PLAN = [
+    ("160m", 1.8, 2.0),
+    ("80m", 3.5, 4.0),
+    ("60m", 5.06, 5.45),
+    ("40m", 7.0, 7.3),
+    ("30m", 10.1, 10.15),
+    ("20m", 14.0, 14.35),
+    ("17m", 18.068, 18.168),
+    ("15m", 21.0, 21.45),
+    ("12m", 24.89, 24.99),
+    ("10m", 28.0, 29.7),
+    ("6m", 50.0, 54.0),
+    ("2m", 144.0, 148.0),
+    ("70cm", 420.0, 450.0),
+]
+
+_FREQUENCY_RE = re.compile(r"^\s*([0-9]+(?:[.,][0-9]+)?)\s*(mhz|khz|hz)?\s*$", re.IGNORECASE)
+
+def parse_frequency(value) -> Optional[float]:
+    """Parse a free-text frequency ("14.205", "14205 kHz") into MHz"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number, unit = float(value), None
+    else:
+        match = _FREQUENCY_RE.match(str(value))
+        if not match:
+            return None
+        number = float(match.group(1).replace(",", "."))
+        unit = (match.group(2) or "").lower() or None
+
+    if unit == "hz":
+        return number / 1_000_000
+    if unit == "khz":
+        return number / 1000
+    if unit is None and number >= 1000:
+        # Bare numbers above 1000 are kHz, as used on DX clusters and in logs
+        return number / 1000
+    return number
+
+def band_for_frequency(value) -> Optional[str]:
+    """Return the band name ("20m") for a frequency, or None if outside the band plan"""
+    mhz = parse_frequency(value)
+    if mhz is None:
+        return None
+    for band, low, high in BAND_PLAN:
+        if low <= mhz <= high:
+            return band
+    return None
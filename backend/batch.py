@@ -0,0 +1,122 @@
+from fastapi import Request
+from starlette.routing import Match, Router
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', 5))
+
+def batch_excluded(func):
+    """Decorator for streaming and file routes, which can't be buffered into a batch response"""
+    func.batch_excluded = True
+    return func
+
+class BatchDispatcher:
+    """Runs GET sub-requests against a router's routes in-process, without the HTTP/middleware stack"""
+
+    def __init__(self, router: Router, excluded_paths: Optional[List[str]] = None):
+        self.router = router
+        self.excluded_paths = set(excluded_paths or [])
+
+    async def run(self, parent: Request, sub_requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def run_one(sub_request):
+            async with semaphore:
+                return await self.dispatch(parent, **sub_request)
+
+        return await asyncio.gather(*(run_one(sub_request) for sub_request in sub_requests))
+
+    async def dispatch(self, parent: Request, method: str, path: str, query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Dispatch one sub-request and return its status code and decoded body"""
+        method = method.upper()
+        parts = urlsplit(path)
+        query_string = "&".join(filter(None, [parts.query, urlencode(query or {}, doseq=True)]))
+
+        if method != "GET":
+            return self._error(path, 405, "Only GET sub-requests are supported")
+        if parts.path in self.excluded_paths:
+            return self._error(path, 400, "Path cannot be used in a batch")
+
+        scope = {
+            "type": "http",
+            "asgi": parent.scope.get("asgi", {"version": "3.0"}),
+            "http_version": "1.1",
+            "method": method,
+            "scheme": parent.scope.get("scheme", "http"),
+            "server": parent.scope.get("server"),
+            "client": parent.scope.get("client"),
+            "root_path": parent.scope.get("root_path", ""),
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": query_string.encode(),
+            "headers": [(b"accept", b"application/json")],
+            "app": parent.scope.get("app"),
+            # Reuse the app's exception handlers so HTTPException/validation errors become responses
+            "starlette.exception_handlers": parent.scope.get("starlette.exception_handlers"),
+        }
+        if scope["starlette.exception_handlers"] is None:
+            del scope["starlette.exception_handlers"]
+
+        route = None
+        partial = False
+        for candidate in self.router.routes:
+            match, child_scope = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                scope.update(child_scope)
+                break
+            partial = partial or match == Match.PARTIAL
+        if route is None:
+            return self._error(path, 405, "Method Not Allowed") if partial else self._error(path, 404, "Not Found")
+        if getattr(getattr(route, "endpoint", None), "batch_excluded", False):
+            return self._error(path, 400, "Path cannot be used in a batch")
+
+        status_code = 500
+        headers: Dict[str, str] = {}
+        chunks: List[bytes] = []
+
+        request_sent = False
+        finished = asyncio.Event()
+
+        async def receive():
+            # The (empty) body once, then block like an open connection until the sub-request is done
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers.update((k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await route.handle(scope, receive, send)
+        except Exception:
+            logger.exception("Batch sub-request %s %s failed", method, path)
+            return self._error(path, 500, "Internal Server Error")
+        finally:
+            finished.set()
+
+        body = b"".join(chunks)
+        if headers.get("content-type", "").startswith("application/json"):
+            decoded = json.loads(body) if body else None
+        else:
+            decoded = body.decode("utf-8", errors="replace")
+        return {"path": path, "status": status_code, "body": decoded}
+
+    @staticmethod
+    def _error(path: str, status_code: int, detail: str) -> Dict[str, Any]:
+        return {"path": path, "status": status_code, "body": {"detail": detail}}
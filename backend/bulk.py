@@ -0,0 +1,90 @@
+from pymongo import UpdateOne, UpdateMany, DeleteOne, DeleteMany
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import os
+
+BULK_MAX_OPERATIONS = int(os.environ.get('BULK_MAX_OPERATIONS', 1000))
+
+async def run_bulk(
+    collection,
+    scope: Dict[str, Any],
+    operations: List[Dict[str, Any]],
+    query: Optional[Dict[str, Any]] = None,
+    update: Optional[Dict[str, Any]] = None,
+    delete: bool = False
+) -> Dict[str, Any]:
+    """Run id-based update/delete operations plus an optional filter-based one as one unordered bulk_write.
+
+    `operations` items are {"op": "update"|"delete", "id": ..., "data": {...}} and only touch documents
+    matching `scope` (e.g. the owning station). Ids missing from a lookup before the write are
+    `not_found`; the others get their status from the write outcome: `error` for write errors, and
+    `updated`/`deleted` or `not_found` when the matched/deleted counts account for every operation of
+    that kind. Counts shared with a concurrent change or with the filter operation leave it `unknown`.
+    """
+    requests = []
+    results: List[Dict[str, Any]] = []
+    now = datetime.utcnow()
+
+    ids = [operation["id"] for operation in operations]
+    existing = set()
+    if ids:
+        async for doc in collection.find(dict(scope, _id={"$in": ids}), {"_id": 1}):
+            existing.add(doc["_id"])
+
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation["op"], "id": operation["id"]}
+        results.append(result)
+        if operation["id"] not in existing:
+            result["status"] = "not_found"
+            continue
+        if operation["op"] == "delete":
+            requests.append(DeleteOne(dict(scope, _id=operation["id"])))
+        else:
+            data = {k: v for k, v in (operation.get("data") or {}).items() if v is not None}
+            requests.append(UpdateOne(dict(scope, _id=operation["id"]), {"$set": dict(data, updated_at=now)}))
+        result["_request"] = len(requests) - 1
+
+    if query is not None:
+        result = {"index": len(operations), "op": "delete" if delete else "update", "id": None, "status": "applied"}
+        if delete:
+            requests.append(DeleteMany(query))
+        else:
+            data = {k: v for k, v in (update or {}).items() if v is not None}
+            requests.append(UpdateMany(query, {"$set": dict(data, updated_at=now)}))
+        result["_request"] = len(requests) - 1
+        results.append(result)
+
+    counts = {"matched": 0, "modified": 0, "deleted": 0}
+    if requests:
+        try:
+            outcome = (await collection.bulk_write(requests, ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            outcome = e.details
+        errors = {error["index"]: error.get("errmsg") for error in outcome.get("writeErrors", [])}
+        counts = {
+            "matched": outcome.get("nMatched", 0),
+            "modified": outcome.get("nModified", 0),
+            "deleted": outcome.get("nRemoved", 0),
+        }
+        for result in results:
+            if result.get("_request") in errors:
+                result["status"] = "error"
+                result["error"] = errors[result["_request"]]
+
+        for op, count, done in (("update", counts["matched"], "updated"), ("delete", counts["deleted"], "deleted")):
+            pending = [result for result in results if result["op"] == op and "status" not in result]
+            # A filter operation of the same kind shares the count with the id-based ones
+            shared = any(result["op"] == op and result["id"] is None and result["status"] != "error" for result in results)
+            if count == 0:
+                status = "not_found"
+            elif count == len(pending) and not shared:
+                status = done
+            else:
+                status = "unknown"
+            for result in pending:
+                result["status"] = status
+
+    for result in results:
+        result.pop("_request", None)
+    return dict(counts, results=results)
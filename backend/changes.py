@@ -0,0 +1,143 @@
+from pymongo import ReturnDocument
+from typing import Any, Dict, Iterable, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from database import (
+    changes_collection, counters_collection, equipment_collection, news_collection, gallery_collection,
+    qsl_cards_collection, achievements_collection, guestbook_collection
+)
+
+logger = logging.getLogger(__name__)
+
+# Change entries older than this are pruned; clients with an older token start over with a full fetch
+CHANGES_RETENTION_DAYS = int(os.environ.get('CHANGES_RETENTION_DAYS', 30))
+CHANGES_PRUNE_INTERVAL_SECONDS = int(os.environ.get('CHANGES_PRUNE_INTERVAL_SECONDS', 3600))
+# A gap in the sequence younger than this is a write still in flight, and the feed stops before it
+CHANGES_SETTLE_SECONDS = int(os.environ.get('CHANGES_SETTLE_SECONDS', 10))
+
+SEQUENCE_ID = "changes"
+
+# Collections in the feed, and the filter documents must match to be visible to public clients
+FEED_COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "equipment": {"collection": equipment_collection, "filter": {}},
+    "news": {"collection": news_collection, "filter": {}},
+    "gallery": {"collection": gallery_collection, "filter": {}},
+    "qsl_cards": {"collection": qsl_cards_collection, "filter": {}},
+    "achievements": {"collection": achievements_collection, "filter": {}},
+    "guestbook": {"collection": guestbook_collection, "filter": {"approved": True}},
+}
+
+class ChangeLog:
+    """Sequence-numbered log of changed documents, read back as an ordered delta.
+
+    Entries only name the document; the feed returns its current state, or a delete when the
+    document is gone or no longer public. Write handlers record changes after their write, so
+    a client that has seen an entry's sequence number has seen the write too.
+    """
+
+    @staticmethod
+    async def record(station: str, collection: str, ids: Iterable[str]):
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        counter = await counters_collection.find_one_and_update(
+            {"_id": SEQUENCE_ID}, {"$inc": {"seq": len(ids)}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        first = counter["seq"] - len(ids) + 1
+        now = datetime.utcnow()
+        await changes_collection.insert_many([
+            {"_id": first + i, "station": station, "collection": collection, "doc_id": doc_id, "at": now}
+            for i, doc_id in enumerate(ids)
+        ])
+
+    @staticmethod
+    async def state() -> Dict[str, int]:
+        counter = await counters_collection.find_one({"_id": SEQUENCE_ID}) or {}
+        return {"seq": counter.get("seq", 0), "pruned": counter.get("pruned", 0)}
+
+    @staticmethod
+    async def changes(since: Optional[int], station: Optional[str], limit: int) -> Dict[str, Any]:
+        state = await ChangeLog.state()
+        if since is None or since < state["pruned"] or since > state["seq"]:
+            # Unknown or expired token: the client refetches everything and continues from the current sequence
+            return {"token": str(state["seq"]), "reset": True, "more": False, "changes": []}
+
+        entries = await changes_collection.find({"_id": {"$gt": since}}).sort("_id", 1).limit(limit).to_list(limit)
+        settled = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+        token = since
+        latest: Dict[tuple, int] = {}
+        for entry in entries:
+            # A missing number was allocated before this entry; unless it is old, its entry is still being written
+            if entry["_id"] != token + 1 and entry["at"] > settled:
+                break
+            token = entry["_id"]
+            if station is None or entry["station"] == station:
+                latest[(entry["collection"], entry["doc_id"], entry["station"])] = entry["_id"]
+
+        documents: Dict[tuple, Dict[str, Any]] = {}
+        for name, feed in FEED_COLLECTIONS.items():
+            keys = [key for key in latest if key[0] == name]
+            if not keys:
+                continue
+            query = dict(feed["filter"], _id={"$in": [key[1] for key in keys]})
+            async for doc in feed["collection"].find(query):
+                documents[(name, doc["_id"], doc.get("station"))] = doc
+
+        changes = []
+        for key, seq in sorted(latest.items(), key=lambda item: item[1]):
+            document = documents.get(key)
+            changes.append({
+                "seq": seq,
+                "collection": key[0],
+                "id": key[1],
+                "station": key[2],
+                "op": "upsert" if document is not None else "delete",
+                "document": document,
+            })
+        return {"token": str(token), "reset": False, "more": token < state["seq"], "changes": changes}
+
+    @staticmethod
+    async def prune(now: datetime) -> int:
+        """Delete entries older than CHANGES_RETENTION_DAYS; tokens before them get a reset"""
+        cutoff = now - timedelta(days=CHANGES_RETENTION_DAYS)
+        newest = await changes_collection.find({"at": {"$lt": cutoff}}).sort([("at", -1), ("_id", -1)]).limit(1).to_list(1)
+        if not newest:
+            return 0
+        # Raise the low-water mark first, so readers never skip entries that are being deleted
+        await counters_collection.update_one({"_id": SEQUENCE_ID}, {"$max": {"pruned": newest[0]["_id"]}})
+        result = await changes_collection.delete_many({"_id": {"$lte": newest[0]["_id"]}})
+        return result.deleted_count
+
+class ChangeLogPruner:
+    """Prunes the change log on its own schedule, independent of archival"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self):
+        while True:
+            try:
+                pruned = await ChangeLog.prune(datetime.utcnow())
+                if pruned:
+                    logger.info("Pruned %d change log entries", pruned)
+            except Exception:
+                logger.exception("Change log pruning failed")
+            await asyncio.sleep(CHANGES_PRUNE_INTERVAL_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+change_log_pruner = ChangeLogPruner()
@@ -0,0 +1,279 @@
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import re
+import uuid
+
+from database import contests_collection, qsos_collection
+from bands import band_for_frequency
+from dxcc import dxcc_resolver
+
+logger = logging.getLogger(__name__)
+
+# QSOs are written in batches: a batch is flushed when it reaches this size or after this many milliseconds
+CONTEST_BATCH_SIZE = int(os.environ.get('CONTEST_BATCH_SIZE', 500))
+CONTEST_FLUSH_MS = float(os.environ.get('CONTEST_FLUSH_MS', 5))
+# Contests that ended within this many days get their dupe index loaded at startup; older ones load on first use
+CONTEST_PRELOAD_DAYS = int(os.environ.get('CONTEST_PRELOAD_DAYS', 7))
+
+# Cabrillo mode categories; dupes are counted per category, so USB and LSB are the same mode
+CONTEST_MODES = {
+    "CW": "CW", "SSB": "PH", "USB": "PH", "LSB": "PH", "AM": "PH", "PH": "PH", "FM": "FM",
+    "RTTY": "RY", "RY": "RY", "FT8": "DG", "FT4": "DG", "PSK": "DG", "PSK31": "DG", "DG": "DG", "DIGI": "DG",
+}
+
+_PREFIX_RE = re.compile(r"^([A-Z0-9]*?[0-9])[A-Z]*$")
+
+def contest_mode(mode: str) -> Optional[str]:
+    return CONTEST_MODES.get(mode.strip().upper())
+
+def wpx_prefix(call: str) -> str:
+    """WPX prefix: "4K6AG" -> "4K6", "DL/K1ABC" -> "DL0", "K1ABC/7" -> "K7" """
+    parts = call.upper().split("/")
+    base = max(parts, key=len)
+    others = [part for part in parts if part != base and part not in ("P", "M", "MM", "AM", "QRP")]
+    if others and others[0].isdigit():
+        match = _PREFIX_RE.match(base)
+        return (match.group(1)[:-1] if match else base) + others[0]
+    if others:
+        prefix = others[0]
+        return prefix if prefix[-1].isdigit() else prefix + "0"
+    match = _PREFIX_RE.match(base)
+    return match.group(1) if match else base + "0"
+
+class DupeIndex:
+    """Worked call x band x mode keys and multipliers of one contest, held in memory"""
+
+    def __init__(self, contest: Dict[str, Any]):
+        self.contest = contest
+        self.worked: Set[str] = set()
+        self.multipliers: Set[str] = set()
+        self.qsos = 0
+        self.dupes = 0
+
+    @staticmethod
+    def key(call: str, band: str, mode: str) -> str:
+        return f"{call}|{band}|{mode}"
+
+    def multiplier_keys(self, qso: Dict[str, Any]) -> List[str]:
+        scope = qso["band"] if self.contest.get("multipliers_per_band", True) else "*"
+        keys = []
+        for kind in self.contest.get("multipliers", []):
+            if kind == "prefix":
+                value = wpx_prefix(qso["call"])
+            elif kind == "country":
+                entity = dxcc_resolver.resolve(qso["call"])
+                value = entity["prefix"] if entity else None
+            else:
+                value = qso.get(kind)
+            if value:
+                keys.append(f"{kind}:{value}:{scope}")
+        return keys
+
+    def is_dupe(self, call: str, band: str, mode: str) -> bool:
+        return self.key(call, band, mode) in self.worked
+
+    def new_multipliers(self, qso: Dict[str, Any]) -> List[str]:
+        return [key for key in self.multiplier_keys(qso) if key not in self.multipliers]
+
+    def add(self, qso: Dict[str, Any]) -> Tuple[bool, List[str]]:
+        """Record a QSO; returns whether it is a dupe and which multipliers it adds"""
+        key = self.key(qso["call"], qso["band"], qso["mode"])
+        self.qsos += 1
+        if key in self.worked:
+            self.dupes += 1
+            return True, []
+        self.worked.add(key)
+        new = self.new_multipliers(qso)
+        self.multipliers.update(new)
+        return False, new
+
+    def stats(self) -> Dict[str, int]:
+        return {"qsos": self.qsos, "dupes": self.dupes, "multipliers": len(self.multipliers)}
+
+class ContestLog:
+    """Per-contest dupe indexes plus a group-commit write path.
+
+    Dupe and multiplier status is decided synchronously against the in-memory index, then the QSOs
+    join the pending batch; callers get their result once the batch holding their QSOs is stored.
+    QSOs the batch insert rejects come back with an `error`, and their contest's index is rebuilt.
+    """
+
+    def __init__(self):
+        self.indexes: Dict[str, DupeIndex] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._batch: List[Dict[str, Any]] = []
+        self._batch_done: Optional[asyncio.Future] = None
+        # Batches handed to insert_many and not finished yet
+        self._writing: List[List[Dict[str, Any]]] = []
+        # QSOs stored while a contest's index is loading, by contest
+        self._stored_while_loading: Dict[str, List[Dict[str, Any]]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.counters = {"logged": 0, "batches": 0, "write_errors": 0}
+
+    async def index(self, contest: Dict[str, Any]) -> DupeIndex:
+        index = self.indexes.get(contest["_id"])
+        if index is not None:
+            return index
+        # Concurrent first requests share one load
+        task = self._loading.get(contest["_id"])
+        if task is None:
+            task = asyncio.ensure_future(self._load(contest))
+            self._loading[contest["_id"]] = task
+            task.add_done_callback(lambda _: self._loading.pop(contest["_id"], None))
+        return await asyncio.shield(task)
+
+    async def _load(self, contest: Dict[str, Any]) -> DupeIndex:
+        index = DupeIndex(contest)
+        self._stored_while_loading[contest["_id"]] = []
+        try:
+            seen = set()
+            cursor = qsos_collection.find(
+                {"station": contest["station"], "contest": contest["_id"]},
+                {"_id": 1, "call": 1, "band": 1, "mode": 1, "exchange": 1}
+            ).sort("timestamp", 1)
+            async for qso in cursor:
+                seen.add(qso["_id"])
+                index.add(qso)
+            # QSOs the scan may have missed: stored meanwhile, being written, or still in the pending batch
+            unseen = self._stored_while_loading[contest["_id"]] + self._batch + [qso for batch in self._writing for qso in batch]
+        finally:
+            del self._stored_while_loading[contest["_id"]]
+        for qso in unseen:
+            if qso["contest"] == contest["_id"] and qso["_id"] not in seen and "error" not in qso:
+                seen.add(qso["_id"])
+                index.add(qso)
+        self.indexes[contest["_id"]] = index
+        return index
+
+    async def preload(self):
+        """Rebuild the dupe indexes of current and recent contests (used on startup)"""
+        since = datetime.utcnow() - timedelta(days=CONTEST_PRELOAD_DAYS)
+        async for contest in contests_collection.find({"end": {"$gte": since}}):
+            if "country" in contest.get("multipliers", []) and not dxcc_resolver.loaded:
+                # Loading it now would count no country multipliers; it loads on first use once the file is there
+                logger.error("Not loading contest %s: country multipliers need the DXCC prefix file", contest["_id"])
+                continue
+            index = await self.index(contest)
+            logger.info("Loaded dupe index for contest %s: %s", contest["_id"], index.stats())
+
+    def check(self, index: DupeIndex, call: str, band: str, mode: str, exchange: Optional[str] = None) -> Dict[str, Any]:
+        qso = {"call": call, "band": band, "mode": mode, "exchange": exchange}
+        dupe = index.is_dupe(call, band, mode)
+        return {
+            "call": call,
+            "band": band,
+            "mode": mode,
+            "dupe": dupe,
+            "new_multipliers": [] if dupe else index.new_multipliers(qso),
+        }
+
+    async def log(self, index: DupeIndex, qsos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        contest = index.contest
+        now = datetime.utcnow()
+        docs = []
+        for qso in qsos:
+            dupe, new_multipliers = index.add(qso)
+            docs.append(dict(
+                qso,
+                _id=str(uuid.uuid4()),
+                station=contest["station"],
+                contest=contest["_id"],
+                dupe=dupe,
+                multipliers=new_multipliers,
+                created_at=now,
+                updated_at=now,
+            ))
+
+        done = self._enqueue(docs)
+        try:
+            await asyncio.shield(done)
+        except Exception:
+            # The index already counts these QSOs; rebuild it from what actually got stored
+            self.indexes.pop(contest["_id"], None)
+            raise
+        return docs
+
+    def _enqueue(self, docs: List[Dict[str, Any]]) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if self._batch_done is None:
+            self._batch_done = loop.create_future()
+            self._flush_handle = loop.call_later(CONTEST_FLUSH_MS / 1000, self._flush_now)
+        self._batch.extend(docs)
+        done = self._batch_done
+        if len(self._batch) >= CONTEST_BATCH_SIZE:
+            self._flush_now()
+        return done
+
+    def _flush_now(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, done = self._batch, self._batch_done
+        self._batch, self._batch_done = [], None
+        if batch:
+            self._writing.append(batch)
+            asyncio.ensure_future(self._write(batch, done))
+
+    async def _write(self, batch: List[Dict[str, Any]], done: asyncio.Future):
+        try:
+            try:
+                await qsos_collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Unordered inserts store every QSO except the rejected ones
+                errors = {error["index"]: error.get("errmsg") for error in e.details.get("writeErrors", [])}
+                for position, message in errors.items():
+                    batch[position]["error"] = message or "Write failed"
+                self.counters["write_errors"] += len(errors)
+                logger.error("Failed to store %d of %d contest QSOs", len(errors), len(batch))
+                # The indexes counted the rejected QSOs; rebuild them from what got stored
+                for contest_id in {batch[position]["contest"] for position in errors}:
+                    self.indexes.pop(contest_id, None)
+            except Exception as e:
+                self.counters["write_errors"] += len(batch)
+                logger.exception("Failed to store %d contest QSOs", len(batch))
+                done.set_exception(e)
+                return
+        finally:
+            self._writing.remove(batch)
+
+        stored = [qso for qso in batch if "error" not in qso]
+        for qso in stored:
+            loading = self._stored_while_loading.get(qso["contest"])
+            if loading is not None:
+                loading.append(qso)
+        self.counters["logged"] += len(stored)
+        self.counters["batches"] += 1
+        done.set_result(None)
+
+    async def flush(self):
+        """Write the pending batch now (used on shutdown)"""
+        done = self._batch_done
+        self._flush_now()
+        if done is not None:
+            await asyncio.gather(done, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.counters, contests=len(self.indexes), pending=len(self._batch),
+            writing=sum(len(batch) for batch in self._writing),
+        )
+
+contest_log = ContestLog()
+
+def normalize_qso(qso: Dict[str, Any]) -> Dict[str, Any]:
+    """Upper-case the call, derive the band from the frequency (kHz) and map the mode to its contest category.
+
+    Raises ValueError for QSOs without a usable band or mode.
+    """
+    call = qso["call"].strip().upper()
+    band = qso.get("band") or band_for_frequency(f"{qso['frequency']} kHz" if qso.get("frequency") else None)
+    mode = contest_mode(qso["mode"])
+    if not band or not mode:
+        raise ValueError(f"QSO with {call} needs a valid band or frequency and mode")
+    exchange = (qso.get("exchange") or "").strip().upper() or None
+    # `logged_mode` keeps the mode as entered (USB, FT8) for ADIF exports
+    return dict(qso, call=call, band=band, mode=mode, logged_mode=qso["mode"].strip().upper(), exchange=exchange)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Contest logging benchmark.
+
+Creates a scratch contest in the database from MONGO_URL, measures dupe checks
+against its in-memory index and the QSO rate through the group-commit write path,
+then deletes the contest and its QSOs.
+
+    python contest_bench.py --qsos 20000 --clients 50 --per-request 1
+    CONTEST_BATCH_SIZE=1000 CONTEST_FLUSH_MS=10 python contest_bench.py --per-request 20
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import typer
+
+from contest import contest_log, normalize_qso, DupeIndex
+from database import contests_collection, qsos_collection
+
+BANDS = ["160m", "80m", "40m", "20m", "15m", "10m"]
+MODES = ["CW", "SSB"]
+
+def synthetic_qsos(count: int, seed: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    prefixes = ["DL", "JA", "K", "W", "VK", "PY", "UA", "EA", "OH", "G"]
+    # A small call pool makes roughly a tenth of the QSOs dupes, as in a busy contest
+    calls = [f"{rnd.choice(prefixes)}{rnd.randint(0, 9)}{rnd.choice('ABCDEFGHIJ')}{rnd.choice('KLMNOPQRST')}"
+             for _ in range(max(count // 4, 1))]
+    return [
+        normalize_qso({"call": rnd.choice(calls), "band": rnd.choice(BANDS), "mode": rnd.choice(MODES),
+                       "exchange": str(rnd.randint(1, 40)), "timestamp": datetime.utcnow()})
+        for _ in range(count)
+    ]
+
+async def bench(qsos: int, clients: int, per_request: int, checks: int, seed: int):
+    now = datetime.utcnow()
+    contest = {
+        "_id": f"bench-{uuid.uuid4()}", "station": "BENCH", "name": "Benchmark", "start": now,
+        "end": now + timedelta(days=2), "multipliers": ["exchange", "prefix"], "multipliers_per_band": True,
+        "created_at": now, "updated_at": now,
+    }
+    await contests_collection.insert_one(contest)
+    try:
+        index = DupeIndex(contest)
+        contest_log.indexes[contest["_id"]] = index
+        log = synthetic_qsos(qsos, seed)
+
+        requests = [log[i:i + per_request] for i in range(0, len(log), per_request)]
+        latencies = []
+
+        async def client(worker: int):
+            for batch in requests[worker::clients]:
+                started = time.perf_counter()
+                await contest_log.log(index, batch)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(worker) for worker in range(clients)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        typer.echo(f"logged {qsos} QSOs in {len(requests)} requests from {clients} clients: "
+                   f"{qsos / elapsed:,.0f} QSO/s, request p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                   f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+        typer.echo(f"index: {index.stats()}, writes: {contest_log.stats()}")
+
+        probes = synthetic_qsos(checks, seed + 1)
+        started = time.perf_counter()
+        for qso in probes:
+            contest_log.check(index, qso["call"], qso["band"], qso["mode"], qso["exchange"])
+        per_check = (time.perf_counter() - started) / checks
+        typer.echo(f"dupe check: {per_check * 1e6:.2f} us per QSO over {checks} checks")
+
+        contest_log.indexes.pop(contest["_id"], None)
+        started = time.perf_counter()
+        reloaded = await contest_log.index(contest)
+        typer.echo(f"index rebuild from Mongo: {(time.perf_counter() - started) * 1000:.0f} ms, {reloaded.stats()}")
+    finally:
+        contest_log.indexes.pop(contest["_id"], None)
+        await qsos_collection.delete_many({"contest": contest["_id"]})
+        await contests_collection.delete_one({"_id": contest["_id"]})
+
+def main(
+    qsos: int = typer.Option(20000, help="QSOs to log"),
+    clients: int = typer.Option(50, help="Concurrent logging clients"),
+    per_request: int = typer.Option(1, help="QSOs per log call"),
+    checks: int = typer.Option(100000, help="Dupe checks to time"),
+    seed: int = typer.Option(42, help="Random seed for the synthetic log"),
+):
+    """Measure dupe-check latency and QSO logging throughput"""
+    asyncio.run(bench(qsos, clients, per_request, checks, seed))
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,50 +1,237 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
 from pathlib import Path
 import os
+import logging
 from datetime import datetime
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+from tracing import command_tracer, TRACING_ENABLED
+from routing import RoutedCollection
+
+logger = logging.getLogger(__name__)
+
 # Get database connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[command_tracer] if TRACING_ENABLED else [])
 db = client[os.environ.get('DB_NAME', 'radio_station')]
 
-# Collections
-station_collection = db.station_info
-equipment_collection = db.equipment
-qsl_cards_collection = db.qsl_cards
-achievements_collection = db.achievements
-news_collection = db.news
-gallery_collection = db.gallery
-guestbook_collection = db.guestbook
-contact_requests_collection = db.contact_requests
+# Station served when documents predate multi-station support
+DEFAULT_CALLSIGN = os.environ.get('DEFAULT_CALLSIGN', '4K6AG').upper()
+
+# Collections; each request uses the read preference and write concern of its route (see routing.py)
+station_collection = RoutedCollection(db.station_info)
+equipment_collection = RoutedCollection(db.equipment)
+qsl_cards_collection = RoutedCollection(db.qsl_cards)
+achievements_collection = RoutedCollection(db.achievements)
+news_collection = RoutedCollection(db.news)
+gallery_collection = RoutedCollection(db.gallery)
+guestbook_collection = RoutedCollection(db.guestbook)
+contact_requests_collection = RoutedCollection(db.contact_requests)
+contact_requests_archive_collection = RoutedCollection(db.contact_requests_archive)
+guestbook_archive_collection = RoutedCollection(db.guestbook_archive)
+status_history_collection = RoutedCollection(db.station_status_history)
+jobs_collection = RoutedCollection(db.jobs)
+dead_jobs_collection = RoutedCollection(db.jobs_dead)
+status_rollups_collection = RoutedCollection(db.station_status_rollups)
+dx_spots_collection = RoutedCollection(db.dx_spots)
+reception_chunks_collection = RoutedCollection(db.reception_chunks)
+reception_rollups_collection = RoutedCollection(db.reception_rollups)
+exports_collection = RoutedCollection(db.exports)
+contests_collection = RoutedCollection(db.contests)
+qsos_collection = RoutedCollection(db.qsos)
+changes_collection = RoutedCollection(db.changes)
+counters_collection = RoutedCollection(db.counters)
+
+# Collections whose documents belong to one station (the `station` field)
+STATION_SCOPED_COLLECTIONS = [
+    equipment_collection, qsl_cards_collection, achievements_collection, news_collection,
+    gallery_collection, guestbook_collection, contact_requests_collection,
+    contact_requests_archive_collection, guestbook_archive_collection
+]
+
+# Indexes superseded by the station-scoped compounds; dropped from databases created before them
+OBSOLETE_INDEXES = [
+    (news_collection, "date_-1"),
+    (guestbook_collection, "date_-1"),
+    (guestbook_collection, "approved_1_date_-1"),
+    (guestbook_collection, "station_1_approved_1_date_-1"),
+]
 
 class DatabaseManager:
     @staticmethod
     async def ensure_indexes():
         """Create necessary indexes for better performance"""
         # Create indexes for commonly queried fields
-        await news_collection.create_index([("date", -1)])
-        await guestbook_collection.create_index([("date", -1)])
+        await DatabaseManager.ensure_unique_index(station_collection, "callsign")
+        # Per-station reads lead with the station so each station's data is a contiguous index range
+        await news_collection.create_index([("station", 1), ("date", -1)])
+        # Partial indexes: the public feed only touches approved entries, moderators only pending ones
+        await guestbook_collection.create_index(
+            [("station", 1), ("date", -1)], partialFilterExpression={"approved": True}
+        )
+        await guestbook_collection.create_index(
+            [("station", 1), ("created_at", -1)], partialFilterExpression={"approved": False}
+        )
+        await contact_requests_collection.create_index([("station", 1), ("created_at", -1)])
+        await contact_requests_archive_collection.create_index([("station", 1), ("created_at", -1)])
+        await guestbook_archive_collection.create_index([("station", 1), ("created_at", -1)])
+        await equipment_collection.create_index([("station", 1), ("type", 1)])
+        await achievements_collection.create_index([("station", 1), ("year", -1)])
+        await qsl_cards_collection.create_index([("station", 1), ("year", -1)])
+        await gallery_collection.create_index([("station", 1), ("created_at", -1)])
+
+        # Archival policies run across all stations
         await contact_requests_collection.create_index([("created_at", -1)])
-        await equipment_collection.create_index("type")
-        await achievements_collection.create_index("year")
+        await contact_requests_collection.create_index([("handled", 1), ("created_at", 1)])
+        # Contact requests whose notification job has not been relayed to the queue yet
+        await contact_requests_collection.create_index(
+            [("outbox_job._id", 1)], partialFilterExpression={"outbox_job": {"$exists": True}}
+        )
+        await guestbook_collection.create_index([("approved", 1), ("created_at", 1)])
+        await contact_requests_archive_collection.create_index([("created_at", -1)])
+        await guestbook_archive_collection.create_index([("created_at", -1)])
+
+        # Background job queue
+        await jobs_collection.create_index([("status", 1), ("run_at", 1)])
+        await jobs_collection.create_index([("status", 1), ("locked_until", 1)])
+        await DatabaseManager.ensure_ttl_index(
+            jobs_collection, "finished_at", int(os.environ.get('JOB_DONE_TTL_SECONDS', 7 * 86400))
+        )
+        await dead_jobs_collection.create_index([("failed_at", -1)])
+
+        # Station status history and its rollups
+        await DatabaseManager.ensure_status_history_collection()
+        await status_history_collection.create_index([("callsign", 1), ("timestamp", -1)])
+        await status_rollups_collection.create_index(
+            [("callsign", 1), ("granularity", 1), ("bucket", 1)], unique=True
+        )
+
+        # DX cluster spots
+        await DatabaseManager.ensure_dx_spots_collection()
+        await dx_spots_collection.create_index([("received_at", -1)])
+        await dx_spots_collection.create_index([("band", 1), ("received_at", -1)])
+        await dx_spots_collection.create_index([("mode", 1), ("received_at", -1)])
+        await dx_spots_collection.create_index([("dx_call", 1), ("received_at", -1)])
+
+        # Reception reports: column chunks are read per station and day when rollups are rebuilt
+        await reception_chunks_collection.create_index([("station", 1), ("day", 1)])
+        await reception_rollups_collection.create_index([("station", 1), ("day", 1)], unique=True)
+
+        # Columnar exports, listed newest first per station
+        await exports_collection.create_index([("station", 1), ("created_at", -1)])
+
+        # Contest log: dupe indexes are rebuilt per contest in QSO order, recent contests on startup
+        await contests_collection.create_index([("station", 1), ("start", -1)])
+        await contests_collection.create_index([("end", 1)])
+        await qsos_collection.create_index([("station", 1), ("contest", 1), ("timestamp", 1)])
+        await qsos_collection.create_index([("station", 1), ("timestamp", 1)])
+        await qsos_collection.create_index([("station", 1), ("band", 1), ("timestamp", 1)])
+        await changes_collection.create_index([("at", 1), ("_id", 1)])
+
+        await DatabaseManager.drop_obsolete_indexes()
+
+    @staticmethod
+    async def drop_obsolete_indexes():
+        for collection, name in OBSOLETE_INDEXES:
+            if name in await collection.index_information():
+                await collection.drop_index(name)
+                logger.info("Dropped obsolete index %s.%s", collection.name, name)
+
+    @staticmethod
+    async def backfill_station():
+        """Assign documents written before multi-station support to the default station"""
+        for collection in STATION_SCOPED_COLLECTIONS:
+            result = await collection.update_many(
+                {"station": {"$exists": False}}, {"$set": {"station": DEFAULT_CALLSIGN}}
+            )
+            if result.modified_count:
+                logger.info("Assigned %d %s documents to %s", result.modified_count, collection.name, DEFAULT_CALLSIGN)
+
+    @staticmethod
+    async def ensure_unique_index(collection, field: str):
+        """Create a unique index on `field`, replacing the non-unique one of older databases"""
+        name = f"{field}_1"
+        existing = (await collection.index_information()).get(name)
+        if existing and existing.get("unique"):
+            return
+        if existing:
+            await collection.drop_index(name)
+        try:
+            await collection.create_index(field, unique=True)
+        except DuplicateKeyError:
+            # Existing duplicates must be merged by hand; keep lookups indexed meanwhile
+            logger.error("Duplicate %s.%s values, creating a non-unique index instead", collection.name, field)
+            await collection.create_index(field)
+
+    @staticmethod
+    async def ensure_ttl_index(collection, field: str, expire_after_seconds: Optional[int], **kwargs):
+        """Create, retune or drop a TTL index on a single field"""
+        name = kwargs.pop("name", f"{field}_ttl")
+        existing = await collection.index_information()
+        if not expire_after_seconds:
+            if name in existing:
+                await collection.drop_index(name)
+            return
+        if name in existing:
+            if existing[name].get("expireAfterSeconds") != expire_after_seconds:
+                await db.command(
+                    "collMod", collection.name,
+                    index={"name": name, "expireAfterSeconds": expire_after_seconds}
+                )
+            return
+        await collection.create_index(field, name=name, expireAfterSeconds=expire_after_seconds, **kwargs)
+
+    @staticmethod
+    async def ensure_status_history_collection():
+        """Create the status history as a time-series collection, or capped on older servers"""
+        if status_history_collection.name in await db.list_collection_names():
+            return
+        try:
+            await db.create_collection(
+                status_history_collection.name,
+                timeseries={"timeField": "timestamp", "metaField": "callsign", "granularity": "minutes"}
+            )
+        except CollectionInvalid:
+            return
+        except OperationFailure:
+            # Time-series collections need MongoDB 5.0+
+            await db.create_collection(
+                status_history_collection.name,
+                capped=True,
+                size=int(os.environ.get('STATUS_HISTORY_CAPPED_BYTES', 64 * 1024 * 1024))
+            )
+        
+    @staticmethod
+    async def ensure_dx_spots_collection():
+        """Create the DX spot history as a capped collection so old spots age out by size"""
+        if dx_spots_collection.name in await db.list_collection_names():
+            return
+        try:
+            await db.create_collection(
+                dx_spots_collection.name,
+                capped=True,
+                size=int(os.environ.get('DX_SPOTS_CAPPED_BYTES', 256 * 1024 * 1024))
+            )
+        except CollectionInvalid:
+            return
         
     @staticmethod
     async def init_sample_data():
-        """Initialize database with sample data if empty"""
+        """Initialize the default station with sample data if empty"""
+        station = {"station": DEFAULT_CALLSIGN}
         
         # Check if station info exists
-        station_exists = await station_collection.find_one({"callsign": "4K6AG"})
+        station_exists = await station_collection.find_one({"callsign": DEFAULT_CALLSIGN})
         if not station_exists:
             from models import StationInfo
             station_data = StationInfo(
-                callsign="4K6AG",
+                callsign=DEFAULT_CALLSIGN,
                 operator="John Doe",
                 location="Baku, Azerbaijan", 
                 grid="LN40AA",
@@ -54,7 +241,7 @@ class DatabaseManager:
             await station_collection.insert_one(station_data.dict(by_alias=True))
         
         # Check if equipment exists
-        equipment_exists = await equipment_collection.count_documents({})
+        equipment_exists = await equipment_collection.count_documents(station)
         if equipment_exists == 0:
             from models import Equipment
             sample_equipment = [
@@ -82,10 +269,10 @@ class DatabaseManager:
             ]
             
             for equipment in sample_equipment:
-                await equipment_collection.insert_one(equipment.dict(by_alias=True))
+                await equipment_collection.insert_one(dict(equipment.dict(by_alias=True), **station))
         
         # Check if QSL cards exist
-        qsl_exists = await qsl_cards_collection.count_documents({})
+        qsl_exists = await qsl_cards_collection.count_documents(station)
         if qsl_exists == 0:
             from models import QSLCard
             sample_qsl = [
@@ -102,10 +289,10 @@ class DatabaseManager:
             ]
             
             for qsl in sample_qsl:
-                await qsl_cards_collection.insert_one(qsl.dict(by_alias=True))
+                await qsl_cards_collection.insert_one(dict(qsl.dict(by_alias=True), **station))
         
         # Check if achievements exist
-        achievements_exists = await achievements_collection.count_documents({})
+        achievements_exists = await achievements_collection.count_documents(station)
         if achievements_exists == 0:
             from models import Achievement
             sample_achievements = [
@@ -127,10 +314,10 @@ class DatabaseManager:
             ]
             
             for achievement in sample_achievements:
-                await achievements_collection.insert_one(achievement.dict(by_alias=True))
+                await achievements_collection.insert_one(dict(achievement.dict(by_alias=True), **station))
         
         # Check if news exist
-        news_exists = await news_collection.count_documents({})
+        news_exists = await news_collection.count_documents(station)
         if news_exists == 0:
             from models import News
             sample_news = [
@@ -149,10 +336,10 @@ class DatabaseManager:
             ]
             
             for news_item in sample_news:
-                await news_collection.insert_one(news_item.dict(by_alias=True))
+                await news_collection.insert_one(dict(news_item.dict(by_alias=True), **station))
         
         # Check if gallery exists
-        gallery_exists = await gallery_collection.count_documents({})
+        gallery_exists = await gallery_collection.count_documents(station)
         if gallery_exists == 0:
             from models import Gallery
             sample_gallery = [
@@ -174,10 +361,10 @@ class DatabaseManager:
             ]
             
             for gallery_item in sample_gallery:
-                await gallery_collection.insert_one(gallery_item.dict(by_alias=True))
+                await gallery_collection.insert_one(dict(gallery_item.dict(by_alias=True), **station))
         
         # Check if guestbook exists
-        guestbook_exists = await guestbook_collection.count_documents({})
+        guestbook_exists = await guestbook_collection.count_documents(station)
         if guestbook_exists == 0:
             from models import Guestbook
             sample_guestbook = [
@@ -198,4 +385,4 @@ class DatabaseManager:
             ]
             
             for entry in sample_guestbook:
-                await guestbook_collection.insert_one(entry.dict(by_alias=True))
\ No newline at end of file
+                await guestbook_collection.insert_one(dict(entry.dict(by_alias=True), **station))
\ No newline at end of file
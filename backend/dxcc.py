@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+DXCC entity resolution from callsigns.
+
+Reads a country prefix file in the cty.dat format (https://www.country-files.com)
+into a prefix lookup table plus a table of exact-call overrides; a call resolves by
+exact match first, then by its longest known prefix. Portable calls are handled:
+"4K6AG/P" resolves as 4K6AG, "UA9/DL1ABC" and "DL1ABC/UA9" by the UA9 prefix,
+"UA1ABC/9" by UA9, and /MM or /AM calls to no entity. The parsed tables are
+cached as JSON next to the source file, so startup only parses the file again after it changes.
+
+The file is not part of the repository: download it from DXCC_PREFIX_URL with the fetch command
+(or set DXCC_FETCH_ON_STARTUP to download it at startup when missing).
+
+    python dxcc.py fetch
+    python dxcc.py resolve 4K6AG UA9/DL1ABC K1ABC/7
+    python dxcc.py bench --calls 1000000
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import random
+import re
+import time
+import urllib.request
+
+import typer
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+DXCC_PREFIX_FILE = Path(os.environ.get('DXCC_PREFIX_FILE', ROOT_DIR / 'cty.dat'))
+DXCC_CACHE_FILE = Path(os.environ.get('DXCC_CACHE_FILE', str(DXCC_PREFIX_FILE) + '.cache'))
+DXCC_PREFIX_URL = os.environ.get('DXCC_PREFIX_URL', 'https://www.country-files.com/cty/cty.dat')
+DXCC_FETCH_ON_STARTUP = os.environ.get('DXCC_FETCH_ON_STARTUP', 'false').lower() == 'true'
+DXCC_FETCH_TIMEOUT_SECONDS = float(os.environ.get('DXCC_FETCH_TIMEOUT_SECONDS', 10))
+# Calls per batch resolve request
+DXCC_RESOLVE_MAX = int(os.environ.get('DXCC_RESOLVE_MAX', 10000))
+
+ENTITY_FIELDS = ("country", "prefix", "continent", "cq_zone", "itu_zone")
+# Suffixes that don't change the entity; /MM and /AM mean no entity at all
+PORTABLE_SUFFIXES = {"P", "M", "QRP", "QRPP", "A", "B", "LH", "R", "J"}
+NO_ENTITY_SUFFIXES = {"MM", "AM"}
+
+_ALIAS_RE = re.compile(r"^(=?)([A-Z0-9/]+)")
+_CQ_RE = re.compile(r"\((\d+)\)")
+_ITU_RE = re.compile(r"\[(\d+)\]")
+_CONTINENT_RE = re.compile(r"\{(\w+)\}")
+_AREA_RE = re.compile(r"^(.*?[A-Z])[0-9]")
+
+def parse_cty(text: str) -> Tuple[List[Tuple], Dict[str, int], Dict[str, int]]:
+    """Parse cty.dat into (records, prefixes, calls); prefixes and calls map to record indexes.
+
+    Records are (country, prefix, continent, cq_zone, itu_zone) tuples, shared between aliases
+    with the same zones. WAE-only entities (primary prefix starting with "*") are skipped, so
+    their prefixes resolve to the DXCC entity they belong to.
+    """
+    records: List[Tuple] = []
+    record_index: Dict[Tuple, int] = {}
+    prefixes: Dict[str, int] = {}
+    calls: Dict[str, int] = {}
+
+    def index_of(record: Tuple) -> int:
+        index = record_index.get(record)
+        if index is None:
+            index = record_index[record] = len(records)
+            records.append(record)
+        return index
+
+    for entry in text.split(";"):
+        parts = entry.strip().split(":", 8)
+        if len(parts) < 9:
+            continue
+        country, cq, itu, continent, _, _, _, primary, aliases = (part.strip() for part in parts)
+        if primary.startswith("*"):
+            continue
+        for alias in aliases.replace("\n", "").split(","):
+            alias = alias.strip()
+            match = _ALIAS_RE.match(alias)
+            if not match:
+                continue
+            exact, key = match.groups()
+            cq_override = _CQ_RE.search(alias)
+            itu_override = _ITU_RE.search(alias)
+            continent_override = _CONTINENT_RE.search(alias)
+            index = index_of((
+                country, primary,
+                continent_override.group(1) if continent_override else continent,
+                int(cq_override.group(1) if cq_override else cq),
+                int(itu_override.group(1) if itu_override else itu),
+            ))
+            (calls if exact else prefixes)[key] = index
+    return records, prefixes, calls
+
+class PrefixResolver:
+    """Callsign -> DXCC entity lookup over the tables parsed from cty.dat"""
+
+    def __init__(self):
+        self.records: List[Tuple] = []
+        self.prefixes: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+        self.max_prefix = 0
+        self.source: Optional[str] = None
+
+    def load(self, path: Path = DXCC_PREFIX_FILE, cache: Optional[Path] = DXCC_CACHE_FILE):
+        """Load the tables, from the JSON cache when it was written for the current file"""
+        if not path.exists():
+            logger.warning("DXCC prefix file %s not found, callsigns will not be resolved", path)
+            return
+        stat = path.stat()
+        version = [str(path.resolve()), stat.st_mtime_ns, stat.st_size]
+        tables = None
+        if cache is not None and cache.exists():
+            try:
+                with open(cache, encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached["version"] == version:
+                    tables = [tuple(record) for record in cached["records"]], cached["prefixes"], cached["calls"]
+            except Exception:
+                logger.warning("Ignoring unreadable DXCC cache %s", cache)
+        if tables is None:
+            tables = parse_cty(path.read_text(encoding="latin-1"))
+            if cache is not None:
+                try:
+                    with open(cache, "w", encoding="utf-8") as f:
+                        json.dump({"version": version, "records": tables[0], "prefixes": tables[1], "calls": tables[2]}, f)
+                except OSError:
+                    logger.warning("Could not write DXCC cache %s", cache)
+
+        self.records, self.prefixes, self.calls = tables
+        self.max_prefix = max(map(len, self.prefixes), default=0)
+        self.source = str(path)
+        logger.info("Loaded %d DXCC prefixes and %d exact calls from %s", len(self.prefixes), len(self.calls), path)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.records)
+
+    def _index(self, call: str) -> Optional[int]:
+        index = self.calls.get(call)
+        if index is not None:
+            return index
+
+        if "/" in call:
+            parts = [part for part in call.split("/") if part]
+            if not parts or NO_ENTITY_SUFFIXES & set(parts[1:]):
+                return None
+            parts = parts[:1] + [part for part in parts[1:] if part not in PORTABLE_SUFFIXES]
+            if len(parts) == 1:
+                call = parts[0]
+                index = self.calls.get(call)
+                if index is not None:
+                    return index
+            elif len(parts[1]) == 1 and parts[1].isdigit():
+                # K1ABC/7: same prefix, other call area
+                match = _AREA_RE.match(parts[0])
+                call = match.group(1) + parts[1] if match else parts[0]
+            else:
+                # DL/4K6AG or 4K6AG/DL: the shorter part is the prefix of the country operated from
+                call = min(parts[:2], key=len)
+
+        for length in range(min(len(call), self.max_prefix), 0, -1):
+            index = self.prefixes.get(call[:length])
+            if index is not None:
+                return index
+        return None
+
+    def resolve(self, call: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not call:
+            return None
+        index = self._index(call.strip().upper())
+        if index is None:
+            return None
+        return dict(zip(ENTITY_FIELDS, self.records[index]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "entities": len({record[1] for record in self.records}),
+            "prefixes": len(self.prefixes),
+            "calls": len(self.calls),
+        }
+
+dxcc_resolver = PrefixResolver()
+
+def fetch_prefix_file(url: str = DXCC_PREFIX_URL, path: Path = DXCC_PREFIX_FILE, timeout: float = DXCC_FETCH_TIMEOUT_SECONDS):
+    """Download the prefix file; it replaces the current one only once complete"""
+    partial = path.with_name(path.name + ".part")
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response, open(partial, "wb") as f:
+            f.write(response.read())
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    logger.info("Downloaded DXCC prefix file %s from %s", path, url)
+
+def load_prefix_file(path: Path = DXCC_PREFIX_FILE):
+    """Load the prefix file at startup, downloading it first when missing and DXCC_FETCH_ON_STARTUP is set"""
+    if not path.exists() and DXCC_FETCH_ON_STARTUP:
+        try:
+            fetch_prefix_file(path=path)
+        except Exception:
+            logger.exception("Could not download DXCC prefix file from %s", DXCC_PREFIX_URL)
+    dxcc_resolver.load(path)
+
+def entity_fields(call: Optional[str], country: Optional[str] = None) -> Dict[str, Any]:
+    """`dxcc` and `country` fields for a document with this callsign; a country given by the user is kept"""
+    entity = dxcc_resolver.resolve(call)
+    if entity is None:
+        return {}
+    return {"dxcc": entity["prefix"], "country": country or entity["country"]}
+
+app = typer.Typer(help="Resolve callsigns to DXCC entities")
+
+@app.command()
+def fetch(
+    url: str = typer.Option(DXCC_PREFIX_URL, help="cty.dat download URL"),
+    path: Path = typer.Option(DXCC_PREFIX_FILE, help="cty.dat file"),
+):
+    """Download the prefix file and report what it contains"""
+    fetch_prefix_file(url, path)
+    dxcc_resolver.load(path)
+    typer.echo(f"{path}: {dxcc_resolver.stats()}")
+
+@app.command()
+def resolve(calls: List[str], path: Path = typer.Option(DXCC_PREFIX_FILE, help="cty.dat file")):
+    """Print the entity of each callsign"""
+    dxcc_resolver.load(path)
+    for call in calls:
+        typer.echo(f"{call:16} {dxcc_resolver.resolve(call)}")
+
+@app.command()
+def bench(
+    calls: int = typer.Option(1_000_000, help="Callsigns to resolve"),
+    path: Path = typer.Option(DXCC_PREFIX_FILE, help="cty.dat file"),
+):
+    """Measure load time and resolve throughput on synthetic callsigns"""
+    started = time.perf_counter()
+    dxcc_resolver.load(path)
+    typer.echo(f"load: {(time.perf_counter() - started) * 1000:.1f} ms, {dxcc_resolver.stats()}")
+
+    rnd = random.Random(42)
+    prefixes = list(dxcc_resolver.prefixes) or ["4K"]
+    suffixes = ["", "", "", "", "/P", "/QRP", "/7"]
+    sample = [
+        f"{rnd.choice(prefixes)}{rnd.randint(0, 9)}{rnd.choice('ABCDEFGH')}{rnd.choice('XYZ')}{rnd.choice(suffixes)}"
+        for _ in range(calls)
+    ]
+    started = time.perf_counter()
+    resolved = sum(dxcc_resolver.resolve(call) is not None for call in sample)
+    elapsed = time.perf_counter() - started
+    typer.echo(f"resolved {resolved}/{calls} in {elapsed:.2f} s: {calls / elapsed * 60:,.0f} calls/min")
+
+if __name__ == "__main__":
+    app()
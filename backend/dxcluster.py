@@ -0,0 +1,242 @@
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import random
+import re
+import uuid
+
+from database import dx_spots_collection, DEFAULT_CALLSIGN
+from bands import band_for_frequency
+
+logger = logging.getLogger(__name__)
+
+# Telnet DX cluster feed (DX Spider, AR-Cluster, CC Cluster or an RBN node); ingestion is off without a host
+DXCLUSTER_HOST = os.environ.get('DXCLUSTER_HOST')
+DXCLUSTER_PORT = int(os.environ.get('DXCLUSTER_PORT', 7300))
+DXCLUSTER_LOGIN = os.environ.get('DXCLUSTER_LOGIN', DEFAULT_CALLSIGN)
+# Reconnect when the feed is silent this long (clusters normally send spots or keepalives every few minutes)
+DXCLUSTER_IDLE_SECONDS = float(os.environ.get('DXCLUSTER_IDLE_SECONDS', 300))
+DXCLUSTER_RECONNECT_MAX_SECONDS = float(os.environ.get('DXCLUSTER_RECONNECT_MAX_SECONDS', 60))
+DX_SPOT_BATCH_SIZE = int(os.environ.get('DX_SPOT_BATCH_SIZE', 200))
+DX_SPOT_FLUSH_SECONDS = float(os.environ.get('DX_SPOT_FLUSH_SECONDS', 2))
+DX_SUBSCRIBER_QUEUE = int(os.environ.get('DX_SUBSCRIBER_QUEUE', 256))
+
+# "DX de SP5XYZ-#:  14025.0  4K6AG        CW 12 dB 25 WPM CQ            1234Z"
+SPOT_RE = re.compile(
+    r"^DX de\s+(?P<spotter>[^:\s]+?):?\s+(?P<frequency>[0-9]+(?:\.[0-9]+)?)\s+(?P<dx_call>[A-Z0-9/]+)\s+"
+    r"(?P<comment>.*?)\s*(?P<time>[0-9]{4})Z",
+    re.IGNORECASE
+)
+MODES = {
+    "CW": "CW", "SSB": "SSB", "USB": "SSB", "LSB": "SSB", "AM": "AM", "FM": "FM",
+    "FT8": "FT8", "FT4": "FT4", "RTTY": "RTTY", "PSK": "PSK", "PSK31": "PSK", "PSK63": "PSK",
+    "JT65": "JT65", "JT9": "JT9", "MSK144": "MSK144", "SSTV": "SSTV",
+}
+
+def parse_spot(line: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Parse one cluster line into a spot document, or None for announcements, prompts and noise"""
+    match = SPOT_RE.match(line.strip())
+    if not match:
+        return None
+    now = now or datetime.utcnow()
+
+    frequency = float(match.group("frequency"))
+    comment = match.group("comment").strip()
+    mode = next((MODES[word] for word in comment.upper().split() if word in MODES), None)
+
+    # Spots only carry HHMM; a time ahead of now belongs to the previous UTC day
+    hhmm = match.group("time")
+    spotted_at = now.replace(hour=int(hhmm[:2]) % 24, minute=int(hhmm[2:]) % 60, second=0, microsecond=0)
+    if spotted_at > now + timedelta(minutes=5):
+        spotted_at -= timedelta(days=1)
+
+    return {
+        "_id": str(uuid.uuid4()),
+        "spotter": match.group("spotter").upper().rstrip("-#"),
+        "dx_call": match.group("dx_call").upper(),
+        "frequency": frequency,
+        "band": band_for_frequency(f"{frequency} kHz"),
+        "mode": mode,
+        "comment": comment,
+        "spotted_at": spotted_at,
+        "received_at": now,
+    }
+
+class SpotFilter:
+    def __init__(self, band: Optional[str] = None, mode: Optional[str] = None, callsign: Optional[str] = None):
+        self.band = band
+        self.mode = mode.upper() if mode else None
+        self.callsign = callsign.upper() if callsign else None
+
+    def matches(self, spot: Dict[str, Any]) -> bool:
+        return (
+            (self.band is None or spot["band"] == self.band)
+            and (self.mode is None or spot["mode"] == self.mode)
+            and (self.callsign is None or spot["dx_call"] == self.callsign)
+        )
+
+    def query(self) -> Dict[str, Any]:
+        query = {}
+        if self.band:
+            query["band"] = self.band
+        if self.mode:
+            query["mode"] = self.mode
+        if self.callsign:
+            query["dx_call"] = self.callsign
+        return query
+
+class Subscription:
+    def __init__(self, spot_filter: SpotFilter):
+        self.filter = spot_filter
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=DX_SUBSCRIBER_QUEUE)
+        self.dropped = 0
+
+    def offer(self, spot: Dict[str, Any]):
+        # A slow browser loses its oldest spots rather than holding up the feed
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(spot)
+
+class SpotHub:
+    """In-memory fan-out of live spots; subscribers are indexed by band so each spot only visits interested ones"""
+
+    def __init__(self):
+        self._by_band: Dict[Optional[str], Set[Subscription]] = {}
+        self.published = 0
+
+    def subscribe(self, spot_filter: SpotFilter) -> Subscription:
+        subscription = Subscription(spot_filter)
+        self._by_band.setdefault(spot_filter.band, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._by_band.get(subscription.filter.band)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_band[subscription.filter.band]
+
+    def publish(self, spot: Dict[str, Any]):
+        self.published += 1
+        payload = None
+        for band in (None, spot["band"]) if spot["band"] else (None,):
+            for subscription in self._by_band.get(band, ()):
+                if subscription.filter.matches(spot):
+                    if payload is None:
+                        payload = serialize_spot(spot)
+                    subscription.offer(payload)
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(subscribers) for subscribers in self._by_band.values())
+
+def serialize_spot(spot: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in spot.items()
+    }
+
+class DXClusterClient:
+    """Reconnecting telnet client: parses spot lines, fans them out live and batches them into Mongo"""
+
+    def __init__(self, hub: SpotHub, host: Optional[str], port: int, login: str):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.login = login
+        self.connected = False
+        self.counters = {"connects": 0, "lines": 0, "spots": 0, "ignored": 0, "inserted": 0, "insert_errors": 0}
+        self._buffer: List[Dict[str, Any]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if self.host and not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._flush_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        await self.flush()
+
+    async def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                await self._session()
+                delay = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("DX cluster %s:%s disconnected: %s", self.host, self.port, e)
+            self.connected = False
+            # Exponential backoff with jitter so a restarted cluster isn't stampeded
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, DXCLUSTER_RECONNECT_MAX_SECONDS)
+
+    async def _session(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            # Clusters prompt for a callsign without a trailing newline; answering straight away works for all of them
+            writer.write(f"{self.login}\r\n".encode("ascii"))
+            await writer.drain()
+            self.connected = True
+            self.counters["connects"] += 1
+            logger.info("Connected to DX cluster %s:%s as %s", self.host, self.port, self.login)
+
+            while True:
+                line = await asyncio.wait_for(reader.readline(), DXCLUSTER_IDLE_SECONDS)
+                if not line:
+                    raise ConnectionError("connection closed by cluster")
+                self.ingest(line.decode("latin-1"))
+        finally:
+            writer.close()
+
+    def ingest(self, line: str):
+        self.counters["lines"] += 1
+        spot = parse_spot(line)
+        if spot is None:
+            self.counters["ignored"] += 1
+            return
+        self.counters["spots"] += 1
+        self.hub.publish(spot)
+        self._buffer.append(spot)
+        if len(self._buffer) >= DX_SPOT_BATCH_SIZE:
+            asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            await dx_spots_collection.insert_many(batch, ordered=False)
+            self.counters["inserted"] += len(batch)
+        except Exception:
+            # Live subscribers already have these spots; losing a batch from the history is acceptable
+            self.counters["insert_errors"] += len(batch)
+            logger.exception("Failed to store %d DX spots", len(batch))
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(DX_SPOT_FLUSH_SECONDS)
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.counters,
+            enabled=bool(self.host),
+            connected=self.connected,
+            buffered=len(self._buffer),
+            subscribers=self.hub.subscribers,
+        )
+
+spot_hub = SpotHub()
+dx_cluster = DXClusterClient(spot_hub, DXCLUSTER_HOST, DXCLUSTER_PORT, DXCLUSTER_LOGIN)
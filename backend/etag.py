@@ -0,0 +1,59 @@
+import hashlib
+
+class ETagMiddleware:
+    """ASGI middleware adding ETags to GET JSON responses and answering If-None-Match with 304"""
+
+    def __init__(self, app, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = None
+        for key, value in scope.get("headers", []):
+            if key == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        start = None
+        passthrough = False
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                # Only small JSON bodies are buffered; errors and streamed exports pass straight through
+                if message["status"] != 200 or not content_type.startswith(b"application/json"):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+            headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+            headers.append((b"etag", etag.encode("latin-1")))
+
+            if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+                await send(dict(start, status=304, headers=headers))
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            await send(dict(start, headers=headers))
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Columnar exports of station data for offline analysis.
+
+Streams a dataset from Motor cursors into Parquet or Arrow IPC (Feather v2)
+files: rows are converted one cursor batch at a time and written as row groups
+(record batches), so memory stays bounded by EXPORT_BATCH_ROWS however large
+the collection is. Exports can be projected to a subset of columns and
+partitioned by year, month or day into hive-style directories
+(`month=2024-05/...`), readable directly by pandas and pyarrow.dataset.
+
+    python exports.py run guestbook --station 4K6AG --format arrow --partition month
+    python exports.py show exports/4K6AG/<export id>
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import typer
+
+from database import (
+    exports_collection, guestbook_collection, contact_requests_collection,
+    contact_requests_archive_collection, qsos_collection, DEFAULT_CALLSIGN
+)
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+EXPORT_DIR = Path(os.environ.get('EXPORT_DIR', ROOT_DIR / 'exports'))
+# Rows per cursor batch and per row group
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', 50_000))
+# Finished exports kept per station; older ones are deleted with their files
+EXPORT_KEEP = int(os.environ.get('EXPORT_KEEP', 20))
+
+EXPORT_JOB = "export"
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+PARTITIONS = {"year": "%Y", "month": "%Y-%m", "day": "%Y-%m-%d"}
+
+TIMESTAMP = pa.timestamp("ms", tz="UTC")
+_CONTACT_FIELDS = [
+    ("id", pa.string()), ("name", pa.string()), ("email", pa.string()), ("callsign", pa.string()),
+    ("message", pa.string()), ("qsl_request", pa.bool_()), ("date", TIMESTAMP), ("frequency", pa.string()),
+    ("mode", pa.string()), ("rst_sent", pa.string()), ("rst_received", pa.string()), ("handled", pa.bool_()),
+    ("created_at", TIMESTAMP),
+]
+
+# Each dataset reads its collections in `date_field` order, so partitions are written one after another
+DATASETS: Dict[str, Dict[str, Any]] = {
+    "guestbook": {
+        "collections": [guestbook_collection],
+        "filter": {"approved": True},
+        "date_field": "date",
+        "schema": pa.schema([
+            ("id", pa.string()), ("name", pa.string()), ("callsign", pa.string()), ("message", pa.string()),
+            ("country", pa.string()), ("date", TIMESTAMP),
+        ]),
+    },
+    "contact_requests": {
+        "collections": [contact_requests_collection, contact_requests_archive_collection],
+        "filter": {},
+        "date_field": "created_at",
+        "schema": pa.schema(_CONTACT_FIELDS),
+    },
+    # The station's logged QSOs, contest QSOs included
+    "qso_log": {
+        "collections": [qsos_collection],
+        "filter": {},
+        "date_field": "timestamp",
+        "schema": pa.schema([
+            ("id", pa.string()), ("call", pa.string()), ("timestamp", TIMESTAMP), ("band", pa.string()),
+            ("frequency", pa.float64()), ("mode", pa.string()), ("logged_mode", pa.string()),
+            ("rst_sent", pa.string()), ("rst_rcvd", pa.string()), ("exchange_sent", pa.string()),
+            ("exchange", pa.string()), ("operator", pa.string()), ("contest", pa.string()), ("dupe", pa.bool_()),
+        ]),
+    },
+}
+
+def project_schema(dataset: str, columns: Optional[List[str]]) -> pa.Schema:
+    """Schema of the requested columns, in the dataset's column order"""
+    schema = DATASETS[dataset]["schema"]
+    if not columns:
+        return schema
+    unknown = set(columns) - set(schema.names)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    return pa.schema([field for field in schema if field.name in columns])
+
+def _to_batch(docs: List[Dict[str, Any]], schema: pa.Schema) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [pa.array([doc.get("_id" if field.name == "id" else field.name) for doc in docs], type=field.type)
+         for field in schema],
+        schema=schema
+    )
+
+class PartitionWriter:
+    """Writes record batches to one file per (source, partition), switching files as the partition changes"""
+
+    def __init__(self, directory: Path, schema: pa.Schema, file_format: str, partition: Optional[str]):
+        self.directory = directory
+        self.schema = schema
+        self.format = file_format
+        self.partition = partition
+        self.files: List[Dict[str, Any]] = []
+        self._writer = None
+        self._sink = None
+        self._key = None
+
+    def write(self, source: str, key: Optional[str], batch: pa.RecordBatch):
+        if self._writer is None or key != self._key:
+            self.close()
+            self._open(source, key)
+        if self.format == "parquet":
+            self._writer.write_batch(batch, row_group_size=EXPORT_BATCH_ROWS)
+        else:
+            self._writer.write_batch(batch)
+        self.files[-1]["rows"] += batch.num_rows
+        self.files[-1]["row_groups"] += 1
+
+    def _open(self, source: str, key: Optional[str]):
+        directory = self.directory / f"{self.partition}={key or 'unknown'}" if self.partition else self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{source}-{len(self.files):04d}{FORMATS[self.format]}"
+        if self.format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            # Uncompressed IPC files can be memory-mapped and read without copying
+            self._sink = pa.OSFile(str(path), "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+        self._key = key
+        self.files.append({"path": str(path.relative_to(self.directory)), "rows": 0, "row_groups": 0})
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+            self.files[-1]["size"] = (self.directory / self.files[-1]["path"]).stat().st_size
+        self._writer = None
+        self._sink = None
+
+async def write_export(
+    directory: Path,
+    callsign: str,
+    dataset: str,
+    file_format: str = "parquet",
+    columns: Optional[List[str]] = None,
+    partition: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Stream one station's dataset into `directory`; returns the written files and row count"""
+    spec = DATASETS[dataset]
+    schema = project_schema(dataset, columns)
+    date_field = spec["date_field"]
+
+    query = dict(spec["filter"], station=callsign)
+    if start or end:
+        query[date_field] = {}
+        if start:
+            query[date_field]["$gte"] = start
+        if end:
+            query[date_field]["$lt"] = end
+    projection = {"_id" if name == "id" else name: 1 for name in schema.names}
+    projection[date_field] = 1
+
+    writer = PartitionWriter(directory, schema, file_format, partition)
+    try:
+        for collection in spec["collections"]:
+            cursor = collection.find(query, projection).sort(date_field, 1).batch_size(EXPORT_BATCH_ROWS)
+            docs: List[Dict[str, Any]] = []
+            key = None
+            async for doc in cursor:
+                doc_key = doc[date_field].strftime(PARTITIONS[partition]) if partition and doc.get(date_field) else None
+                if docs and (len(docs) >= EXPORT_BATCH_ROWS or doc_key != key):
+                    await asyncio.to_thread(writer.write, collection.name, key, _to_batch(docs, schema))
+                    docs = []
+                docs.append(doc)
+                key = doc_key
+            if docs:
+                await asyncio.to_thread(writer.write, collection.name, key, _to_batch(docs, schema))
+            writer.close()
+    finally:
+        writer.close()
+
+    return {"files": writer.files, "rows": sum(file["rows"] for file in writer.files)}
+
+def open_export(directory: Path, file_format: str, partitioned: bool = False) -> ds.Dataset:
+    """Open a finished export for local reads; Arrow files are memory-mapped rather than loaded.
+
+    `open_export(path, "arrow", partitioned=True).to_table(columns=[...]).to_pandas()`
+    """
+    return ds.dataset(
+        directory,
+        format="ipc" if file_format == "arrow" else "parquet",
+        filesystem=pafs.LocalFileSystem(use_mmap=file_format == "arrow"),
+        partitioning="hive" if partitioned else None,
+        exclude_invalid_files=True
+    )
+
+class ExportManager:
+    @staticmethod
+    def directory(callsign: str, export_id: str) -> Path:
+        return EXPORT_DIR / callsign / export_id
+
+    @staticmethod
+    async def create(callsign: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        project_schema(request["dataset"], request.get("columns"))
+        now = datetime.utcnow()
+        export = dict(
+            request,
+            _id=str(uuid.uuid4()),
+            station=callsign,
+            status="pending",
+            files=[],
+            rows=0,
+            error=None,
+            created_at=now,
+            updated_at=now,
+        )
+        await exports_collection.insert_one(export)
+        await job_queue.enqueue(EXPORT_JOB, {"export_id": export["_id"]})
+        return export
+
+    @staticmethod
+    async def run(export_id: str):
+        export = await exports_collection.find_one({"_id": export_id})
+        if export is None or export["status"] == "done":
+            return
+        final = ExportManager.directory(export["station"], export_id)
+        # Each attempt writes its own scratch directory, renamed into place once complete, so an attempt
+        # that outlived its job lease never shares files with the one that reclaimed the job
+        scratch = final.with_name(f"{final.name}.{uuid.uuid4().hex}.tmp")
+        await exports_collection.update_one(
+            {"_id": export_id}, {"$set": {"status": "running", "updated_at": datetime.utcnow()}}
+        )
+
+        try:
+            result = await write_export(
+                scratch, export["station"], export["dataset"], export["format"], export.get("columns"),
+                export.get("partition"), export.get("start"), export.get("end")
+            )
+        except Exception as e:
+            await asyncio.to_thread(shutil.rmtree, scratch, True)
+            await exports_collection.update_one(
+                {"_id": export_id},
+                {"$set": {"status": "failed", "error": f"{type(e).__name__}: {e}", "updated_at": datetime.utcnow()}}
+            )
+            raise
+        scratch.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(ExportManager._replace, scratch, final)
+
+        await exports_collection.update_one(
+            {"_id": export_id},
+            {"$set": dict(result, status="done", error=None, updated_at=datetime.utcnow())}
+        )
+        logger.info("Exported %d %s rows for %s to %s", result["rows"], export["dataset"], export["station"], final)
+        await ExportManager.prune(export["station"])
+
+    @staticmethod
+    def _replace(scratch: Path, final: Path):
+        """Rename a finished scratch directory to `final`; a previous attempt's files are moved aside first"""
+        previous = final.with_name(f"{final.name}.{uuid.uuid4().hex}.old")
+        try:
+            final.rename(previous)
+        except FileNotFoundError:
+            previous = None
+        scratch.rename(final)
+        if previous is not None:
+            shutil.rmtree(previous, True)
+
+    @staticmethod
+    async def recent(callsign: str, limit: int) -> List[Dict[str, Any]]:
+        return await exports_collection.find({"station": callsign}).sort("created_at", -1).limit(limit).to_list(limit)
+
+    @staticmethod
+    async def get(callsign: str, export_id: str) -> Optional[Dict[str, Any]]:
+        return await exports_collection.find_one({"_id": export_id, "station": callsign})
+
+    @staticmethod
+    async def delete(callsign: str, export_id: str) -> bool:
+        result = await exports_collection.delete_one({"_id": export_id, "station": callsign})
+        if not result.deleted_count:
+            return False
+        directory = ExportManager.directory(callsign, export_id)
+        # Scratch directories of attempts that never finished go with it
+        for path in [directory, *directory.parent.glob(f"{export_id}.*.tmp")]:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+        return True
+
+    @staticmethod
+    async def prune(callsign: str):
+        stale = await exports_collection.find(
+            {"station": callsign, "status": "done"}, {"_id": 1}
+        ).sort("created_at", -1).skip(EXPORT_KEEP).to_list(None)
+        for export in stale:
+            await ExportManager.delete(callsign, export["_id"])
+
+@job_queue.handler(EXPORT_JOB)
+async def run_export_job(payload: Dict[str, Any]):
+    await ExportManager.run(payload["export_id"])
+
+app = typer.Typer(help="Columnar exports of station data")
+
+@app.command()
+def run(
+    dataset: str = typer.Argument(..., help=f"One of: {', '.join(DATASETS)}"),
+    station: str = typer.Option(DEFAULT_CALLSIGN, help="Station callsign"),
+    output: Optional[Path] = typer.Option(None, help="Output directory (default EXPORT_DIR/<station>/<timestamp>)"),
+    file_format: str = typer.Option("parquet", "--format", help="parquet or arrow"),
+    columns: Optional[List[str]] = typer.Option(None, "--column", help="Columns to export (repeatable)"),
+    partition: Optional[str] = typer.Option(None, help="year, month or day"),
+):
+    """Export a dataset directly, without going through the API and job queue"""
+    if dataset not in DATASETS or file_format not in FORMATS or (partition and partition not in PARTITIONS):
+        raise typer.BadParameter("Unknown dataset, format or partition")
+    station = station.upper()
+    output = output or EXPORT_DIR / station / datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    result = asyncio.run(write_export(output, station, dataset, file_format, columns, partition))
+    typer.echo(f"Wrote {result['rows']} rows in {len(result['files'])} files to {output}")
+
+@app.command()
+def show(
+    directory: Path = typer.Argument(..., exists=True, file_okay=False),
+    file_format: str = typer.Option("parquet", "--format", help="parquet or arrow"),
+    partition: bool = typer.Option(True, help="Read partition directories as a column"),
+):
+    """Print the schema and row count of an export"""
+    dataset = open_export(directory, file_format, partition)
+    typer.echo(dataset.schema.to_string(show_schema_metadata=False))
+    typer.echo(f"{dataset.count_rows()} rows in {len(dataset.files)} files")
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Local fake DX cluster for developing and testing the spot ingestion.
+
+Speaks the telnet dialect of DX Spider/AR-Cluster closely enough for dxcluster.py:
+prompts for a callsign, then streams spot lines. Replays a recorded session
+(one cluster line per line, as captured with `telnet host port | tee`) or,
+without --file, generates synthetic traffic including spots of --callsign.
+
+    python fake_cluster.py --port 7300 --rate 20
+    python fake_cluster.py --file session.txt --loop
+    python fake_cluster.py --drop-after 500   # exercise reconnects
+
+Point the API at it with DXCLUSTER_HOST=localhost DXCLUSTER_PORT=7300.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+import asyncio
+import itertools
+import random
+
+import typer
+
+from bands import BAND_PLAN
+
+CALLS = ["DL1ABC", "JA1XYZ", "K1TTT", "VK2DX", "PY2AA", "ZS6BK", "UA9CDC", "EA8TX", "W6ABC", "OH2BH"]
+MODES = ["CW", "SSB", "FT8", "FT4", "RTTY"]
+NOISE = [
+    "To ALL de {spotter}: QRV 20m CW tonight",
+    "WWV de VE7CC <{hour:02d}>:   SFI=152, A=8, K=2, No Storms -> No Storms",
+    "WCY de DK0WCY-1 <{hour:02d}> : K=2 expK=2 A=9 R=98 SFI=153 SA=qui GMF=qui Au=no",
+]
+
+def synthetic_lines(callsign: str, seed: int) -> Iterator[str]:
+    rnd = random.Random(seed)
+    bands = [band for band in BAND_PLAN if band[0] not in ("60m", "2m", "70cm")]
+    while True:
+        now = datetime.utcnow()
+        if rnd.random() < 0.05:
+            yield rnd.choice(NOISE).format(spotter=rnd.choice(CALLS), hour=now.hour)
+            continue
+        _, low, high = rnd.choice(bands)
+        frequency = round(rnd.uniform(low, min(high, low + 0.3)) * 1000, 1)
+        dx_call = callsign if rnd.random() < 0.1 else rnd.choice(CALLS)
+        spotter = rnd.choice(CALLS) + rnd.choice(["", "-#"])
+        comment = f"{rnd.choice(MODES)} {rnd.randint(3, 35)} dB"
+        yield f"DX de {spotter + ':':<10}{frequency:>8.1f}  {dx_call:<13}{comment:<30} {now:%H%M}Z"
+
+def recorded_lines(path: Path, loop: bool) -> Iterator[str]:
+    lines: List[str] = [line.rstrip("\r\n") for line in path.read_text(encoding="latin-1").splitlines()]
+    return itertools.cycle(lines) if loop else iter(lines)
+
+async def serve_client(reader, writer, lines: Iterator[str], rate: float, drop_after: Optional[int]):
+    peer = writer.get_extra_info("peername")
+    try:
+        writer.write(b"Welcome to the fake DX cluster\r\n\r\nPlease enter your call: ")
+        await writer.drain()
+        login = (await reader.readline()).decode("latin-1").strip()
+        typer.echo(f"{peer} logged in as {login or '?'}")
+        writer.write(f"Hello {login}, this is FAKE-1\r\n{login} de FAKE-1 >\r\n".encode("latin-1"))
+
+        for sent, line in enumerate(lines, start=1):
+            writer.write(f"{line}\r\n".encode("latin-1"))
+            await writer.drain()
+            if drop_after and sent >= drop_after:
+                typer.echo(f"{peer} dropped after {sent} lines")
+                break
+            await asyncio.sleep(1 / rate)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+def main(
+    host: str = typer.Option("127.0.0.1", help="Address to listen on"),
+    port: int = typer.Option(7300, help="Port to listen on"),
+    file: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="Recorded cluster session to replay"),
+    loop: bool = typer.Option(False, help="Replay the recording forever"),
+    rate: float = typer.Option(10.0, min=0.1, help="Lines per second per client"),
+    callsign: str = typer.Option("4K6AG", help="Callsign to include in synthetic spots"),
+    drop_after: Optional[int] = typer.Option(None, help="Close each connection after this many lines"),
+    seed: int = typer.Option(42, help="Seed for synthetic traffic"),
+):
+    async def handle(reader, writer):
+        lines = recorded_lines(file, loop) if file else synthetic_lines(callsign, seed)
+        await serve_client(reader, writer, lines, rate, drop_after)
+
+    async def run():
+        server = await asyncio.start_server(handle, host, port)
+        typer.echo(f"Fake DX cluster listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    typer.run(main)
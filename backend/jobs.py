@@ -0,0 +1,260 @@
+from pymongo import ReturnDocument
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import random
+import uuid
+
+from database import jobs_collection, dead_jobs_collection
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 60))
+# A running job's lease is extended this often, so long jobs (exports) are not reclaimed while they run
+JOB_LEASE_RENEW_SECONDS = float(os.environ.get('JOB_LEASE_RENEW_SECONDS', JOB_LEASE_SECONDS / 3))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 5))
+JOB_BACKOFF_SECONDS = float(os.environ.get('JOB_BACKOFF_SECONDS', 10))
+JOB_BACKOFF_MAX_SECONDS = float(os.environ.get('JOB_BACKOFF_MAX_SECONDS', 3600))
+JOB_RELAY_BATCH = int(os.environ.get('JOB_RELAY_BATCH', 100))
+# Documents carry their job under this field until the relay has moved it onto the queue
+OUTBOX_FIELD = "outbox_job"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class JobQueue:
+    """Mongo-backed job queue with an asyncio worker pool, retries with backoff and a dead-letter queue"""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._outboxes: List[Any] = []
+        self._relay_wakeup = asyncio.Event()
+
+    def handler(self, job_type: str):
+        """Decorator registering the coroutine that processes jobs of `job_type`"""
+        def decorator(func: JobHandler):
+            self.handlers[job_type] = func
+            return func
+        return decorator
+
+    def build(self, job_type: str, payload: Dict[str, Any], max_attempts: int = JOB_MAX_ATTEMPTS) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], **kwargs) -> str:
+        job = self.build(job_type, payload, **kwargs)
+        await jobs_collection.insert_one(job)
+        self._wakeup.set()
+        return job["_id"]
+
+    def outbox(self, collection):
+        """Register a collection whose documents may embed a job (see `stage`)"""
+        self._outboxes.append(collection)
+        return collection
+
+    def stage(self, doc: Dict[str, Any], job_type: str, payload: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        """Embed a job in `doc`, so inserting the document is the only write that enqueues it"""
+        doc[OUTBOX_FIELD] = self.build(job_type, payload, **kwargs)
+        return doc
+
+    def staged(self):
+        """Relay now instead of at the next poll; call once the staging document is written"""
+        self._relay_wakeup.set()
+
+    async def relay(self) -> int:
+        """Move staged jobs from the outboxes onto the queue.
+
+        The job keeps the id it was staged with, so relaying it twice after a crash is a no-op.
+        """
+        moved = 0
+        for outbox in self._outboxes:
+            async for doc in outbox.find({OUTBOX_FIELD: {"$exists": True}}, {OUTBOX_FIELD: 1}).limit(JOB_RELAY_BATCH):
+                job = doc[OUTBOX_FIELD]
+                fields = {key: value for key, value in job.items() if key != "_id"}
+                await jobs_collection.update_one({"_id": job["_id"]}, {"$setOnInsert": fields}, upsert=True)
+                await outbox.update_one({"_id": doc["_id"]}, {"$unset": {OUTBOX_FIELD: ""}})
+                moved += 1
+        if moved:
+            self._wakeup.set()
+        return moved
+
+    async def _relay_worker(self):
+        while True:
+            self._relay_wakeup.clear()
+            try:
+                moved = await self.relay()
+            except Exception:
+                logger.exception("Failed to relay staged jobs")
+                moved = 0
+            if moved >= JOB_RELAY_BATCH:
+                continue
+            try:
+                await asyncio.wait_for(self._relay_wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def claim(self) -> Optional[Dict[str, Any]]:
+        """Lease the next due job; expired leases from crashed workers are picked up again"""
+        now = datetime.utcnow()
+        return await jobs_collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "run_at": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "running", "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def _lease(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Filter matching the job only while this claim still holds it; a reclaim bumps `attempts`"""
+        return {"_id": job["_id"], "status": "running", "attempts": job["attempts"]}
+
+    async def _renew(self, job: Dict[str, Any]):
+        """Keep extending the lease while the handler runs; stops once another worker has reclaimed the job"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_RENEW_SECONDS)
+            now = datetime.utcnow()
+            try:
+                result = await jobs_collection.update_one(
+                    self._lease(job),
+                    {"$set": {"locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now}}
+                )
+            except Exception:
+                logger.exception("Failed to renew lease of job %s (%s)", job["_id"], job["type"])
+                continue
+            if not result.matched_count:
+                logger.warning("Job %s (%s) lost its lease while running", job["_id"], job["type"])
+                return
+
+    async def process(self, job: Dict[str, Any]):
+        handler = self.handlers.get(job["type"])
+        heartbeat = asyncio.create_task(self._renew(job))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type {job['type']}")
+            await handler(job["payload"])
+        except Exception as e:
+            await self._fail(job, e)
+            return
+        finally:
+            heartbeat.cancel()
+
+        now = datetime.utcnow()
+        result = await jobs_collection.update_one(
+            self._lease(job),
+            {"$set": {"status": "done", "finished_at": now, "updated_at": now, "locked_until": None}}
+        )
+        if not result.matched_count:
+            logger.warning("Job %s (%s) finished after its lease expired", job["_id"], job["type"])
+
+    async def _fail(self, job: Dict[str, Any], error: Exception):
+        now = datetime.utcnow()
+        message = f"{type(error).__name__}: {error}"
+        if job["attempts"] >= job.get("max_attempts", JOB_MAX_ATTEMPTS):
+            # Mark it dead under the lease first, so a worker that reclaimed it keeps it
+            result = await jobs_collection.update_one(self._lease(job), {"$set": {"status": "dead", "updated_at": now}})
+            if not result.matched_count:
+                logger.warning("Job %s (%s) failed after its lease expired: %s", job["_id"], job["type"], message)
+                return
+            logger.error("Job %s (%s) moved to dead-letter queue: %s", job["_id"], job["type"], message)
+            await dead_jobs_collection.replace_one(
+                {"_id": job["_id"]},
+                dict(job, status="dead", last_error=message, locked_until=None, failed_at=now, updated_at=now),
+                upsert=True
+            )
+            await jobs_collection.delete_one({"_id": job["_id"], "status": "dead"})
+            return
+
+        delay = min(JOB_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1), JOB_BACKOFF_MAX_SECONDS)
+        delay *= random.uniform(0.8, 1.2)
+        logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job["_id"], job["type"], delay, message)
+        result = await jobs_collection.update_one(
+            self._lease(job),
+            {"$set": {
+                "status": "pending",
+                "run_at": now + timedelta(seconds=delay),
+                "locked_until": None,
+                "last_error": message,
+                "updated_at": now,
+            }}
+        )
+        if not result.matched_count:
+            logger.warning("Job %s (%s) failed after its lease expired: %s", job["_id"], job["type"], message)
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self.claim()
+            except Exception:
+                logger.exception("Failed to claim job")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.process(job)
+            except Exception:
+                # The lease expires and another worker picks the job up again
+                logger.exception("Failed to process job %s (%s)", job["_id"], job["type"])
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            self._tasks.append(asyncio.create_task(self._relay_worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> Dict[str, int]:
+        counts = {"pending": 0, "running": 0, "done": 0}
+        async for row in jobs_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        counts["dead"] = await dead_jobs_collection.count_documents({})
+        return counts
+
+    async def retry_dead(self, job_id: str) -> bool:
+        """Move a dead-lettered job back onto the queue with a fresh attempt budget"""
+        job = await dead_jobs_collection.find_one({"_id": job_id})
+        if not job:
+            return False
+        now = datetime.utcnow()
+        job.update(status="pending", attempts=0, run_at=now, updated_at=now)
+        job.pop("failed_at", None)
+        await jobs_collection.replace_one({"_id": job_id}, job, upsert=True)
+        await dead_jobs_collection.delete_one({"_id": job_id})
+        self._wakeup.set()
+        return True
+
+job_queue = JobQueue()
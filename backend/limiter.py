@@ -0,0 +1,226 @@
+from collections import deque
+from contextvars import ContextVar
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from pymongo.errors import PyMongoError
+from typing import Any, Callable, Deque, Dict, Optional, Type
+import asyncio
+import functools
+import os
+import time
+
+import pymongo
+
+CONCURRENCY_LIMIT_ENABLED = os.environ.get('CONCURRENCY_LIMIT_ENABLED', 'true').lower() == 'true'
+CONCURRENCY_LIMIT_INITIAL = int(os.environ.get('CONCURRENCY_LIMIT_INITIAL', 20))
+CONCURRENCY_LIMIT_MIN = int(os.environ.get('CONCURRENCY_LIMIT_MIN', 4))
+CONCURRENCY_LIMIT_MAX = int(os.environ.get('CONCURRENCY_LIMIT_MAX', 200))
+# Ceiling of each station's own limit, below the global one so a single station cannot take every slot
+CONCURRENCY_STATION_LIMIT_MAX = int(os.environ.get(
+    'CONCURRENCY_STATION_LIMIT_MAX', max(CONCURRENCY_LIMIT_MIN, CONCURRENCY_LIMIT_MAX // 4)
+))
+# Multiplicative decrease applied when a request times out or runs past half its deadline
+CONCURRENCY_BACKOFF = float(os.environ.get('CONCURRENCY_BACKOFF', 0.9))
+CONCURRENCY_QUEUE_SIZE = int(os.environ.get('CONCURRENCY_QUEUE_SIZE', 50))
+CONCURRENCY_QUEUE_TIMEOUT_MS = int(os.environ.get('CONCURRENCY_QUEUE_TIMEOUT_MS', 500))
+CONCURRENCY_RETRY_AFTER_SECONDS = int(os.environ.get('CONCURRENCY_RETRY_AFTER_SECONDS', 1))
+# Default per-request deadline; Mongo operations get the remaining time as maxTimeMS
+REQUEST_DEADLINE_MS = int(os.environ.get('REQUEST_DEADLINE_MS', 2000))
+
+class Overloaded(Exception):
+    pass
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded FIFO wait queue.
+
+    The limit grows by one per request that finishes in time while the limit is actually in use,
+    and shrinks by CONCURRENCY_BACKOFF per request that times out or gets slow.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float, queue_size: int, queue_timeout: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.counters = {"accepted": 0, "queued": 0, "rejected": 0, "queue_timeouts": 0, "overloads": 0}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            self.counters["accepted"] += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.counters["rejected"] += 1
+            raise Overloaded()
+
+        # release() hands the slot over by resolving the future, so a woken waiter already counts as in flight
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.counters["queued"] += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(future)
+            self.counters["queue_timeouts"] += 1
+            raise Overloaded()
+        except asyncio.CancelledError:
+            self._discard(future)
+            if future.done() and not future.cancelled():
+                self.release(overloaded=False, sample=False)
+            raise
+        self.counters["accepted"] += 1
+
+    def release(self, overloaded: bool, sample: bool = True):
+        if sample:
+            if overloaded:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self.counters["overloads"] += 1
+            elif self.inflight * 2 >= self.limit:
+                self.limit = min(self.maximum, self.limit + 1)
+        self.inflight -= 1
+
+        while self._waiters and self.inflight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self.inflight += 1
+
+    def _discard(self, future: asyncio.Future):
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.counters,
+            enabled=CONCURRENCY_LIMIT_ENABLED,
+            limit=int(self.limit),
+            inflight=self.inflight,
+            waiting=len(self._waiters),
+        )
+
+class StationLimiter:
+    """An AdaptiveLimiter per station callsign, under a global AdaptiveLimiter that caps the total.
+
+    Station requests queue and are shed by their own station's limiter first, so a busy or slow
+    station backs off on its own instead of filling the shared queue. Requests outside a station
+    only go through the global limiter. Idle station limiters back at their initial limit are dropped.
+    """
+
+    def __init__(self):
+        self.total = AdaptiveLimiter(
+            CONCURRENCY_LIMIT_INITIAL, CONCURRENCY_LIMIT_MIN, CONCURRENCY_LIMIT_MAX, CONCURRENCY_BACKOFF,
+            CONCURRENCY_QUEUE_SIZE, CONCURRENCY_QUEUE_TIMEOUT_MS / 1000
+        )
+        self.stations: Dict[str, AdaptiveLimiter] = {}
+        self.station_initial = min(CONCURRENCY_LIMIT_INITIAL, CONCURRENCY_STATION_LIMIT_MAX)
+
+    def _station(self, callsign: str) -> AdaptiveLimiter:
+        limiter = self.stations.get(callsign)
+        if limiter is None:
+            limiter = self.stations[callsign] = AdaptiveLimiter(
+                self.station_initial, CONCURRENCY_LIMIT_MIN,
+                CONCURRENCY_STATION_LIMIT_MAX, CONCURRENCY_BACKOFF,
+                CONCURRENCY_QUEUE_SIZE, CONCURRENCY_QUEUE_TIMEOUT_MS / 1000
+            )
+        return limiter
+
+    def _drop_idle(self, callsign: str):
+        limiter = self.stations.get(callsign)
+        if limiter and not limiter.inflight and not limiter._waiters and limiter.limit >= self.station_initial:
+            del self.stations[callsign]
+
+    async def acquire(self, callsign: Optional[str]):
+        if callsign is not None:
+            try:
+                await self._station(callsign).acquire()
+            except BaseException:
+                self._drop_idle(callsign)
+                raise
+        try:
+            await self.total.acquire()
+        except BaseException:
+            if callsign is not None:
+                self.stations[callsign].release(overloaded=False, sample=False)
+                self._drop_idle(callsign)
+            raise
+
+    def release(self, callsign: Optional[str], overloaded: bool):
+        self.total.release(overloaded)
+        if callsign is not None:
+            self.stations[callsign].release(overloaded)
+            self._drop_idle(callsign)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.total.stats(),
+            stations={callsign: limiter.stats() for callsign, limiter in sorted(self.stations.items())},
+        )
+
+concurrency_limiter = StationLimiter()
+
+# Set while a request holds a slot, so batch sub-requests run under their parent's slot and deadline
+_holding_slot: ContextVar[bool] = ContextVar("holding_slot", default=False)
+
+def route_limits(deadline_ms: Optional[int] = None, limited: bool = True):
+    """Decorator for handlers that need a longer deadline than REQUEST_DEADLINE_MS, or no limiting at all"""
+    def decorator(func):
+        func.route_limits = {"deadline_ms": deadline_ms or REQUEST_DEADLINE_MS, "limited": limited}
+        return func
+    return decorator
+
+def overloaded_response(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=503, detail=detail, headers={"Retry-After": str(CONCURRENCY_RETRY_AFTER_SECONDS)}
+    )
+
+@functools.lru_cache(maxsize=None)
+def limited(route_class: Type[APIRoute]) -> Type[APIRoute]:
+    """Route class that admits handlers through the concurrency limiter and runs them under a deadline"""
+
+    class LimitedRoute(route_class):
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+            limits = getattr(self.endpoint, "route_limits", {"deadline_ms": REQUEST_DEADLINE_MS, "limited": True})
+            if not CONCURRENCY_LIMIT_ENABLED or not limits["limited"]:
+                return handler
+            deadline = limits["deadline_ms"] / 1000
+            # Unprefixed default-station routes carry their callsign on the endpoint (stations.py)
+            bound_callsign = getattr(self.endpoint, "bound_callsign", None)
+
+            async def limited_handler(request):
+                if _holding_slot.get():
+                    return await handler(request)
+                callsign = request.path_params.get("callsign")
+                callsign = callsign.strip().upper() if callsign is not None else bound_callsign
+                try:
+                    await concurrency_limiter.acquire(callsign)
+                except Overloaded:
+                    raise overloaded_response("Server is overloaded, retry later")
+
+                token = _holding_slot.set(True)
+                started = time.monotonic()
+                timed_out = False
+                try:
+                    # pymongo derives maxTimeMS (and server selection/socket timeouts) from the remaining time
+                    with pymongo.timeout(deadline):
+                        return await handler(request)
+                except PyMongoError as e:
+                    if not e.timeout:
+                        raise
+                    timed_out = True
+                    raise overloaded_response("Request deadline exceeded")
+                finally:
+                    _holding_slot.reset(token)
+                    slow = time.monotonic() - started > deadline / 2
+                    concurrency_limiter.release(callsign, overloaded=timed_out or slow)
+
+            return limited_handler
+
+    LimitedRoute.__name__ = f"Limited{route_class.__name__}"
+    return LimitedRoute
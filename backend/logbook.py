@@ -0,0 +1,105 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from datetime import datetime
+import os
+
+from bands import BAND_PLAN
+
+# QSOs encoded per chunk written to the response, and per cursor batch
+LOGBOOK_BATCH_SIZE = int(os.environ.get('LOGBOOK_BATCH_SIZE', 1000))
+
+# ADIF MODE/SUBMODE for modes as logged; unknown modes are sent as MODE unchanged
+ADIF_MODES = {
+    "USB": ("SSB", "USB"), "LSB": ("SSB", "LSB"), "PH": ("SSB", None),
+    "RY": ("RTTY", None), "DG": ("DATA", None), "DIGI": ("DATA", None),
+    "FT4": ("MFSK", "FT4"), "PSK31": ("PSK", "PSK31"),
+}
+# Cabrillo uses band designators instead of kHz from 50 MHz up
+CABRILLO_VHF_BANDS = {"6m": "50", "2m": "144", "70cm": "432"}
+_BAND_EDGES_KHZ = {band: int(low * 1000) for band, low, high in BAND_PLAN}
+
+def adif_field(name: str, value: Any) -> str:
+    if value is None or value == "":
+        return ""
+    value = str(value)
+    return f"<{name}:{len(value.encode())}>{value} "
+
+def adif_header(station: str, created: datetime) -> str:
+    # The header must not start with "<"
+    return (
+        f"ADIF export of {station}\n"
+        + adif_field("ADIF_VER", "3.1.4")
+        + adif_field("PROGRAMID", "4K6AG")
+        + adif_field("CREATED_TIMESTAMP", created.strftime("%Y%m%d %H%M%S"))
+        + "<EOH>\n"
+    )
+
+def adif_record(qso: Dict[str, Any], contest_name: Optional[str] = None) -> str:
+    logged_mode = qso.get("logged_mode") or qso["mode"]
+    mode, submode = ADIF_MODES.get(logged_mode, (logged_mode, None))
+    frequency = qso.get("frequency")
+    return (
+        adif_field("CALL", qso["call"])
+        + adif_field("QSO_DATE", qso["timestamp"].strftime("%Y%m%d"))
+        + adif_field("TIME_ON", qso["timestamp"].strftime("%H%M%S"))
+        + adif_field("BAND", qso["band"])
+        + adif_field("FREQ", f"{frequency / 1000:.6f}".rstrip("0").rstrip(".") if frequency else None)
+        + adif_field("MODE", mode)
+        + adif_field("SUBMODE", submode)
+        + adif_field("RST_SENT", qso.get("rst_sent"))
+        + adif_field("RST_RCVD", qso.get("rst_rcvd"))
+        + adif_field("STX_STRING", qso.get("exchange_sent"))
+        + adif_field("SRX_STRING", qso.get("exchange"))
+        + adif_field("STATION_CALLSIGN", qso["station"])
+        + adif_field("OPERATOR", qso.get("operator"))
+        + adif_field("CONTEST_ID", contest_name)
+        + "<EOR>\n"
+    )
+
+def cabrillo_header(contest: Dict[str, Any], created: datetime) -> str:
+    return (
+        "START-OF-LOG: 3.0\n"
+        f"CREATED-BY: 4K6AG API {created.strftime('%Y-%m-%d %H:%M')}Z\n"
+        f"CALLSIGN: {contest['station']}\n"
+        f"CONTEST: {contest['name']}\n"
+    )
+
+def cabrillo_line(qso: Dict[str, Any]) -> str:
+    band = qso["band"]
+    if band in CABRILLO_VHF_BANDS:
+        frequency = CABRILLO_VHF_BANDS[band]
+    else:
+        frequency = str(int(qso.get("frequency") or _BAND_EDGES_KHZ.get(band, 0)))
+    sent = " ".join(filter(None, [qso.get("rst_sent"), qso.get("exchange_sent")]))
+    received = " ".join(filter(None, [qso.get("rst_rcvd"), qso.get("exchange")]))
+    return (
+        f"QSO: {frequency:>5} {qso['mode']:2} {qso['timestamp'].strftime('%Y-%m-%d %H%M')} "
+        f"{qso['station']:13} {sent:10} {qso['call']:13} {received}\n"
+    )
+
+CABRILLO_FOOTER = "END-OF-LOG:\n"
+
+async def encode(cursor, header: str, record, footer: str = "") -> AsyncIterator[str]:
+    """Yield the header at once, then QSOs from the cursor in chunks of LOGBOOK_BATCH_SIZE records"""
+    yield header
+    chunk = []
+    async for qso in cursor.batch_size(LOGBOOK_BATCH_SIZE):
+        chunk.append(record(qso))
+        if len(chunk) >= LOGBOOK_BATCH_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk) + footer
+
+def qso_query(station: str, contest: Optional[str] = None, band: Optional[str] = None,
+              start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"station": station}
+    if contest:
+        query["contest"] = contest
+    if band:
+        query["band"] = band
+    if start or end:
+        query["timestamp"] = {}
+        if start:
+            query["timestamp"]["$gte"] = start
+        if end:
+            query["timestamp"]["$lt"] = end
+    return query
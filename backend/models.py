@@ -4,6 +4,8 @@ from datetime import datetime
 from enum import Enum
 import uuid
 
+from database import DEFAULT_CALLSIGN
+
 # Enums
 class StationStatus(str, Enum):
     online = "online"
@@ -15,6 +17,42 @@ class EquipmentType(str, Enum):
     amplifier = "amplifier"
     other = "other"
 
+class HistoryGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
+class HeatmapAxis(str, Enum):
+    band = "band"
+    hour = "hour"
+    region = "region"
+
+class ExportDataset(str, Enum):
+    guestbook = "guestbook"
+    contact_requests = "contact_requests"
+    qso_log = "qso_log"
+
+class ExportFormat(str, Enum):
+    parquet = "parquet"
+    arrow = "arrow"
+
+class ExportPartition(str, Enum):
+    year = "year"
+    month = "month"
+    day = "day"
+
+class ContestMultiplier(str, Enum):
+    exchange = "exchange"  # received exchange, e.g. CQ zone
+    prefix = "prefix"  # WPX prefix
+    country = "country"  # DXCC entity
+
+class ChangeOp(str, Enum):
+    upsert = "upsert"
+    delete = "delete"
+
+class BulkOperationType(str, Enum):
+    update = "update"
+    delete = "delete"
+
 class NewsCategory(str, Enum):
     equipment = "equipment"
     contests = "contests"
@@ -29,9 +67,13 @@ class BaseDocument(BaseModel):
     class Config:
         populate_by_name = True
 
+class StationDocument(BaseDocument):
+    # Callsign of the station that owns the document
+    station: str = DEFAULT_CALLSIGN
+
 # Station Information
 class StationInfo(BaseDocument):
-    callsign: str = "4K6AG"
+    callsign: str = DEFAULT_CALLSIGN
     operator: str
     location: str
     grid: str
@@ -45,6 +87,9 @@ class StationInfoCreate(BaseModel):
     license: str
     status: StationStatus = StationStatus.online
 
+class StationCreate(StationInfoCreate):
+    callsign: str
+
 class StationInfoUpdate(BaseModel):
     operator: Optional[str] = None
     location: Optional[str] = None
@@ -53,7 +98,7 @@ class StationInfoUpdate(BaseModel):
     status: Optional[StationStatus] = None
 
 # Equipment
-class Equipment(BaseDocument):
+class Equipment(StationDocument):
     type: EquipmentType
     name: str
     specs: str
@@ -77,8 +122,24 @@ class EquipmentUpdate(BaseModel):
     gain: Optional[str] = None
     bands: Optional[str] = None
 
+class EquipmentBulkOperation(BaseModel):
+    op: BulkOperationType
+    id: str
+    data: Optional[EquipmentUpdate] = None
+
+class EquipmentBulkFilter(BaseModel):
+    type: Optional[EquipmentType] = None
+    ids: Optional[List[str]] = None
+
+class EquipmentBulkRequest(BaseModel):
+    operations: List[EquipmentBulkOperation] = Field(default_factory=list)
+    # Filter-based operation: apply `update` (or delete when `delete` is set) to every match
+    filter: Optional[EquipmentBulkFilter] = None
+    update: Optional[EquipmentUpdate] = None
+    delete: bool = False
+
 # QSL Cards
-class QSLCard(BaseDocument):
+class QSLCard(StationDocument):
     image: str
     year: str
     design: str
@@ -89,7 +150,7 @@ class QSLCardCreate(BaseModel):
     design: str
 
 # Achievements
-class Achievement(BaseDocument):
+class Achievement(StationDocument):
     title: str
     description: str
     year: str
@@ -102,7 +163,7 @@ class AchievementCreate(BaseModel):
     category: Optional[str] = None
 
 # News
-class News(BaseDocument):
+class News(StationDocument):
     title: str
     content: str
     date: datetime = Field(default_factory=datetime.utcnow)
@@ -119,7 +180,7 @@ class NewsResponse(BaseModel):
     total: int
 
 # Gallery
-class Gallery(BaseDocument):
+class Gallery(StationDocument):
     image: str
     title: str
     description: str
@@ -132,13 +193,15 @@ class GalleryCreate(BaseModel):
     category: Optional[str] = None
 
 # Guestbook
-class Guestbook(BaseDocument):
+class Guestbook(StationDocument):
     name: str
     callsign: Optional[str] = None
     message: str
-    country: Optional[str] = None
+    country: Optional[str] = None  # filled from the callsign's DXCC entity when left empty
+    dxcc: Optional[str] = None  # DXCC entity prefix of the callsign
     date: datetime = Field(default_factory=datetime.utcnow)
     approved: bool = True
+    moderated_at: Optional[datetime] = None
 
 class GuestbookCreate(BaseModel):
     name: str
@@ -150,11 +213,21 @@ class GuestbookResponse(BaseModel):
     entries: List[Guestbook]
     total: int
 
+class GuestbookModerationRequest(BaseModel):
+    approve: List[str] = Field(default_factory=list)
+    reject: List[str] = Field(default_factory=list)
+
+class GuestbookModerationResponse(BaseModel):
+    approved: int
+    rejected: int
+
 # Contact/QSL Requests
-class ContactRequest(BaseDocument):
+class ContactRequest(StationDocument):
     name: str
     email: str
     callsign: Optional[str] = None
+    country: Optional[str] = None  # DXCC entity of the callsign
+    dxcc: Optional[str] = None
     message: str
     qsl_request: bool = False
     date: Optional[datetime] = None
@@ -162,6 +235,8 @@ class ContactRequest(BaseDocument):
     mode: Optional[str] = None
     rst_sent: Optional[str] = None
     rst_received: Optional[str] = None
+    handled: bool = False
+    handled_at: Optional[datetime] = None
 
 class ContactRequestCreate(BaseModel):
     name: str
@@ -192,6 +267,213 @@ class StationStatusUpdate(BaseModel):
     frequency: Optional[str] = None
     mode: Optional[str] = None
 
+# Station Status History
+class StatusHistoryBucket(BaseModel):
+    bucket: datetime
+    on_air_seconds: float = 0
+    changes: int = 0
+    bands: Dict[str, float] = Field(default_factory=dict)
+    modes: Dict[str, float] = Field(default_factory=dict)
+
+class StatusHistoryResponse(BaseModel):
+    callsign: str
+    granularity: HistoryGranularity
+    start: datetime
+    end: datetime
+    on_air_hours: float
+    buckets: List[StatusHistoryBucket]
+
+# DX Cluster Spots
+class DXSpot(BaseModel):
+    id: str = Field(alias="_id")
+    spotter: str
+    dx_call: str
+    frequency: float  # kHz
+    band: Optional[str] = None
+    mode: Optional[str] = None
+    comment: str = ""
+    spotted_at: datetime
+    received_at: datetime
+
+    class Config:
+        populate_by_name = True
+
+# Reception Reports / Propagation
+class ReceptionReport(BaseModel):
+    timestamp: datetime
+    locator: str  # Maidenhead locator of the receiver
+    frequency: float  # Hz, kHz or MHz
+    mode: Optional[str] = None
+    snr: Optional[int] = None
+
+class ReceptionImportResponse(BaseModel):
+    imported: int
+    skipped: int
+
+class PropagationHeatmap(BaseModel):
+    station: str
+    rows: HeatmapAxis
+    cols: HeatmapAxis
+    start: datetime
+    end: datetime
+    row_labels: List[str]
+    col_labels: List[str]
+    counts: List[List[int]]
+    mean_snr: List[List[Optional[float]]]
+    total: int
+
+# Columnar Exports
+class ExportRequest(BaseModel):
+    dataset: ExportDataset
+    format: ExportFormat = ExportFormat.parquet
+    columns: Optional[List[str]] = None  # all columns when omitted
+    partition: Optional[ExportPartition] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    class Config:
+        # Stored and used in file paths as plain strings
+        use_enum_values = True
+
+class ExportFile(BaseModel):
+    path: str
+    rows: int
+    row_groups: int
+    size: int
+
+class ExportInfo(ExportRequest):
+    id: str = Field(alias="_id")
+    station: str
+    status: str  # pending, running, done, failed
+    files: List[ExportFile] = []
+    rows: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        populate_by_name = True
+        use_enum_values = True
+
+# Contest Logging
+class Contest(StationDocument):
+    name: str
+    start: datetime
+    end: datetime
+    multipliers: List[ContestMultiplier] = []
+    multipliers_per_band: bool = True
+
+    class Config:
+        populate_by_name = True
+        use_enum_values = True
+
+class ContestCreate(BaseModel):
+    name: str
+    start: datetime
+    end: datetime
+    multipliers: List[ContestMultiplier] = []
+    multipliers_per_band: bool = True
+
+class ContestStats(Contest):
+    qsos: int = 0
+    dupes: int = 0
+    multiplier_count: int = 0
+
+class QSOCreate(BaseModel):
+    call: str
+    frequency: Optional[float] = None  # kHz
+    band: Optional[str] = None  # derived from the frequency when omitted
+    mode: str
+    rst_sent: str = "599"
+    rst_rcvd: str = "599"
+    exchange_sent: Optional[str] = None
+    exchange: Optional[str] = None  # received exchange
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    operator: Optional[str] = None
+
+class QSOResult(BaseModel):
+    id: str = Field(alias="_id")
+    call: str
+    band: str
+    mode: str
+    dupe: bool
+    multipliers: List[str]  # multipliers this QSO adds
+    error: Optional[str] = None  # set when the QSO could not be stored
+
+    class Config:
+        populate_by_name = True
+
+class QSOLogResponse(BaseModel):
+    results: List[QSOResult]
+    qsos: int
+    dupes: int
+    multiplier_count: int
+
+class DupeCheckResponse(BaseModel):
+    call: str
+    band: str
+    mode: str
+    dupe: bool
+    new_multipliers: List[str]
+
+# DXCC Resolution
+class DXCCResolveRequest(BaseModel):
+    calls: List[str]
+
+class DXCCResolution(BaseModel):
+    call: str
+    country: Optional[str] = None
+    prefix: Optional[str] = None  # DXCC entity prefix
+    continent: Optional[str] = None
+    cq_zone: Optional[int] = None
+    itu_zone: Optional[int] = None
+
+# Change Feed
+class ChangeEntry(BaseModel):
+    seq: int
+    collection: str
+    id: str
+    station: str
+    op: ChangeOp
+    document: Optional[Dict[str, Any]] = None  # current document for upserts
+
+class ChangeFeed(BaseModel):
+    token: str  # pass as `since` on the next request
+    reset: bool  # the token was unknown or expired: refetch the collections, then continue from `token`
+    more: bool
+    changes: List[ChangeEntry]
+
+# Batch Requests
+class BatchSubRequest(BaseModel):
+    method: str = "GET"
+    path: str
+    query: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+class BatchSubResponse(BaseModel):
+    path: str
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
+
+# Bulk Operations
+class BulkOperationResult(BaseModel):
+    index: int
+    op: BulkOperationType
+    id: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkWriteResponse(BaseModel):
+    matched: int
+    modified: int
+    deleted: int
+    results: List[BulkOperationResult]
+
 # Response Models
 class SuccessResponse(BaseModel):
     success: bool = True
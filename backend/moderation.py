@@ -0,0 +1,54 @@
+from typing import Any, Dict, List
+from datetime import datetime
+import os
+
+from database import guestbook_collection, guestbook_archive_collection
+from archival import move_to_archive
+from changes import ChangeLog
+
+# New guestbook entries wait for a moderator unless moderation is turned off
+GUESTBOOK_MODERATION = os.environ.get('GUESTBOOK_MODERATION', 'true').lower() == 'true'
+
+class GuestbookModeration:
+    """Moderation queue for guestbook entries: pending entries have approved=False"""
+
+    @staticmethod
+    async def pending(callsign: str, limit: int, offset: int) -> Dict[str, Any]:
+        # `approved: False` must stay in the query so the partial index on pending entries is used
+        query = {"station": callsign, "approved": False}
+        total = await guestbook_collection.count_documents(query)
+        docs = await guestbook_collection.find(query).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
+        return {"entries": docs, "total": total}
+
+    @staticmethod
+    async def approve(callsign: str, ids: List[str]) -> int:
+        """Publish pending entries; returns how many were approved"""
+        if not ids:
+            return 0
+        # Only entries that are actually pending change, so only those go into the change log
+        pending = await guestbook_collection.distinct("_id", {"_id": {"$in": ids}, "station": callsign, "approved": False})
+        if not pending:
+            return 0
+        now = datetime.utcnow()
+        result = await guestbook_collection.update_many(
+            {"_id": {"$in": pending}, "station": callsign, "approved": False},
+            {"$set": {"approved": True, "moderated_at": now, "updated_at": now}}
+        )
+        if result.modified_count:
+            await ChangeLog.record(callsign, "guestbook", pending)
+        return result.modified_count
+
+    @staticmethod
+    async def reject(callsign: str, ids: List[str]) -> int:
+        """Move entries (pending or already published) to the guestbook archive"""
+        if not ids:
+            return 0
+        now = datetime.utcnow()
+        docs = await guestbook_collection.find({"_id": {"$in": ids}, "station": callsign}).to_list(len(ids))
+        moved = await move_to_archive(
+            guestbook_collection, guestbook_archive_collection, docs, now,
+            approved=False, moderated_at=now, rejected=True
+        )
+        # Only published entries were visible to clients of the change feed
+        await ChangeLog.record(callsign, "guestbook", [doc["_id"] for doc in docs if doc.get("approved")])
+        return moved
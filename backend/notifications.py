@@ -0,0 +1,113 @@
+from email.message import EmailMessage
+from typing import Any, Awaitable, Callable, Dict
+from datetime import datetime
+import asyncio
+import json
+import logging
+import os
+import smtplib
+import urllib.request
+
+from database import DEFAULT_CALLSIGN, contact_requests_collection
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# SMTP delivery; for local testing run `python -m aiosmtpd -n -l localhost:1025` and set SMTP_HOST/SMTP_PORT
+SMTP_HOST = os.environ.get('SMTP_HOST')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 25))
+SMTP_USER = os.environ.get('SMTP_USER')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'false').lower() == 'true'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 10))
+NOTIFY_EMAIL_FROM = os.environ.get('NOTIFY_EMAIL_FROM', 'noreply@4k6ag.local')
+NOTIFY_EMAIL_TO = os.environ.get('NOTIFY_EMAIL_TO')
+NOTIFY_WEBHOOK_URL = os.environ.get('NOTIFY_WEBHOOK_URL')
+
+CONTACT_NOTIFICATION = "contact_notification"
+QSL_NOTIFICATION = "qsl_notification"
+
+def contact_notification_job(contact: Dict[str, Any]) -> tuple:
+    """Job type and payload for a new contact or QSL request"""
+    job_type = QSL_NOTIFICATION if contact.get("qsl_request") else CONTACT_NOTIFICATION
+    fields = ("_id", "station", "name", "email", "callsign", "message", "qsl_request",
+              "date", "frequency", "mode", "rst_sent", "rst_received")
+    payload = {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in contact.items() if key in fields
+    }
+    return job_type, payload
+
+# New contact documents stage their notification job, which the queue relays from here
+job_queue.outbox(contact_requests_collection)
+
+def _send_email(subject: str, body: str, reply_to: str = None, message_id: str = None):
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = NOTIFY_EMAIL_FROM
+    message["To"] = NOTIFY_EMAIL_TO
+    if message_id:
+        message["Message-ID"] = message_id
+    if reply_to:
+        message["Reply-To"] = reply_to
+    message.set_content(body)
+
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD)
+        smtp.send_message(message)
+
+def _post_webhook(payload: Dict[str, Any], idempotency_key: str = None):
+    headers = {"Content-Type": "application/json"}
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+    request = urllib.request.Request(
+        NOTIFY_WEBHOOK_URL,
+        data=json.dumps(payload).encode("utf-8"),
+        headers=headers,
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=SMTP_TIMEOUT) as response:
+        response.read()
+
+async def _once(request_id: str, channel: str, send: Callable[[], Awaitable[None]]):
+    """Deliver on `channel` unless an earlier attempt already did, so a retry after a webhook failure sends no second email"""
+    marker = f"notified.{channel}"
+    if request_id and await contact_requests_collection.find_one({"_id": request_id, marker: {"$exists": True}}, {"_id": 1}):
+        return
+    await send()
+    if request_id:
+        await contact_requests_collection.update_one({"_id": request_id}, {"$set": {marker: datetime.utcnow()}})
+
+async def deliver(job_type: str, payload: Dict[str, Any]):
+    """Send a notification by email and/or webhook; raising makes the job retry"""
+    kind = "QSL request" if job_type == QSL_NOTIFICATION else "Contact request"
+    subject = f"[{payload.get('station', DEFAULT_CALLSIGN)}] {kind} from {payload.get('callsign') or payload.get('name')}"
+    lines = [f"{key}: {value}" for key, value in payload.items() if value not in (None, "") and key != "message"]
+    body = "\n".join(lines + ["", payload.get("message", "")])
+
+    if not SMTP_HOST and not NOTIFY_WEBHOOK_URL:
+        logger.info("No notification channel configured, dropping %s for %s", job_type, payload.get("_id"))
+        return
+    request_id = payload.get("_id")
+    # Stable per request, so a duplicate that slips through (crash right after sending) can be dropped downstream
+    key = f"{job_type}-{request_id}"
+    if SMTP_HOST and NOTIFY_EMAIL_TO:
+        message_id = f"<{key}@{NOTIFY_EMAIL_FROM.rpartition('@')[2]}>"
+        await _once(request_id, "email", lambda: asyncio.to_thread(
+            _send_email, subject, body, payload.get("email"), message_id
+        ))
+    if NOTIFY_WEBHOOK_URL:
+        await _once(request_id, "webhook", lambda: asyncio.to_thread(
+            _post_webhook, {"type": job_type, "subject": subject, "request": payload}, key
+        ))
+
+@job_queue.handler(CONTACT_NOTIFICATION)
+async def deliver_contact_notification(payload: Dict[str, Any]):
+    await deliver(CONTACT_NOTIFICATION, payload)
+
+@job_queue.handler(QSL_NOTIFICATION)
+async def deliver_qsl_notification(payload: Dict[str, Any]):
+    await deliver(QSL_NOTIFICATION, payload)
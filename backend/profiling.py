@@ -0,0 +1,215 @@
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import heapq
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+PROFILE_HEADER = os.environ.get('PROFILE_HEADER', 'X-Profile')
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 1))
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_KEEP_SLOWEST = int(os.environ.get('PROFILE_KEEP_SLOWEST', 20))
+PROFILE_KEEP_ON_DEMAND = int(os.environ.get('PROFILE_KEEP_ON_DEMAND', 50))
+
+PROFILING_ENABLED = bool(PROFILING_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class TaskSampler:
+    """Samples the coroutine stack of one asyncio task; captures are taken by the shared SamplerThread.
+
+    While the task runs, the event loop thread's frames are used; while it is suspended,
+    its await chain is walked, ending in the awaited object (e.g. a Motor future).
+    """
+
+    def __init__(self, task: asyncio.Task, root_code):
+        self.task = task
+        self.root_code = root_code
+        self.loop_thread_id = threading.get_ident()
+        self.samples: Counter = Counter()
+
+    def sample(self):
+        try:
+            stack = self._capture()
+        except Exception:
+            return
+        if stack:
+            self.samples[stack] += 1
+
+    def _capture(self) -> Optional[str]:
+        frames = []
+        awaited = self.task.get_coro()
+        while awaited is not None:
+            frame = getattr(awaited, "cr_frame", None) or getattr(awaited, "gi_frame", None)
+            if frame is None:
+                break
+            frames.append(frame)
+            awaited = getattr(awaited, "cr_await", None) or getattr(awaited, "gi_yieldfrom", None)
+        if not frames:
+            return None
+
+        labels = [_frame_label(frame) for frame in frames]
+
+        # If the innermost coroutine is executing, add the synchronous frames above it
+        running = []
+        frame = sys._current_frames().get(self.loop_thread_id)
+        while frame is not None and frame is not frames[-1]:
+            running.append(frame)
+            frame = frame.f_back
+        if frame is not None:
+            labels.extend(_frame_label(f) for f in reversed(running))
+        elif awaited is not None:
+            leaf = frames[-1]
+            labels.append(f"[await {type(awaited).__name__} @ {os.path.basename(leaf.f_code.co_filename)}:{leaf.f_lineno}]")
+
+        for index, frame in enumerate(frames):
+            if frame.f_code is self.root_code:
+                labels = labels[index:]
+                break
+        return ";".join(label.replace(";", ",") for label in labels)
+
+class SamplerThread(threading.Thread):
+    """One background thread sampling every profiled request, so requests neither start nor join threads"""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True, name="profiler")
+        self.interval = interval
+        self._samplers: List[TaskSampler] = []
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+
+    def watch(self, sampler: TaskSampler):
+        with self._lock:
+            self._samplers.append(sampler)
+            self._active.set()
+            if not self.is_alive():
+                self.start()
+
+    def unwatch(self, sampler: TaskSampler):
+        """After this returns the sampler's counts no longer change"""
+        with self._lock:
+            self._samplers.remove(sampler)
+            if not self._samplers:
+                self._active.clear()
+
+    def run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                for sampler in self._samplers:
+                    sampler.sample()
+
+class ProfileStore:
+    """Keeps on-demand profiles by id and the N slowest sampled profiles"""
+
+    def __init__(self):
+        self.on_demand: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.slowest: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]):
+        with self._lock:
+            if profile["mode"] == "on_demand":
+                self.on_demand[profile["id"]] = profile
+                while len(self.on_demand) > PROFILE_KEEP_ON_DEMAND:
+                    self.on_demand.popitem(last=False)
+            else:
+                entry = (profile["duration_ms"], profile["id"], profile)
+                if len(self.slowest) < PROFILE_KEEP_SLOWEST:
+                    heapq.heappush(self.slowest, entry)
+                else:
+                    heapq.heappushpop(self.slowest, entry)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if profile_id in self.on_demand:
+                return self.on_demand[profile_id]
+            for _, entry_id, profile in self.slowest:
+                if entry_id == profile_id:
+                    return profile
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self.on_demand.values()) + [entry[2] for entry in self.slowest]
+        return sorted(
+            ({k: v for k, v in p.items() if k != "samples"} for p in profiles),
+            key=lambda p: p["duration_ms"], reverse=True
+        )
+
+def folded(profile: Dict[str, Any]) -> str:
+    """Collapsed stack format, as read by flamegraph.pl and speedscope"""
+    return "\n".join(f"{stack} {count}" for stack, count in profile["samples"].most_common()) + "\n"
+
+profile_store = ProfileStore()
+sampler_thread = SamplerThread(PROFILE_INTERVAL_MS / 1000)
+
+def is_profiling_admin(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN and token and hmac.compare_digest(token, PROFILING_TOKEN))
+
+class ProfilingMiddleware:
+    """ASGI middleware sampling requests that carry the profiling token, or a random fraction of all requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.header = PROFILE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for key, value in scope.get("headers", []):
+            if key == self.header:
+                token = value.decode("latin-1")
+                break
+
+        if is_profiling_admin(token):
+            mode = "on_demand"
+        elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            mode = "sampled"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status = {"code": None}
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if mode == "on_demand":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        sampler = TaskSampler(asyncio.current_task(), ProfilingMiddleware.__call__.__code__)
+        started = time.perf_counter()
+        sampler_thread.watch(sampler)
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            sampler_thread.unwatch(sampler)
+            profile_store.add({
+                "id": profile_id,
+                "mode": mode,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "sample_count": sum(sampler.samples.values()),
+                "created_at": datetime.utcnow().isoformat(),
+                "samples": sampler.samples,
+            })
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Reception-report propagation analytics.
+
+Reception reports (PSK Reporter, WSPRnet, RBN or skimmer exports: who heard the
+station, where, on which frequency and with what SNR) are stored column-wise:
+each chunk document holds the encoded hour/band/region/mode/SNR columns of up
+to RECEPTION_CHUNK_ROWS reports as packed NumPy arrays. Every ingest also merges
+its counts into a sparse per-day rollup, so heatmaps only sum the rollups of the
+requested days and never rescan raw reports.
+
+    python propagation.py reports.csv --station 4K6AG
+"""
+
+from pathlib import Path
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, IO, Optional, Union
+from datetime import datetime
+import asyncio
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+import typer
+
+from database import reception_chunks_collection, reception_rollups_collection, DEFAULT_CALLSIGN
+from bands import BAND_PLAN
+
+RECEPTION_CHUNK_ROWS = int(os.environ.get('RECEPTION_CHUNK_ROWS', 100_000))
+RECEPTION_MAX_DAYS = int(os.environ.get('RECEPTION_MAX_DAYS', 366))
+# Reports per request on the JSON feed endpoint; bulk history goes through the CSV import
+RECEPTION_MAX_REPORTS = int(os.environ.get('RECEPTION_MAX_REPORTS', 10_000))
+
+BANDS = [band for band, _, _ in BAND_PLAN]
+_BAND_LOW = np.array([low for _, low, _ in BAND_PLAN])
+_BAND_HIGH = np.array([high for _, _, high in BAND_PLAN])
+MODES = ["CW", "SSB", "FT8", "FT4", "WSPR", "RTTY", "PSK", "JT65", "OTHER"]
+_MODE_ALIASES = {"USB": "SSB", "LSB": "SSB", "PSK31": "PSK", "PSK63": "PSK"}
+HOURS = list(range(24))
+# Regions are Maidenhead fields ("KN", "JO", ...): 18 x 18 areas of 20 x 10 degrees
+REGIONS = [chr(65 + lon) + chr(65 + lat) for lon in range(18) for lat in range(18)]
+
+DIMENSIONS = {"band": BANDS, "hour": HOURS, "region": REGIONS}
+_SIZES = {"mode": len(MODES), "band": len(BANDS), "hour": 24, "region": len(REGIONS)}
+
+COLUMNS = {"hour": np.uint8, "band": np.uint8, "region": np.uint16, "mode": np.uint8, "snr": np.int8}
+CSV_COLUMNS = {"timestamp", "locator", "frequency"}
+# Stored in the int8 SNR column for reports that came without an SNR
+SNR_MISSING = -128
+
+def encode_reports(frame: pd.DataFrame) -> pd.DataFrame:
+    """Turn raw reports (timestamp, locator, frequency, mode, snr) into compact column codes.
+
+    Rows without a parseable time, a known band or a valid locator are dropped.
+    """
+    timestamps = pd.to_datetime(frame["timestamp"], utc=True, errors="coerce").dt.tz_localize(None)
+
+    # Frequencies arrive in Hz, kHz or MHz depending on the source; normalize to MHz by magnitude
+    frequency = pd.to_numeric(frame["frequency"], errors="coerce").to_numpy(dtype=float)
+    mhz = np.where(frequency >= 1e6, frequency / 1e6, np.where(frequency >= 1000, frequency / 1000, frequency))
+    band = np.searchsorted(_BAND_LOW, mhz, side="right") - 1
+    in_band = (band >= 0) & (mhz <= _BAND_HIGH[np.clip(band, 0, len(BANDS) - 1)])
+
+    # The first two locator letters as code points, read straight off a fixed-width unicode array
+    locator = frame["locator"].astype("string").str.upper().str.slice(0, 2).str.pad(2, side="right", fillchar="?")
+    fields = locator.fillna("??").to_numpy(dtype="U2").view(np.uint32).reshape(-1, 2).astype(int) - 65
+    lon_field, lat_field = fields[:, 0], fields[:, 1]
+    valid_region = (lon_field >= 0) & (lon_field < 18) & (lat_field >= 0) & (lat_field < 18)
+
+    modes = frame["mode"] if "mode" in frame else pd.Series("OTHER", index=frame.index)
+    modes = modes.astype("string").str.upper().replace(_MODE_ALIASES)
+    mode = pd.Categorical(modes, categories=MODES).codes
+    mode = np.where(mode < 0, MODES.index("OTHER"), mode)
+
+    snr = pd.to_numeric(frame["snr"], errors="coerce") if "snr" in frame else pd.Series(np.nan, index=frame.index)
+    snr = snr.clip(SNR_MISSING + 1, 127).fillna(SNR_MISSING).to_numpy()
+
+    keep = timestamps.notna().to_numpy() & in_band & valid_region
+    encoded = pd.DataFrame({
+        "day": timestamps[keep].dt.floor("D").to_numpy(),
+        "hour": timestamps[keep].dt.hour.to_numpy(dtype=np.uint8),
+        "band": band[keep].astype(np.uint8),
+        "region": (lon_field * 18 + lat_field)[keep].astype(np.uint16),
+        "mode": mode[keep].astype(np.uint8),
+        "snr": snr[keep].astype(np.int8),
+    })
+    return encoded
+
+def _cells(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """Flat index over (mode, band, hour, region)"""
+    return (
+        ((columns["mode"].astype(np.uint32) * _SIZES["band"] + columns["band"]) * 24 + columns["hour"])
+        * _SIZES["region"] + columns["region"]
+    )
+
+def _decode_cells(cells: np.ndarray) -> Dict[str, np.ndarray]:
+    region = cells % _SIZES["region"]
+    rest = cells // _SIZES["region"]
+    hour = rest % 24
+    rest //= 24
+    return {"region": region, "hour": hour, "band": rest % _SIZES["band"], "mode": rest // _SIZES["band"]}
+
+def _snr_arrays(snr: np.ndarray) -> tuple:
+    """Per-report SNR sum and count; reports without an SNR contribute to neither"""
+    present = snr != SNR_MISSING
+    return np.where(present, snr, 0).astype(np.int64), present.astype(np.uint32)
+
+def _sparse_counts(cells: np.ndarray, counts: np.ndarray, snr_sum: np.ndarray, snr_count: np.ndarray) -> tuple:
+    """Sum counts, SNR and SNR-bearing reports per distinct cell"""
+    unique, inverse = np.unique(cells, return_inverse=True)
+    return (
+        unique.astype(np.uint32),
+        np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.uint32),
+        np.bincount(inverse, weights=snr_sum, minlength=len(unique)).astype(np.int64),
+        np.bincount(inverse, weights=snr_count, minlength=len(unique)).astype(np.uint32),
+    )
+
+def _rollup_arrays(doc: Optional[Dict[str, Any]]) -> tuple:
+    if not doc:
+        return np.empty(0, np.uint32), np.empty(0, np.uint32), np.empty(0, np.int64), np.empty(0, np.uint32)
+    counts = np.frombuffer(doc["counts"], dtype=np.uint32)
+    return (
+        np.frombuffer(doc["cells"], dtype=np.uint32),
+        counts,
+        np.frombuffer(doc["snr_sum"], dtype=np.int64),
+        # Rollups written before snr_count existed averaged over every report
+        np.frombuffer(doc["snr_count"], dtype=np.uint32) if "snr_count" in doc else counts,
+    )
+
+class ReceptionStore:
+    @staticmethod
+    async def ingest(station: str, frame: pd.DataFrame) -> Dict[str, int]:
+        """Store raw reports as column chunks and merge them into the per-day rollups"""
+        missing = CSV_COLUMNS - set(frame.columns)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        encoded = await asyncio.to_thread(encode_reports, frame)
+        now = datetime.utcnow()
+        for day, rows in encoded.groupby("day", sort=True):
+            day = pd.Timestamp(day).to_pydatetime()
+            columns = {name: rows[name].to_numpy(dtype=dtype) for name, dtype in COLUMNS.items()}
+
+            chunks = [
+                {
+                    "_id": str(uuid.uuid4()),
+                    "station": station,
+                    "day": day,
+                    "count": len(rows[start:start + RECEPTION_CHUNK_ROWS]),
+                    "columns": {
+                        name: values[start:start + RECEPTION_CHUNK_ROWS].tobytes() for name, values in columns.items()
+                    },
+                    "created_at": now,
+                }
+                for start in range(0, len(rows), RECEPTION_CHUNK_ROWS)
+            ]
+            await reception_chunks_collection.insert_many(chunks)
+
+            sparse = _sparse_counts(_cells(columns), np.ones(len(rows)), *_snr_arrays(columns["snr"]))
+            await ReceptionStore._merge_rollup(station, day, *sparse, len(chunks))
+
+        return {"imported": len(encoded), "skipped": len(frame) - len(encoded)}
+
+    @staticmethod
+    async def _merge_rollup(station: str, day: datetime, cells, counts, snr_sum, snr_count, chunks: int):
+        # Optimistic concurrency: retry if another ingest updated the same day in between
+        rollup_id = f"{station}:{day:%Y-%m-%d}"
+        while True:
+            doc = await reception_rollups_collection.find_one({"_id": rollup_id})
+            old_cells, old_counts, old_snr, old_snr_count = _rollup_arrays(doc)
+            merged = _sparse_counts(
+                np.concatenate([old_cells, cells]),
+                np.concatenate([old_counts, counts]),
+                np.concatenate([old_snr, snr_sum]),
+                np.concatenate([old_snr_count, snr_count]),
+            )
+            version = doc["version"] if doc else 0
+            update = {
+                "station": station,
+                "day": day,
+                "cells": merged[0].tobytes(),
+                "counts": merged[1].tobytes(),
+                "snr_sum": merged[2].tobytes(),
+                "snr_count": merged[3].tobytes(),
+                "reports": int(merged[1].sum()),
+                "chunks": (doc["chunks"] if doc else 0) + chunks,
+                "version": version + 1,
+                "updated_at": datetime.utcnow(),
+            }
+            if doc is None:
+                try:
+                    await reception_rollups_collection.insert_one(dict(update, _id=rollup_id))
+                    return
+                except DuplicateKeyError:
+                    continue
+            result = await reception_rollups_collection.replace_one({"_id": rollup_id, "version": version}, update)
+            if result.matched_count:
+                return
+
+    @staticmethod
+    async def rebuild(station: str) -> int:
+        """Recompute every rollup of a station from its column chunks"""
+        await reception_rollups_collection.delete_many({"station": station})
+        rebuilt = 0
+        days = await reception_chunks_collection.distinct("day", {"station": station})
+        for day in sorted(days):
+            parts = []
+            chunks = 0
+            async for chunk in reception_chunks_collection.find({"station": station, "day": day}):
+                columns = {name: np.frombuffer(chunk["columns"][name], dtype=dtype) for name, dtype in COLUMNS.items()}
+                parts.append(_sparse_counts(_cells(columns), np.ones(chunk["count"]), *_snr_arrays(columns["snr"])))
+                chunks += 1
+            if parts:
+                arrays = (np.concatenate(arrays) for arrays in zip(*parts))
+                await ReceptionStore._merge_rollup(station, day, *_sparse_counts(*arrays), chunks)
+                rebuilt += 1
+        return rebuilt
+
+    @staticmethod
+    async def heatmap(
+        station: str,
+        rows: str,
+        cols: str,
+        start: datetime,
+        end: datetime,
+        mode: Optional[str] = None,
+        band: Optional[str] = None,
+        region: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Report counts and mean SNR over two of band/hour/region, summed over whole UTC days in [start, end)"""
+        docs = await reception_rollups_collection.find(
+            {"station": station, "day": {"$gte": start, "$lt": end}},
+            {"cells": 1, "counts": 1, "snr_sum": 1, "snr_count": 1}
+        ).to_list(None)
+        parts = [_rollup_arrays(doc) for doc in docs]
+        if parts:
+            cells, counts, snr_sum, snr_count = (np.concatenate(arrays) for arrays in zip(*parts))
+        else:
+            cells, counts, snr_sum, snr_count = _rollup_arrays(None)
+
+        dims = _decode_cells(cells)
+        mask = np.ones(len(cells), dtype=bool)
+        if mode is not None:
+            mask &= dims["mode"] == MODES.index(mode)
+        if band is not None:
+            mask &= dims["band"] == BANDS.index(band)
+        if region is not None:
+            mask &= dims["region"] == REGIONS.index(region)
+
+        n_rows, n_cols = _SIZES[rows], _SIZES[cols]
+        flat = dims[rows][mask].astype(np.int64) * n_cols + dims[cols][mask]
+        grid = np.bincount(flat, weights=counts[mask], minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        snr = np.bincount(flat, weights=snr_sum[mask], minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        heard = np.bincount(flat, weights=snr_count[mask], minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_snr = np.where(heard > 0, np.round(snr / heard, 1), np.nan)
+
+        # Drop all-empty rows/columns for regions, which would otherwise be mostly zeros
+        row_keep = np.ones(n_rows, dtype=bool) if rows != "region" else grid.sum(axis=1) > 0
+        col_keep = np.ones(n_cols, dtype=bool) if cols != "region" else grid.sum(axis=0) > 0
+        grid = grid[row_keep][:, col_keep]
+        mean_snr = mean_snr[row_keep][:, col_keep]
+
+        return {
+            "station": station,
+            "rows": rows,
+            "cols": cols,
+            "start": start,
+            "end": end,
+            "row_labels": [str(label) for label, keep in zip(DIMENSIONS[rows], row_keep) if keep],
+            "col_labels": [str(label) for label, keep in zip(DIMENSIONS[cols], col_keep) if keep],
+            "counts": grid.astype(int).tolist(),
+            "mean_snr": [[None if np.isnan(value) else float(value) for value in row] for row in mean_snr],
+            "total": int(grid.sum()),
+        }
+
+def read_reports(source: Union[str, Path, IO]) -> pd.DataFrame:
+    """Read a CSV export; only the columns used by the analytics are loaded"""
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    usecols = [column for column in header if column in CSV_COLUMNS | {"mode", "snr"}]
+    return pd.read_csv(source, usecols=usecols, dtype={"locator": "string", "mode": "string"})
+
+def main(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV with timestamp,locator,frequency[,mode,snr]"),
+    station: str = typer.Option(DEFAULT_CALLSIGN, help="Station the reports are about"),
+):
+    result = asyncio.run(ReceptionStore.ingest(station.upper(), read_reports(path)))
+    typer.echo(f"Imported {result['imported']} reports, skipped {result['skipped']}")
+
+if __name__ == "__main__":
+    typer.run(main)
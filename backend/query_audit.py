@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Query plan audit for the 4K6AG API.
+
+Seeds a scratch database, runs every query shape used by server.py through
+explain() and fails when a shape needs a collection scan or examines far more
+keys/documents than it returns.
+
+    python query_audit.py --docs 2000 --max-ratio 2.0
+"""
+
+from dotenv import load_dotenv
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import os
+import random
+import sys
+
+import typer
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# Query shapes issued by server.py. "collection" names the `<name>_collection` object in database.py,
+# so the audit explains the collection the code actually uses; "count" shapes are explained as count commands.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"name": "get_station_info", "collection": "station", "filter": {"callsign": "4K6AG"}, "limit": 1},
+    {"name": "get_equipment", "collection": "equipment", "filter": {"station": "4K6AG"}, "limit": 100},
+    {"name": "update_equipment", "collection": "equipment", "filter": {"_id": "$sample_id", "station": "4K6AG"}, "limit": 1},
+    {"name": "get_qsl_cards", "collection": "qsl_cards", "filter": {"station": "4K6AG"}, "sort": {"year": -1}, "limit": 100},
+    {"name": "get_achievements", "collection": "achievements", "filter": {"station": "4K6AG"}, "sort": {"year": -1},
+     "limit": 100},
+    {"name": "get_news.count", "collection": "news", "filter": {"station": "4K6AG"}, "count": True},
+    {"name": "get_news", "collection": "news", "filter": {"station": "4K6AG"}, "sort": {"date": -1}, "limit": 10},
+    {"name": "get_gallery", "collection": "gallery", "filter": {"station": "4K6AG"}, "sort": {"created_at": -1},
+     "limit": 100},
+    {"name": "get_guestbook.count", "collection": "guestbook", "filter": {"station": "4K6AG", "approved": True},
+     "count": True},
+    {"name": "get_guestbook", "collection": "guestbook", "filter": {"station": "4K6AG", "approved": True},
+     "sort": {"date": -1}, "limit": 20},
+    {"name": "get_pending_guestbook.count", "collection": "guestbook", "filter": {"station": "4K6AG", "approved": False},
+     "count": True},
+    {"name": "get_pending_guestbook", "collection": "guestbook", "filter": {"station": "4K6AG", "approved": False},
+     "sort": {"created_at": -1}, "limit": 20},
+    {"name": "get_contact_requests", "collection": "contact_requests", "filter": {"station": "4K6AG"},
+     "sort": {"created_at": -1}, "limit": 50},
+    {"name": "get_contact_requests.archive", "collection": "contact_requests_archive", "filter": {"station": "4K6AG"},
+     "sort": {"created_at": -1}, "limit": 50},
+    {"name": "get_archived_guestbook.count", "collection": "guestbook_archive", "filter": {"station": "4K6AG"},
+     "count": True},
+    {"name": "get_archived_guestbook", "collection": "guestbook_archive", "filter": {"station": "4K6AG"},
+     "sort": {"created_at": -1}, "limit": 20},
+    {"name": "archive.contact_requests.handled", "collection": "contact_requests",
+     "filter": {"handled": True, "created_at": {"$lt": "$month_ago"}}, "limit": 500},
+    {"name": "archive.guestbook.unapproved", "collection": "guestbook",
+     "filter": {"approved": False, "created_at": {"$lt": "$month_ago"}}, "limit": 500},
+    {"name": "jobs.claim", "collection": "jobs", "filter": {"status": "pending", "run_at": {"$lte": "$now"}},
+     "sort": {"run_at": 1}, "limit": 1},
+    {"name": "jobs.claim.expired", "collection": "jobs", "filter": {"status": "running", "locked_until": {"$lt": "$now"}},
+     "limit": 1},
+    {"name": "get_dead_jobs", "collection": "dead_jobs", "filter": {}, "sort": {"failed_at": -1}, "limit": 50},
+    {"name": "status_history.last_event", "collection": "status_history", "filter": {"callsign": "4K6AG"},
+     "sort": {"timestamp": -1}, "limit": 1},
+    {"name": "status_history.rollups", "collection": "status_rollups",
+     "filter": {"callsign": "4K6AG", "granularity": "hour", "bucket": {"$gte": "$month_ago"}}, "sort": {"bucket": 1}},
+    {"name": "spots.recent", "collection": "dx_spots", "filter": {}, "sort": {"received_at": -1}, "limit": 50},
+    {"name": "spots.band", "collection": "dx_spots", "filter": {"band": "20m"}, "sort": {"received_at": -1}, "limit": 50},
+    {"name": "spots.mode", "collection": "dx_spots", "filter": {"mode": "CW"}, "sort": {"received_at": -1}, "limit": 50},
+    {"name": "spots.callsign", "collection": "dx_spots", "filter": {"dx_call": "4K6AG"}, "sort": {"received_at": -1},
+     "limit": 50},
+    {"name": "propagation.rollups", "collection": "reception_rollups",
+     "filter": {"station": "4K6AG", "day": {"$gte": "$month_ago", "$lt": "$now"}}},
+    {"name": "export.guestbook", "collection": "guestbook", "filter": {"station": "4K6AG", "approved": True},
+     "sort": {"date": 1}},
+    {"name": "export.contact_requests", "collection": "contact_requests", "filter": {"station": "4K6AG"},
+     "sort": {"created_at": 1}},
+    {"name": "export.contact_requests_archive", "collection": "contact_requests_archive",
+     "filter": {"station": "4K6AG", "created_at": {"$gte": "$month_ago"}}, "sort": {"created_at": 1}},
+    {"name": "get_exports", "collection": "exports", "filter": {"station": "4K6AG"}, "sort": {"created_at": -1},
+     "limit": 20},
+    {"name": "propagation.chunks", "collection": "reception_chunks", "filter": {"station": "4K6AG", "day": "$today"}},
+    {"name": "get_contests", "collection": "contests", "filter": {"station": "4K6AG"}, "sort": {"start": -1}, "limit": 20},
+    {"name": "get_contest", "collection": "contests", "filter": {"_id": "contest-0", "station": "$contest_station"},
+     "limit": 1},
+    {"name": "contest.preload", "collection": "contests", "filter": {"end": {"$gte": "$month_ago"}}},
+    {"name": "contest.load_index", "collection": "qsos", "filter": {"station": "4K6AG", "contest": "contest-0"},
+     "sort": {"timestamp": 1}},
+    {"name": "logbook.adif", "collection": "qsos", "filter": {"station": "4K6AG", "timestamp": {"$gte": "$month_ago"}},
+     "sort": {"timestamp": 1}},
+    {"name": "logbook.adif.contest_names", "collection": "contests", "filter": {"station": "4K6AG"}},
+    {"name": "logbook.adif.contest", "collection": "qsos",
+     "filter": {"station": "4K6AG", "contest": "contest-1", "timestamp": {"$gte": "$month_ago"}}, "sort": {"timestamp": 1}},
+    {"name": "logbook.adif.band", "collection": "qsos", "filter": {"station": "4K6AG", "band": "20m"},
+     "sort": {"timestamp": 1}},
+    {"name": "get_changes", "collection": "changes", "filter": {"_id": {"$gt": "$changes_since"}}, "sort": {"_id": 1},
+     "limit": 500},
+    {"name": "changes.prune", "collection": "changes", "filter": {"at": {"$lt": "$month_ago"}}, "sort": {"at": -1, "_id": -1},
+     "limit": 1},
+]
+
+def plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a winning plan tree into a list of stages, outermost first"""
+    plan = plan.get("queryPlan", plan)
+    stages = [plan]
+    children = []
+    if "inputStage" in plan:
+        children.append(plan["inputStage"])
+    children.extend(plan.get("inputStages", []))
+    for child in children:
+        stages.extend(plan_stages(child))
+    return stages
+
+def describe_plan(stages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for stage in stages:
+        name = stage.get("stage", "?")
+        if stage.get("indexName"):
+            name += f"({stage['indexName']})"
+        parts.append(name)
+    return " > ".join(parts)
+
+def _resolve(value, params):
+    if isinstance(value, str) and value.startswith("$") and value[1:] in params:
+        return params[value[1:]]
+    if isinstance(value, dict):
+        return {k: _resolve(v, params) for k, v in value.items()}
+    return value
+
+def collection_name(name: str) -> str:
+    """Database collection behind database.<name>_collection"""
+    import database
+    return getattr(database, f"{name}_collection").name
+
+async def seed(db, docs: int):
+    """Fill the scratch database with synthetic documents shaped like production data"""
+    from models import (
+        StationInfo, Equipment, QSLCard, Achievement, News, Gallery, Guestbook, ContactRequest
+    )
+    now = datetime.utcnow()
+    rnd = random.Random(42)
+
+    def when(i):
+        return now - timedelta(minutes=i * 37)
+
+    # Documents are spread over several stations so per-station reads must use the station prefix
+    def station():
+        return rnd.choice(["4K6AG", "4K0XX", "4K1XX", "4K2XX"])
+
+    stations = [StationInfo(callsign="4K6AG", operator="Op", location="Baku", grid="LN40AA", license="Extra")]
+    stations += [
+        StationInfo(callsign=f"4K{i}XX", operator="Op", location="Baku", grid="LN40AA", license="Extra")
+        for i in range(docs // 10)
+    ]
+    batches = {
+        "station_info": stations,
+        "equipment": [
+            Equipment(type=rnd.choice(["transceiver", "antenna", "amplifier", "other"]), name=f"Rig {i}", specs="spec",
+                      station=station())
+            for i in range(min(docs, 100))
+        ],
+        "qsl_cards": [
+            QSLCard(image="x", year=str(2000 + i % 25), design=f"Design {i}", station=station()) for i in range(docs)
+        ],
+        "achievements": [
+            Achievement(title=f"Award {i}", description="d", year=str(2000 + i % 25), station=station())
+            for i in range(docs)
+        ],
+        "news": [News(title=f"News {i}", content="c", date=when(i), station=station()) for i in range(docs)],
+        "gallery": [
+            Gallery(image="x", title=f"Photo {i}", description="d", created_at=when(i), station=station())
+            for i in range(docs)
+        ],
+        "guestbook": [
+            Guestbook(name=f"Guest {i}", message="73", date=when(i), approved=rnd.random() < 0.3, station=station())
+            for i in range(docs)
+        ],
+        "guestbook_archive": [
+            Guestbook(name=f"Guest {i}", message="73", created_at=when(i), approved=False, station=station())
+            for i in range(docs)
+        ],
+        "contact_requests_archive": [
+            ContactRequest(name=f"Ham {i}", email="ham@example.com", message="QSL?", created_at=when(i),
+                           handled=True, station=station())
+            for i in range(docs)
+        ],
+        "contact_requests": [
+            ContactRequest(name=f"Ham {i}", email="ham@example.com", message="QSL?", created_at=when(i),
+                           handled=rnd.random() < 0.5, station=station())
+            for i in range(docs)
+        ],
+    }
+    for name, items in batches.items():
+        await db[name].insert_many([item.dict(by_alias=True) for item in items])
+
+    await db.jobs.insert_many([
+        {"_id": str(i), "type": "contact_notification", "status": rnd.choice(["pending", "done", "done", "done"]),
+         "run_at": when(i) if i % 2 else now + timedelta(minutes=i)}
+        for i in range(docs)
+    ])
+    await db.jobs.insert_many([
+        {"_id": f"running-{i}", "type": "contact_notification", "status": "running",
+         "run_at": when(i), "locked_until": when(i) if i % 10 == 0 else now + timedelta(minutes=1)}
+        for i in range(docs // 10)
+    ])
+    await db[collection_name("dead_jobs")].insert_many([
+        {"_id": str(i), "type": "contact_notification", "status": "dead", "failed_at": when(i)}
+        for i in range(docs)
+    ])
+    await db.dx_spots.insert_many([
+        {"_id": str(i), "spotter": "DL1ABC", "dx_call": "4K6AG" if i % 20 == 0 else f"JA{i % 9}XYZ",
+         "frequency": 14025.0, "band": rnd.choice(["20m", "40m", "15m", "10m"]), "mode": rnd.choice(["CW", "FT8"]),
+         "received_at": when(i)}
+        for i in range(docs)
+    ])
+    await db.exports.insert_many([
+        {"_id": str(i), "station": station(), "dataset": "guestbook", "status": "done", "created_at": when(i)}
+        for i in range(docs)
+    ])
+    await db.contests.insert_many([
+        {"_id": f"contest-{i}", "station": station(), "name": f"Contest {i}", "start": when(i * 100),
+         "end": when(i * 100) + timedelta(days=2)}
+        for i in range(docs // 10)
+    ])
+    await db.qsos.insert_many([
+        {"_id": str(i), "station": "4K6AG" if i % 2 else station(), "contest": f"contest-{i % 10}",
+         "call": f"JA{i % 9}XYZ", "band": rnd.choice(["20m", "40m"]), "mode": "CW", "timestamp": when(i)}
+        for i in range(docs)
+    ])
+    await db.changes.insert_many([
+        {"_id": i + 1, "station": station(), "collection": "news", "doc_id": str(i), "at": when(docs - i)}
+        for i in range(docs)
+    ])
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    await db.reception_rollups.insert_many([
+        {"_id": f"{callsign}:{i}", "station": callsign, "day": today - timedelta(days=i), "reports": 0}
+        for callsign in ("4K6AG", "4K0XX", "4K1XX", "4K2XX")
+        for i in range(docs // 4)
+    ])
+    await db.reception_chunks.insert_many([
+        {"_id": str(i), "station": station(), "day": today - timedelta(days=i % 30), "count": 0}
+        for i in range(docs)
+    ])
+    await db.station_status_history.insert_many([
+        {"callsign": "4K6AG", "timestamp": when(i), "status": rnd.choice(["online", "offline"])}
+        for i in range(docs)
+    ])
+    await db.station_status_rollups.insert_many([
+        {"callsign": "4K6AG", "granularity": granularity, "bucket": now.replace(minute=0, second=0, microsecond=0) - step * i,
+         "on_air_seconds": 1800}
+        for granularity, step in (("hour", timedelta(hours=1)), ("day", timedelta(days=1)))
+        for i in range(docs)
+    ])
+
+async def explain_shape(db, shape: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    query_filter = _resolve(shape["filter"], params)
+    collection = collection_name(shape["collection"])
+    if shape.get("count"):
+        command = {"count": collection, "query": query_filter}
+    else:
+        command = {"find": collection, "filter": query_filter}
+        if shape.get("sort"):
+            command["sort"] = shape["sort"]
+        if shape.get("limit"):
+            command["limit"] = shape["limit"]
+
+    result = await db.command({"explain": command, "verbosity": "executionStats"})
+    # Time-series collections are explained as an aggregation over their buckets
+    if "stages" in result:
+        result = result["stages"][0]["$cursor"]
+
+    stats = result["executionStats"]
+    stages = plan_stages(result["queryPlanner"]["winningPlan"])
+    return {
+        "plan": describe_plan(stages),
+        "collscan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+        "in_memory_sort": any(stage.get("stage") == "SORT" for stage in stages),
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_examined": stats.get("totalDocsExamined", 0),
+        "returned": stats.get("nReturned", 0),
+    }
+
+async def run_audit(docs: int, max_ratio: float, keep: bool, database: Optional[str]) -> int:
+    # Point the database module at a scratch database before it connects
+    production_db = os.environ.get('DB_NAME', 'radio_station')
+    if database == production_db:
+        raise typer.BadParameter("The audit drops its database; refusing to use DB_NAME")
+    os.environ['DB_NAME'] = database or f"{production_db}_query_audit"
+    from database import DatabaseManager, client, db
+
+    await client.drop_database(db.name)
+    failures = 0
+    try:
+        await DatabaseManager.ensure_indexes()
+        await seed(db, docs)
+        sample = await db.equipment.find_one()
+        contest = await db.contests.find_one({"_id": "contest-0"})
+        params = {
+            "sample_id": sample["_id"],
+            "contest_station": contest["station"],
+            "now": datetime.utcnow(),
+            "month_ago": datetime.utcnow() - timedelta(days=30),
+            "today": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+            "changes_since": max(docs - 500, 0),
+        }
+
+        typer.echo(f"{'SHAPE':32} {'KEYS':>7} {'DOCS':>7} {'RET':>6} {'RATIO':>6}  RESULT  PLAN")
+        for shape in QUERY_SHAPES:
+            report = await explain_shape(db, shape, params)
+            problems = []
+            if report["collscan"]:
+                problems.append("COLLSCAN")
+            if report["in_memory_sort"]:
+                problems.append("in-memory SORT")
+
+            examined = max(report["keys_examined"], report["docs_examined"])
+            ratio = examined / max(report["returned"], 1)
+            if not shape.get("count") and ratio > max_ratio:
+                problems.append(f"examined/returned {ratio:.1f} > {max_ratio}")
+
+            failures += bool(problems)
+            typer.echo(
+                f"{shape['name']:32} {report['keys_examined']:>7} {report['docs_examined']:>7} "
+                f"{report['returned']:>6} {ratio:>6.1f}  {'FAIL' if problems else 'ok':6}  {report['plan']}"
+            )
+            for problem in problems:
+                typer.echo(f"{'':32} -> {problem}")
+    finally:
+        if not keep:
+            await client.drop_database(db.name)
+
+    typer.echo(f"\n{len(QUERY_SHAPES) - failures}/{len(QUERY_SHAPES)} query shapes passed")
+    return failures
+
+def main(
+    docs: int = typer.Option(1000, help="Synthetic documents per collection"),
+    max_ratio: float = typer.Option(2.0, help="Maximum examined/returned ratio"),
+    keep: bool = typer.Option(False, help="Keep the scratch database after the audit"),
+    database: Optional[str] = typer.Option(None, help="Scratch database name (default: <DB_NAME>_query_audit)"),
+):
+    """Explain every query shape used by the API and fail on collection scans"""
+    failures = asyncio.run(run_audit(docs, max_ratio, keep, database))
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    typer.run(main)
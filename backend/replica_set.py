@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Local three-member replica set for exercising the per-route database policies.
+
+Starts three mongod processes (mongod must be on PATH) as replica set `rs0`,
+initiates it and prints the MONGO_URL to run the API against. `check` shows
+which member serves each policy's reads and that each write concern is acknowledged.
+
+    python replica_set.py start --dir /tmp/rs0
+    MONGO_URL="mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0" \\
+        python replica_set.py check
+"""
+
+from pathlib import Path
+from typing import List
+import os
+import subprocess
+import time
+
+import typer
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from routing import POLICIES
+
+app = typer.Typer(help="Local replica set for testing read preference and write concern routing")
+
+def _url(ports: List[int], replica_set: str) -> str:
+    hosts = ",".join(f"localhost:{port}" for port in ports)
+    return f"mongodb://{hosts}/?replicaSet={replica_set}"
+
+@app.command()
+def start(
+    directory: Path = typer.Option(Path("/tmp/rs0"), "--dir", help="Data directory, one subdirectory per member"),
+    port: int = typer.Option(27017, help="Port of the first member; the others use the next ports"),
+    replica_set: str = typer.Option("rs0", help="Replica set name"),
+):
+    """Run the replica set in the foreground until interrupted"""
+    ports = [port, port + 1, port + 2]
+    processes = []
+    try:
+        for member_port in ports:
+            path = directory / str(member_port)
+            path.mkdir(parents=True, exist_ok=True)
+            processes.append(subprocess.Popen([
+                "mongod", "--replSet", replica_set, "--port", str(member_port), "--bind_ip", "localhost",
+                "--dbpath", str(path), "--logpath", str(path / "mongod.log"),
+            ]))
+
+        admin = MongoClient(f"mongodb://localhost:{port}/?directConnection=true", serverSelectionTimeoutMS=30000)
+        admin.admin.command("ping")
+        try:
+            admin.admin.command("replSetInitiate", {
+                "_id": replica_set,
+                "members": [{"_id": i, "host": f"localhost:{member_port}"} for i, member_port in enumerate(ports)],
+            })
+        except PyMongoError as e:
+            # Restarting over an existing data directory keeps the old configuration
+            if "already initialized" not in str(e):
+                raise
+
+        typer.echo(f"Replica set {replica_set} running, data in {directory}")
+        typer.echo(f'MONGO_URL="{_url(ports, replica_set)}"')
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+@app.command()
+def check(collection: str = typer.Option("routing_check", help="Scratch collection to read and write")):
+    """Show the member serving each policy's reads and the acknowledgement of each write concern"""
+    client = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=10000)
+    db = client[os.environ.get('DB_NAME', 'radio_station')]
+    typer.echo(f"primary: {client.primary}, secondaries: {sorted(client.secondaries)}")
+
+    for policy in POLICIES.values():
+        scratch = db[collection].with_options(read_preference=policy.read_preference, write_concern=policy.write_concern)
+        if policy.write_concern is not None:
+            started = time.perf_counter()
+            result = scratch.insert_one({"policy": policy.name, "at": time.time()})
+            elapsed = (time.perf_counter() - started) * 1000
+            typer.echo(f"{policy.name:16} write {policy.write_concern.document} "
+                       f"acknowledged={result.acknowledged} in {elapsed:.1f} ms")
+        cursor = scratch.find().limit(1)
+        list(cursor)
+        typer.echo(f"{policy.name:16} read  {policy.read_preference.mongos_mode} -> {cursor.address}")
+    db.drop_collection(collection)
+
+if __name__ == "__main__":
+    app()
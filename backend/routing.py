@@ -0,0 +1,110 @@
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+from typing import Any, Callable, Dict, Optional, Type
+import functools
+import os
+
+# Public reads may be served by a secondary lagging at most this much (MongoDB requires at least 90)
+DB_MAX_STALENESS_SECONDS = int(os.environ.get('DB_MAX_STALENESS_SECONDS', 90))
+DB_WRITE_CONCERN = os.environ.get('DB_WRITE_CONCERN', 'majority')
+DB_LOW_VALUE_WRITE_CONCERN = os.environ.get('DB_LOW_VALUE_WRITE_CONCERN', '1')
+DB_WRITE_TIMEOUT_MS = int(os.environ.get('DB_WRITE_TIMEOUT_MS', 5000))
+# Per-route overrides by handler name: "create_guestbook_entry=write,get_news=admin_read"
+DB_ROUTE_POLICIES = os.environ.get('DB_ROUTE_POLICIES', '')
+
+def _write_concern(w: str) -> WriteConcern:
+    return WriteConcern(w=int(w) if w.isdigit() else w, wtimeout=DB_WRITE_TIMEOUT_MS)
+
+class DBPolicy:
+    def __init__(self, name: str, read_preference: Any, write_concern: Optional[WriteConcern] = None):
+        self.name = name
+        self.read_preference = read_preference
+        self.write_concern = write_concern
+
+POLICIES: Dict[str, DBPolicy] = {
+    policy.name: policy for policy in [
+        DBPolicy("public_read", SecondaryPreferred(max_staleness=DB_MAX_STALENESS_SECONDS)),
+        DBPolicy("admin_read", Primary()),
+        DBPolicy("write", Primary(), _write_concern(DB_WRITE_CONCERN)),
+        # Guestbook posts and similar writes that can be lost in a failover without real harm
+        DBPolicy("low_value_write", Primary(), _write_concern(DB_LOW_VALUE_WRITE_CONCERN)),
+    ]
+}
+
+ROUTE_POLICIES: Dict[str, str] = dict(
+    item.strip().split("=", 1) for item in DB_ROUTE_POLICIES.split(",") if "=" in item
+)
+if not set(ROUTE_POLICIES.values()) <= set(POLICIES):
+    raise ValueError(f"DB_ROUTE_POLICIES may only use the policies {', '.join(POLICIES)}")
+
+_current_policy: ContextVar[Optional[DBPolicy]] = ContextVar("db_policy", default=None)
+
+def db_policy(name: str):
+    """Decorator choosing a route's policy instead of the method default (GET: public_read, else write)"""
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy {name}")
+
+    def decorator(func):
+        func.db_policy = name
+        return func
+    return decorator
+
+def policy_for(route: APIRoute) -> DBPolicy:
+    if route.name in ROUTE_POLICIES:
+        return POLICIES[ROUTE_POLICIES[route.name]]
+    name = getattr(route.endpoint, "db_policy", None)
+    if name is None:
+        name = "public_read" if route.methods <= {"GET", "HEAD"} else "write"
+    return POLICIES[name]
+
+class RoutedCollection:
+    """Collection proxy that applies the current route's read preference and write concern.
+
+    Outside of a request (background jobs, startup) the client defaults apply.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._variants = {}
+
+    def _resolve(self):
+        policy = _current_policy.get()
+        if policy is None:
+            return self._collection
+        variant = self._variants.get(policy.name)
+        if variant is None:
+            variant = self._collection.with_options(
+                read_preference=policy.read_preference,
+                write_concern=policy.write_concern or self._collection.write_concern
+            )
+            self._variants[policy.name] = variant
+        return variant
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        return f"RoutedCollection({self._collection.name})"
+
+@functools.lru_cache(maxsize=None)
+def db_routed(route_class: Type[APIRoute]) -> Type[APIRoute]:
+    """Route class that runs each handler under its route's database policy"""
+
+    class RoutedRoute(route_class):
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+            policy = policy_for(self)
+
+            async def routed_handler(request):
+                token = _current_policy.set(policy)
+                try:
+                    return await handler(request)
+                finally:
+                    _current_policy.reset(token)
+
+            return routed_handler
+
+    RoutedRoute.__name__ = f"Routed{route_class.__name__}"
+    return RoutedRoute
@@ -1,30 +1,73 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Header, Depends, UploadFile, File
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from pathlib import Path
+from pymongo.errors import DuplicateKeyError
 import os
+import asyncio
+import json
 import logging
+import pandas as pd
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Import models and database
 from models import (
-    StationInfo, StationInfoCreate, StationInfoUpdate,
-    Equipment, EquipmentCreate, EquipmentUpdate,
+    StationInfo, StationInfoCreate, StationInfoUpdate, StationCreate,
+    Equipment, EquipmentCreate, EquipmentUpdate, EquipmentBulkRequest,
     QSLCard, QSLCardCreate,
     Achievement, AchievementCreate,
     News, NewsCreate, NewsResponse,
     Gallery, GalleryCreate,
     Guestbook, GuestbookCreate, GuestbookResponse,
+    GuestbookModerationRequest, GuestbookModerationResponse,
     ContactRequest, ContactRequestCreate, ContactResponse,
     StationStatusInfo, StationStatusUpdate,
+    HistoryGranularity, StatusHistoryResponse, DXSpot,
+    ReceptionReport, ReceptionImportResponse, HeatmapAxis, PropagationHeatmap,
+    ExportRequest, ExportInfo,
+    Contest, ContestCreate, ContestStats, QSOCreate, QSOLogResponse, DupeCheckResponse,
+    DXCCResolveRequest, DXCCResolution, ChangeFeed,
+    BatchRequest, BatchResponse, BulkWriteResponse,
     SuccessResponse, ErrorResponse
 )
 from database import (
     DatabaseManager,
     station_collection, equipment_collection, qsl_cards_collection,
     achievements_collection, news_collection, gallery_collection,
-    guestbook_collection, contact_requests_collection
+    guestbook_collection, contact_requests_collection,
+    guestbook_archive_collection, contact_requests_archive_collection,
+    dead_jobs_collection, dx_spots_collection, contests_collection, qsos_collection
+)
+from stations import station_registry, station_scope, normalize_callsign, default_station_router
+from status_history import StatusHistory
+from snapshots import snapshot_publisher
+from batch import BatchDispatcher, BATCH_MAX_REQUESTS, batch_excluded
+from singleflight import single_flight
+from bulk import run_bulk, BULK_MAX_OPERATIONS
+from moderation import GuestbookModeration, GUESTBOOK_MODERATION
+from archival import archiver, ensure_archive_indexes, find_with_archive
+from jobs import job_queue
+from dxcluster import dx_cluster, spot_hub, SpotFilter
+from propagation import (
+    ReceptionStore, read_reports, MODES, BANDS, REGIONS, RECEPTION_MAX_DAYS, RECEPTION_MAX_REPORTS
+)
+from notifications import contact_notification_job
+from exports import ExportManager, FORMATS
+from contest import contest_log, normalize_qso, DupeIndex
+from logbook import adif_header, adif_record, cabrillo_header, cabrillo_line, encode, qso_query, CABRILLO_FOOTER
+from bands import BAND_PLAN
+from dxcc import dxcc_resolver, entity_fields, load_prefix_file, DXCC_RESOLVE_MAX
+from changes import ChangeLog, change_log_pruner
+from etag import ETagMiddleware
+from routing import db_routed, db_policy
+from limiter import limited, route_limits, concurrency_limiter
+from tracing import TracedRoute, TracingMiddleware, TRACING_ENABLED, trace_span
+from profiling import (
+    ProfilingMiddleware, PROFILING_ENABLED, PROFILE_HEADER,
+    profile_store, folded, is_profiling_admin
 )
 
 # Load environment
@@ -34,8 +77,12 @@ load_dotenv(ROOT_DIR / '.env')
 # Create FastAPI app
 app = FastAPI(title="4K6AG Radio Station API", version="1.0.0")
 
-# Create API router
-api_router = APIRouter(prefix="/api")
+# Create API router; station content lives under /api/{callsign}/...
+# Routes pick their read preference/write concern per database policy (routing.py)
+# and are admitted through the adaptive concurrency limiter with a deadline (limiter.py)
+route_class = limited(db_routed(TracedRoute if TRACING_ENABLED else APIRoute))
+api_router = APIRouter(prefix="/api", route_class=route_class)
+station_router = APIRouter(prefix="/{callsign}", route_class=route_class)
 
 # CORS middleware
 app.add_middleware(
@@ -44,8 +91,20 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "traceparent", "ETag"],
 )
 
+# Conditional GETs: clients revalidate cached responses with If-None-Match
+app.add_middleware(ETagMiddleware)
+
+# Request tracing: trace id per request, spans for handlers, Mongo commands and serialization
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Request profiling is only wired in when configured, so it costs nothing when off
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,9 +112,26 @@ logger = logging.getLogger(__name__)
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
+    await asyncio.to_thread(load_prefix_file)
     await DatabaseManager.ensure_indexes()
+    await ensure_archive_indexes()
+    await DatabaseManager.backfill_station()
     await DatabaseManager.init_sample_data()
     logger.info("Database initialized successfully")
+    await snapshot_publisher.publish_all(await station_registry.callsigns())
+    await contest_log.preload()
+    archiver.start()
+    change_log_pruner.start()
+    job_queue.start()
+    dx_cluster.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await archiver.stop()
+    await change_log_pruner.stop()
+    await job_queue.stop()
+    await dx_cluster.stop()
+    await contest_log.flush()
 
 # Utility functions
 def serialize_doc(doc):
@@ -76,25 +152,55 @@ def serialize_doc(doc):
 
 def serialize_docs(docs):
     """Serialize list of documents"""
-    return [serialize_doc(doc) for doc in docs]
+    with trace_span("serialize_docs", docs=len(docs)):
+        return [serialize_doc(doc) for doc in docs]
+
+# Station Endpoints
+@api_router.get("/stations", response_model=List[StationInfo])
+async def get_stations():
+    """List the stations hosted on this deployment"""
+    docs = await station_collection.find().sort("callsign", 1).to_list(1000)
+    return serialize_docs(docs)
+
+@api_router.post("/stations", response_model=StationInfo)
+async def create_station(station_data: StationCreate):
+    """Add a station (admin endpoint)"""
+    callsign = normalize_callsign(station_data.callsign)
+    if await station_registry.exists(callsign):
+        raise HTTPException(status_code=409, detail="Station already exists")
+    
+    station = StationInfo(**dict(station_data.dict(), callsign=callsign))
+    try:
+        await station_collection.insert_one(station.dict(by_alias=True))
+    except DuplicateKeyError:
+        # Another request created it between the check and the insert
+        raise HTTPException(status_code=409, detail="Station already exists")
+    station_registry.add(callsign)
+    for name in snapshot_publisher.renderers:
+        snapshot_publisher.schedule(name, callsign)
+    
+    created_doc = await station_collection.find_one({"callsign": callsign})
+    return serialize_doc(created_doc)
 
 # Station Information Endpoints
-@api_router.get("/station", response_model=StationInfo)
-async def get_station_info():
+@station_router.get("/station", response_model=StationInfo)
+@single_flight("station")
+async def get_station_info(callsign: str = Depends(station_scope)):
     """Get station information"""
-    doc = await station_collection.find_one({"callsign": "4K6AG"})
+    doc = await station_collection.find_one({"callsign": callsign})
     if not doc:
         raise HTTPException(status_code=404, detail="Station information not found")
     return serialize_doc(doc)
 
-@api_router.put("/station", response_model=StationInfo)
-async def update_station_info(station_data: StationInfoUpdate):
+@station_router.put("/station", response_model=StationInfo)
+@snapshot_publisher.publishes("station")
+async def update_station_info(station_data: StationInfoUpdate, callsign: str = Depends(station_scope)):
     """Update station information"""
     update_data = {k: v for k, v in station_data.dict().items() if v is not None}
     update_data['updated_at'] = datetime.utcnow()
     
     result = await station_collection.find_one_and_update(
-        {"callsign": "4K6AG"},
+        {"callsign": callsign},
         {"$set": update_data},
         return_document=True
     )
@@ -102,32 +208,43 @@ async def update_station_info(station_data: StationInfoUpdate):
     if not result:
         raise HTTPException(status_code=404, detail="Station not found")
     
+    if 'status' in update_data:
+        await StatusHistory.record(result)
+    
     return serialize_doc(result)
 
 # Equipment Endpoints
-@api_router.get("/equipment", response_model=List[Equipment])
-async def get_equipment():
+@station_router.get("/equipment", response_model=List[Equipment])
+@single_flight("equipment")
+async def get_equipment(callsign: str = Depends(station_scope)):
     """Get all equipment"""
-    docs = await equipment_collection.find().to_list(100)
+    docs = await equipment_collection.find({"station": callsign}).to_list(100)
     return serialize_docs(docs)
 
-@api_router.post("/equipment", response_model=Equipment)
-async def create_equipment(equipment_data: EquipmentCreate):
+@station_router.post("/equipment", response_model=Equipment)
+@snapshot_publisher.publishes("equipment")
+async def create_equipment(equipment_data: EquipmentCreate, callsign: str = Depends(station_scope)):
     """Add new equipment"""
-    equipment = Equipment(**equipment_data.dict())
+    equipment = Equipment(**equipment_data.dict(), station=callsign)
     result = await equipment_collection.insert_one(equipment.dict(by_alias=True))
+    await ChangeLog.record(callsign, "equipment", [result.inserted_id])
     
     created_doc = await equipment_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
-@api_router.put("/equipment/{equipment_id}", response_model=Equipment)
-async def update_equipment(equipment_id: str, equipment_data: EquipmentUpdate):
+@station_router.put("/equipment/{equipment_id}", response_model=Equipment)
+@snapshot_publisher.publishes("equipment")
+async def update_equipment(
+    equipment_id: str,
+    equipment_data: EquipmentUpdate,
+    callsign: str = Depends(station_scope)
+):
     """Update equipment"""
     update_data = {k: v for k, v in equipment_data.dict().items() if v is not None}
     update_data['updated_at'] = datetime.utcnow()
     
     result = await equipment_collection.find_one_and_update(
-        {"_id": equipment_id},
+        {"_id": equipment_id, "station": callsign},
         {"$set": update_data},
         return_document=True
     )
@@ -135,117 +252,239 @@ async def update_equipment(equipment_id: str, equipment_data: EquipmentUpdate):
     if not result:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
+    await ChangeLog.record(callsign, "equipment", [equipment_id])
     return serialize_doc(result)
 
-@api_router.delete("/equipment/{equipment_id}")
-async def delete_equipment(equipment_id: str):
+@station_router.delete("/equipment/{equipment_id}")
+@snapshot_publisher.publishes("equipment")
+async def delete_equipment(equipment_id: str, callsign: str = Depends(station_scope)):
     """Delete equipment"""
-    result = await equipment_collection.delete_one({"_id": equipment_id})
+    result = await equipment_collection.delete_one({"_id": equipment_id, "station": callsign})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Equipment not found")
     
+    await ChangeLog.record(callsign, "equipment", [equipment_id])
     return {"success": True, "message": "Equipment deleted successfully"}
 
+@station_router.post("/equipment/bulk", response_model=BulkWriteResponse)
+@route_limits(deadline_ms=10_000)
+@snapshot_publisher.publishes("equipment")
+async def bulk_equipment(bulk_data: EquipmentBulkRequest, callsign: str = Depends(station_scope)):
+    """Update/delete many equipment items in one unordered bulk write"""
+    if len(bulk_data.operations) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Bulk requests are limited to {BULK_MAX_OPERATIONS} operations")
+    
+    query = None
+    if bulk_data.filter is not None:
+        query = {"station": callsign}
+        if bulk_data.filter.type is not None:
+            query["type"] = bulk_data.filter.type
+        if bulk_data.filter.ids is not None:
+            query["_id"] = {"$in": bulk_data.filter.ids}
+        if len(query) == 1:
+            raise HTTPException(status_code=400, detail="Bulk filter must not be empty")
+        if not bulk_data.delete and bulk_data.update is None:
+            raise HTTPException(status_code=400, detail="Filter-based bulk requests need an update or delete")
+    
+    # Documents matched by the filter are looked up first, so their changes can be recorded
+    matched = [doc["_id"] async for doc in equipment_collection.find(query, {"_id": 1})] if query else []
+    result = await run_bulk(
+        equipment_collection,
+        {"station": callsign},
+        [operation.dict() for operation in bulk_data.operations],
+        query=query,
+        update=bulk_data.update.dict() if bulk_data.update else None,
+        delete=bulk_data.delete
+    )
+    # The feed entry only names the document, so one whose outcome is unknown is recorded too
+    changed = [item["id"] for item in result["results"] if item["id"] and item["status"] in ("updated", "deleted", "unknown")]
+    if any(item["id"] is None and item["status"] == "applied" for item in result["results"]):
+        changed += matched
+    await ChangeLog.record(callsign, "equipment", changed)
+    return result
+
 # QSL Cards Endpoints
-@api_router.get("/qsl-cards", response_model=List[QSLCard])
-async def get_qsl_cards():
+@station_router.get("/qsl-cards", response_model=List[QSLCard])
+@single_flight("qsl-cards")
+async def get_qsl_cards(callsign: str = Depends(station_scope)):
     """Get all QSL cards"""
-    docs = await qsl_cards_collection.find().sort("year", -1).to_list(100)
+    docs = await qsl_cards_collection.find({"station": callsign}).sort("year", -1).to_list(100)
     return serialize_docs(docs)
 
-@api_router.post("/qsl-cards", response_model=QSLCard)
-async def create_qsl_card(qsl_data: QSLCardCreate):
+@station_router.post("/qsl-cards", response_model=QSLCard)
+@snapshot_publisher.publishes("qsl-cards")
+async def create_qsl_card(qsl_data: QSLCardCreate, callsign: str = Depends(station_scope)):
     """Add new QSL card"""
-    qsl_card = QSLCard(**qsl_data.dict())
+    qsl_card = QSLCard(**qsl_data.dict(), station=callsign)
     result = await qsl_cards_collection.insert_one(qsl_card.dict(by_alias=True))
+    await ChangeLog.record(callsign, "qsl_cards", [result.inserted_id])
     
     created_doc = await qsl_cards_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
 # Achievements Endpoints
-@api_router.get("/achievements", response_model=List[Achievement])
-async def get_achievements():
+@station_router.get("/achievements", response_model=List[Achievement])
+@single_flight("achievements")
+async def get_achievements(callsign: str = Depends(station_scope)):
     """Get all achievements"""
-    docs = await achievements_collection.find().sort("year", -1).to_list(100)
+    docs = await achievements_collection.find({"station": callsign}).sort("year", -1).to_list(100)
     return serialize_docs(docs)
 
-@api_router.post("/achievements", response_model=Achievement)
-async def create_achievement(achievement_data: AchievementCreate):
+@station_router.post("/achievements", response_model=Achievement)
+@snapshot_publisher.publishes("achievements")
+async def create_achievement(achievement_data: AchievementCreate, callsign: str = Depends(station_scope)):
     """Add new achievement"""
-    achievement = Achievement(**achievement_data.dict())
+    achievement = Achievement(**achievement_data.dict(), station=callsign)
     result = await achievements_collection.insert_one(achievement.dict(by_alias=True))
+    await ChangeLog.record(callsign, "achievements", [result.inserted_id])
     
     created_doc = await achievements_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
 # News Endpoints
-@api_router.get("/news", response_model=NewsResponse)
-async def get_news(limit: int = Query(10, ge=1, le=50), offset: int = Query(0, ge=0)):
+@station_router.get("/news", response_model=NewsResponse)
+@single_flight("news")
+async def get_news(
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    callsign: str = Depends(station_scope)
+):
     """Get news with pagination"""
-    total = await news_collection.count_documents({})
-    docs = await news_collection.find().sort("date", -1).skip(offset).limit(limit).to_list(limit)
+    query = {"station": callsign}
+    total = await news_collection.count_documents(query)
+    docs = await news_collection.find(query).sort("date", -1).skip(offset).limit(limit).to_list(limit)
     
     return {
         "news": serialize_docs(docs),
         "total": total
     }
 
-@api_router.post("/news", response_model=News)
-async def create_news(news_data: NewsCreate):
+@station_router.post("/news", response_model=News)
+@snapshot_publisher.publishes("news")
+async def create_news(news_data: NewsCreate, callsign: str = Depends(station_scope)):
     """Add new news item"""
     if news_data.date is None:
         news_data.date = datetime.utcnow()
     
-    news_item = News(**news_data.dict())
+    news_item = News(**news_data.dict(), station=callsign)
     result = await news_collection.insert_one(news_item.dict(by_alias=True))
+    await ChangeLog.record(callsign, "news", [result.inserted_id])
     
     created_doc = await news_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
 # Gallery Endpoints
-@api_router.get("/gallery", response_model=List[Gallery])
-async def get_gallery():
+@station_router.get("/gallery", response_model=List[Gallery])
+@single_flight("gallery")
+async def get_gallery(callsign: str = Depends(station_scope)):
     """Get all gallery images"""
-    docs = await gallery_collection.find().sort("created_at", -1).to_list(100)
+    docs = await gallery_collection.find({"station": callsign}).sort("created_at", -1).to_list(100)
     return serialize_docs(docs)
 
-@api_router.post("/gallery", response_model=Gallery)
-async def create_gallery_item(gallery_data: GalleryCreate):
+@station_router.post("/gallery", response_model=Gallery)
+@snapshot_publisher.publishes("gallery")
+async def create_gallery_item(gallery_data: GalleryCreate, callsign: str = Depends(station_scope)):
     """Add new gallery item"""
-    gallery_item = Gallery(**gallery_data.dict())
+    gallery_item = Gallery(**gallery_data.dict(), station=callsign)
     result = await gallery_collection.insert_one(gallery_item.dict(by_alias=True))
+    await ChangeLog.record(callsign, "gallery", [result.inserted_id])
     
     created_doc = await gallery_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
 # Guestbook Endpoints
-@api_router.get("/guestbook", response_model=GuestbookResponse)
-async def get_guestbook(limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+@station_router.get("/guestbook", response_model=GuestbookResponse)
+@single_flight("guestbook")
+async def get_guestbook(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    callsign: str = Depends(station_scope)
+):
     """Get guestbook entries with pagination"""
-    total = await guestbook_collection.count_documents({"approved": True})
-    docs = await guestbook_collection.find({"approved": True}).sort("date", -1).skip(offset).limit(limit).to_list(limit)
+    query = {"station": callsign, "approved": True}
+    total = await guestbook_collection.count_documents(query)
+    docs = await guestbook_collection.find(query).sort("date", -1).skip(offset).limit(limit).to_list(limit)
     
     return {
         "entries": serialize_docs(docs),
         "total": total
     }
 
-@api_router.post("/guestbook", response_model=Guestbook)
-async def create_guestbook_entry(entry_data: GuestbookCreate):
+@station_router.post("/guestbook", response_model=Guestbook)
+@db_policy("low_value_write")
+@single_flight.invalidates
+async def create_guestbook_entry(entry_data: GuestbookCreate, callsign: str = Depends(station_scope)):
     """Add new guestbook entry"""
-    entry = Guestbook(**entry_data.dict())
+    entry_fields = dict(entry_data.dict(), **entity_fields(entry_data.callsign, entry_data.country))
+    entry = Guestbook(**entry_fields, station=callsign, approved=not GUESTBOOK_MODERATION)
     result = await guestbook_collection.insert_one(entry.dict(by_alias=True))
+    if entry.approved:
+        await ChangeLog.record(callsign, "guestbook", [result.inserted_id])
     
     created_doc = await guestbook_collection.find_one({"_id": result.inserted_id})
     return serialize_doc(created_doc)
 
+# Guestbook Moderation Endpoints
+@station_router.get("/guestbook/pending", response_model=GuestbookResponse)
+@db_policy("admin_read")
+async def get_pending_guestbook(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    callsign: str = Depends(station_scope)
+):
+    """Get guestbook entries waiting for moderation (admin endpoint)"""
+    result = await GuestbookModeration.pending(callsign, limit, offset)
+    return {
+        "entries": serialize_docs(result["entries"]),
+        "total": result["total"]
+    }
+
+@station_router.put("/guestbook/{entry_id}/approve", response_model=Guestbook)
+@single_flight.invalidates
+async def approve_guestbook_entry(entry_id: str, callsign: str = Depends(station_scope)):
+    """Publish a pending guestbook entry (admin endpoint)"""
+    if not await GuestbookModeration.approve(callsign, [entry_id]):
+        raise HTTPException(status_code=404, detail="Pending guestbook entry not found")
+    
+    doc = await guestbook_collection.find_one({"_id": entry_id})
+    return serialize_doc(doc)
+
+@station_router.put("/guestbook/{entry_id}/reject", response_model=SuccessResponse)
+@single_flight.invalidates
+async def reject_guestbook_entry(entry_id: str, callsign: str = Depends(station_scope)):
+    """Reject a guestbook entry and move it to the archive (admin endpoint)"""
+    if not await GuestbookModeration.reject(callsign, [entry_id]):
+        raise HTTPException(status_code=404, detail="Guestbook entry not found")
+    return SuccessResponse(message="Guestbook entry rejected")
+
+@station_router.post("/guestbook/moderate", response_model=GuestbookModerationResponse)
+@route_limits(deadline_ms=10_000)
+@single_flight.invalidates
+async def moderate_guestbook(moderation: GuestbookModerationRequest, callsign: str = Depends(station_scope)):
+    """Approve and reject many guestbook entries at once (admin endpoint)"""
+    if len(moderation.approve) + len(moderation.reject) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Bulk requests are limited to {BULK_MAX_OPERATIONS} operations")
+    if set(moderation.approve) & set(moderation.reject):
+        raise HTTPException(status_code=400, detail="An entry cannot be both approved and rejected")
+    
+    approved, rejected = await asyncio.gather(
+        GuestbookModeration.approve(callsign, moderation.approve),
+        GuestbookModeration.reject(callsign, moderation.reject)
+    )
+    return {"approved": approved, "rejected": rejected}
+
 # Contact/QSL Request Endpoints
-@api_router.post("/contact", response_model=ContactResponse)
-async def create_contact_request(contact_data: ContactRequestCreate):
+@station_router.post("/contact", response_model=ContactResponse)
+async def create_contact_request(contact_data: ContactRequestCreate, callsign: str = Depends(station_scope)):
     """Submit contact form or QSL request"""
-    contact_request = ContactRequest(**contact_data.dict())
-    result = await contact_requests_collection.insert_one(contact_request.dict(by_alias=True))
+    contact_request = ContactRequest(**contact_data.dict(), **entity_fields(contact_data.callsign), station=callsign)
+    contact_doc = contact_request.dict(by_alias=True)
+    
+    # One insert stores the request together with its notification job; the queue relays the job to the workers
+    job_queue.stage(contact_doc, *contact_notification_job(contact_doc))
+    result = await contact_requests_collection.insert_one(contact_doc)
+    job_queue.staged()
     
     return ContactResponse(
         success=True,
@@ -253,17 +492,68 @@ async def create_contact_request(contact_data: ContactRequestCreate):
         id=str(result.inserted_id)
     )
 
-@api_router.get("/contact-requests", response_model=List[ContactRequest])
-async def get_contact_requests(limit: int = Query(50, ge=1, le=100)):
+@station_router.get("/contact-requests", response_model=List[ContactRequest])
+@db_policy("admin_read")
+async def get_contact_requests(
+    limit: int = Query(50, ge=1, le=100),
+    include_archived: bool = False,
+    callsign: str = Depends(station_scope)
+):
     """Get contact requests (admin endpoint)"""
-    docs = await contact_requests_collection.find().sort("created_at", -1).limit(limit).to_list(limit)
+    if include_archived:
+        docs = await find_with_archive(
+            contact_requests_collection, contact_requests_archive_collection, {"station": callsign}, "created_at", limit
+        )
+    else:
+        docs = await contact_requests_collection.find({"station": callsign}).sort("created_at", -1).limit(limit).to_list(limit)
     return serialize_docs(docs)
 
+@station_router.put("/contact-requests/{request_id}/handled", response_model=ContactRequest)
+async def mark_contact_request_handled(request_id: str, callsign: str = Depends(station_scope)):
+    """Mark a contact request as handled so it can be archived (admin endpoint)"""
+    result = await contact_requests_collection.find_one_and_update(
+        {"_id": request_id, "station": callsign},
+        {"$set": {"handled": True, "handled_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+        return_document=True
+    )
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Contact request not found")
+    
+    return serialize_doc(result)
+
+# Archive Endpoints
+@station_router.get("/archive/guestbook", response_model=GuestbookResponse)
+@db_policy("admin_read")
+async def get_archived_guestbook(
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    callsign: str = Depends(station_scope)
+):
+    """Get archived guestbook entries (admin endpoint)"""
+    query = {"station": callsign}
+    total = await guestbook_archive_collection.count_documents(query)
+    docs = await guestbook_archive_collection.find(query).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
+    
+    return {
+        "entries": serialize_docs(docs),
+        "total": total
+    }
+
+@api_router.post("/archive/run", response_model=SuccessResponse)
+@route_limits(deadline_ms=120_000)
+async def run_archival():
+    """Apply the archival policies now (admin endpoint)"""
+    moved = await archiver.run_once()
+    return SuccessResponse(message="Archival completed", data={"moved": moved})
+
 # Station Status Endpoints
-@api_router.get("/status", response_model=StationStatusInfo)
-async def get_station_status():
+@station_router.get("/status", response_model=StationStatusInfo)
+@db_policy("admin_read")
+@single_flight("status")
+async def get_station_status(callsign: str = Depends(station_scope)):
     """Get current station status"""
-    station_doc = await station_collection.find_one({"callsign": "4K6AG"})
+    station_doc = await station_collection.find_one({"callsign": callsign})
     if not station_doc:
         raise HTTPException(status_code=404, detail="Station not found")
     
@@ -274,14 +564,15 @@ async def get_station_status():
         mode=station_doc.get("mode")
     )
 
-@api_router.put("/status", response_model=StationStatusInfo)
-async def update_station_status(status_data: StationStatusUpdate):
+@station_router.put("/status", response_model=StationStatusInfo)
+@snapshot_publisher.publishes("station")
+async def update_station_status(status_data: StationStatusUpdate, callsign: str = Depends(station_scope)):
     """Update station status"""
     update_data = status_data.dict()
     update_data['updated_at'] = datetime.utcnow()
     
     result = await station_collection.find_one_and_update(
-        {"callsign": "4K6AG"},
+        {"callsign": callsign},
         {"$set": update_data},
         return_document=True
     )
@@ -289,6 +580,8 @@ async def update_station_status(status_data: StationStatusUpdate):
     if not result:
         raise HTTPException(status_code=404, detail="Station not found")
     
+    await StatusHistory.record(result)
+    
     return StationStatusInfo(
         status=result.get("status"),
         last_updated=result.get("updated_at"),
@@ -296,12 +589,449 @@ async def update_station_status(status_data: StationStatusUpdate):
         mode=result.get("mode")
     )
 
+@station_router.get("/status/history", response_model=StatusHistoryResponse)
+async def get_station_status_history(
+    granularity: HistoryGranularity = Query(HistoryGranularity.day),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    callsign: str = Depends(station_scope)
+):
+    """Get on-air time per hour/day bucket from the status history rollups"""
+    # Stored timestamps are naive UTC
+    end = end.astimezone(timezone.utc).replace(tzinfo=None) if end and end.tzinfo else end or datetime.utcnow()
+    start = start.astimezone(timezone.utc).replace(tzinfo=None) if start and start.tzinfo else start
+    if start is None:
+        start = end - (timedelta(days=30) if granularity == HistoryGranularity.day else timedelta(hours=48))
+    
+    max_range = timedelta(days=366) if granularity == HistoryGranularity.day else timedelta(days=31)
+    if start >= end or end - start > max_range:
+        raise HTTPException(status_code=400, detail="Invalid or too large time range")
+    
+    return await StatusHistory.query(callsign, granularity.value, start, end)
+
+@station_router.post("/status/history/rebuild", response_model=SuccessResponse)
+@route_limits(deadline_ms=120_000)
+async def rebuild_station_status_history(callsign: str = Depends(station_scope)):
+    """Recompute status history rollups from raw events (admin endpoint)"""
+    rollups = await StatusHistory.rebuild(callsign)
+    return SuccessResponse(message="Status history rollups rebuilt", data={"rollups": rollups})
+
+# Reception Report / Propagation Endpoints
+async def ingest_reports(callsign: str, frame) -> dict:
+    try:
+        return await ReceptionStore.ingest(callsign, frame)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@station_router.post("/reception/import", response_model=ReceptionImportResponse)
+@route_limits(deadline_ms=120_000)
+@single_flight.invalidates
+async def import_reception_reports(file: UploadFile = File(...), callsign: str = Depends(station_scope)):
+    """Import a CSV export of reception reports (timestamp, locator, frequency[, mode, snr]) (admin endpoint)"""
+    try:
+        frame = await asyncio.to_thread(read_reports, file.file)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    return await ingest_reports(callsign, frame)
+
+@station_router.post("/reception/reports", response_model=ReceptionImportResponse)
+@route_limits(deadline_ms=30_000)
+@single_flight.invalidates
+async def add_reception_reports(reports: List[ReceptionReport], callsign: str = Depends(station_scope)):
+    """Add reception reports pushed by a local feed (skimmer, WSJT-X relay) (admin endpoint)"""
+    if len(reports) > RECEPTION_MAX_REPORTS:
+        raise HTTPException(status_code=400, detail=f"Requests are limited to {RECEPTION_MAX_REPORTS} reports")
+    if not reports:
+        return {"imported": 0, "skipped": 0}
+    return await ingest_reports(callsign, pd.DataFrame([report.dict() for report in reports]))
+
+@station_router.get("/propagation/heatmap", response_model=PropagationHeatmap)
+@single_flight("propagation")
+async def get_propagation_heatmap(
+    rows: HeatmapAxis = Query(HeatmapAxis.band),
+    cols: HeatmapAxis = Query(HeatmapAxis.hour),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    mode: Optional[str] = None,
+    band: Optional[str] = None,
+    region: Optional[str] = None,
+    callsign: str = Depends(station_scope)
+):
+    """Get reception report counts and mean SNR by band/hour/region, summed from the daily rollups"""
+    if rows == cols:
+        raise HTTPException(status_code=400, detail="Heatmap rows and columns must differ")
+    mode = mode.upper() if mode else None
+    region = region.upper() if region else None
+    if (mode and mode not in MODES) or (band and band not in BANDS) or (region and region not in REGIONS):
+        raise HTTPException(status_code=400, detail="Unknown mode, band or region")
+    
+    # Rollups are per UTC day, so the range is widened to whole days
+    end = end.astimezone(timezone.utc).replace(tzinfo=None) if end and end.tzinfo else end or datetime.utcnow()
+    start = start.astimezone(timezone.utc).replace(tzinfo=None) if start and start.tzinfo else start
+    end = (end - timedelta(microseconds=1)).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = (start or end - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
+    if start >= end or end - start > timedelta(days=RECEPTION_MAX_DAYS):
+        raise HTTPException(status_code=400, detail="Invalid or too large time range")
+    
+    return await ReceptionStore.heatmap(callsign, rows.value, cols.value, start, end, mode, band, region)
+
+@station_router.post("/propagation/rebuild", response_model=SuccessResponse)
+@route_limits(deadline_ms=120_000)
+@single_flight.invalidates
+async def rebuild_propagation_rollups(callsign: str = Depends(station_scope)):
+    """Recompute propagation rollups from the stored reception reports (admin endpoint)"""
+    rollups = await ReceptionStore.rebuild(callsign)
+    return SuccessResponse(message="Propagation rollups rebuilt", data={"rollups": rollups})
+
+# Columnar Export Endpoints
+@station_router.post("/exports", response_model=ExportInfo, status_code=202)
+async def create_export(export_request: ExportRequest, callsign: str = Depends(station_scope)):
+    """Queue a Parquet/Arrow export of a dataset; poll the export until its status is done (admin endpoint)"""
+    export_data = export_request.dict()
+    for field in ("start", "end"):
+        # Stored timestamps are naive UTC
+        if export_data[field] and export_data[field].tzinfo:
+            export_data[field] = export_data[field].astimezone(timezone.utc).replace(tzinfo=None)
+    try:
+        return await ExportManager.create(callsign, export_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@station_router.get("/exports", response_model=List[ExportInfo])
+@db_policy("admin_read")
+async def get_exports(limit: int = Query(20, ge=1, le=100), callsign: str = Depends(station_scope)):
+    """List exports, newest first (admin endpoint)"""
+    return await ExportManager.recent(callsign, limit)
+
+@station_router.get("/exports/{export_id}", response_model=ExportInfo)
+@db_policy("admin_read")
+async def get_export(export_id: str, callsign: str = Depends(station_scope)):
+    """Get an export's status and files (admin endpoint)"""
+    export = await ExportManager.get(callsign, export_id)
+    if not export:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return export
+
+@station_router.get("/exports/{export_id}/files/{path:path}")
+@batch_excluded
+@db_policy("admin_read")
+async def download_export_file(export_id: str, path: str, callsign: str = Depends(station_scope)):
+    """Download one file of a finished export (admin endpoint)"""
+    export = await ExportManager.get(callsign, export_id)
+    # Only paths listed in the export are served, so the path can't escape its directory
+    if not export or export["status"] != "done" or path not in {file["path"] for file in export["files"]}:
+        raise HTTPException(status_code=404, detail="Export file not found")
+    media_type = "application/vnd.apache.parquet" if path.endswith(FORMATS["parquet"]) else "application/vnd.apache.arrow.file"
+    return FileResponse(
+        ExportManager.directory(callsign, export_id) / path,
+        media_type=media_type,
+        filename=f"{export['dataset']}-{path.replace('/', '-')}"
+    )
+
+@station_router.delete("/exports/{export_id}", response_model=SuccessResponse)
+async def delete_export(export_id: str, callsign: str = Depends(station_scope)):
+    """Delete an export and its files (admin endpoint)"""
+    if not await ExportManager.delete(callsign, export_id):
+        raise HTTPException(status_code=404, detail="Export not found")
+    return SuccessResponse(message="Export deleted")
+
+# Contest Logging Endpoints
+def require_dxcc(multipliers: List[str]):
+    """Country multipliers can only be counted with the DXCC prefix file loaded"""
+    if "country" in multipliers and not dxcc_resolver.loaded:
+        raise HTTPException(status_code=503, detail="DXCC prefix file is not loaded, country multipliers are unavailable")
+
+async def contest_index(callsign: str, contest_id: str) -> DupeIndex:
+    index = contest_log.indexes.get(contest_id)
+    if index is not None and index.contest["station"] == callsign:
+        return index
+    contest = await contests_collection.find_one({"_id": contest_id, "station": callsign})
+    if not contest:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    require_dxcc(contest.get("multipliers", []))
+    return await contest_log.index(contest)
+
+@station_router.get("/contests", response_model=List[Contest])
+@db_policy("admin_read")
+async def get_contests(limit: int = Query(20, ge=1, le=100), callsign: str = Depends(station_scope)):
+    """Get contests, most recent first"""
+    return await contests_collection.find({"station": callsign}).sort("start", -1).limit(limit).to_list(limit)
+
+@station_router.post("/contests", response_model=Contest)
+async def create_contest(contest_data: ContestCreate, callsign: str = Depends(station_scope)):
+    """Create a contest to log QSOs into (admin endpoint)"""
+    if contest_data.end <= contest_data.start:
+        raise HTTPException(status_code=400, detail="Contest must end after it starts")
+    require_dxcc(contest_data.multipliers)
+    contest = Contest(**contest_data.dict(), station=callsign)
+    contest_doc = contest.dict(by_alias=True)
+    await contests_collection.insert_one(contest_doc)
+    contest_log.indexes[contest.id] = DupeIndex(contest_doc)
+    return contest
+
+@station_router.get("/contests/{contest_id}", response_model=ContestStats)
+@db_policy("admin_read")
+async def get_contest(contest_id: str, callsign: str = Depends(station_scope)):
+    """Get a contest with its QSO, dupe and multiplier counts"""
+    index = await contest_index(callsign, contest_id)
+    stats = index.stats()
+    return dict(index.contest, qsos=stats["qsos"], dupes=stats["dupes"], multiplier_count=stats["multipliers"])
+
+@station_router.get("/contests/{contest_id}/dupe", response_model=DupeCheckResponse)
+@db_policy("admin_read")
+async def check_contest_dupe(
+    contest_id: str,
+    call: str,
+    mode: str,
+    band: Optional[str] = None,
+    frequency: Optional[float] = None,
+    exchange: Optional[str] = None,
+    callsign: str = Depends(station_scope)
+):
+    """Check whether a QSO would be a dupe or a new multiplier, from the in-memory index"""
+    index = await contest_index(callsign, contest_id)
+    try:
+        qso = normalize_qso({"call": call, "mode": mode, "band": band, "frequency": frequency, "exchange": exchange})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return contest_log.check(index, qso["call"], qso["band"], qso["mode"], qso["exchange"])
+
+@station_router.post("/contests/{contest_id}/qsos", response_model=QSOLogResponse)
+@route_limits(deadline_ms=10_000)
+async def log_contest_qsos(contest_id: str, qsos: List[QSOCreate], callsign: str = Depends(station_scope)):
+    """Log QSOs; each result says whether it was a dupe and which multipliers it added (admin endpoint)"""
+    if len(qsos) > BULK_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Requests are limited to {BULK_MAX_OPERATIONS} QSOs")
+    index = await contest_index(callsign, contest_id)
+    try:
+        normalized = [normalize_qso(qso.dict()) for qso in qsos]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    docs = await contest_log.log(index, normalized)
+    stats = index.stats()
+    return {
+        "results": docs,
+        "qsos": stats["qsos"],
+        "dupes": stats["dupes"],
+        "multiplier_count": stats["multipliers"]
+    }
+
+# DXCC Endpoints
+@api_router.post("/dxcc/resolve", response_model=List[DXCCResolution])
+async def resolve_dxcc(request: DXCCResolveRequest):
+    """Resolve callsigns to DXCC entities; unknown calls come back without an entity"""
+    if len(request.calls) > DXCC_RESOLVE_MAX:
+        raise HTTPException(status_code=400, detail=f"Requests are limited to {DXCC_RESOLVE_MAX} callsigns")
+    resolve = dxcc_resolver.resolve
+    return [dict(resolve(call) or {}, call=call) for call in request.calls]
+
+# Change Feed Endpoints
+@api_router.get("/changes", response_model=ChangeFeed)
+@db_policy("admin_read")
+async def get_changes(
+    since: Optional[str] = None,
+    station: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000)
+):
+    """Documents created, updated or deleted since a token, oldest first.
+
+    Reads the primary: a lagging secondary could hand out a token past changes it hasn't seen yet.
+    """
+    try:
+        since_seq = int(since) if since is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+    return await ChangeLog.changes(since_seq, normalize_callsign(station) if station else None, limit)
+
+# Logbook Export Endpoints
+def logbook_query(callsign: str, contest: Optional[str], band: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    if band and band not in {name for name, low, high in BAND_PLAN}:
+        raise HTTPException(status_code=400, detail=f"Unknown band {band}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return qso_query(callsign, contest, band, start, end)
+
+def logbook_response(body, filename: str, media_type: str) -> StreamingResponse:
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@station_router.get("/logbook/adif")
+@batch_excluded
+@db_policy("admin_read")
+async def export_logbook_adif(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    band: Optional[str] = None,
+    contest: Optional[str] = None,
+    callsign: str = Depends(station_scope)
+):
+    """Stream the logbook as ADIF for LoTW / Club Log uploads (admin endpoint)"""
+    query = logbook_query(callsign, contest, band, start, end)
+    names = {
+        doc["_id"]: doc["name"]
+        async for doc in contests_collection.find({"station": callsign}, {"name": 1})
+    }
+    # The cursor is created here so it keeps this route's read preference; it is iterated while the
+    # response streams, after the request deadline no longer applies
+    cursor = qsos_collection.find(query).sort("timestamp", 1)
+    body = encode(
+        cursor, adif_header(callsign, datetime.utcnow()), lambda qso: adif_record(qso, names.get(qso.get("contest")))
+    )
+    return logbook_response(body, f"{callsign}.adi", "text/plain; charset=utf-8")
+
+@station_router.get("/contests/{contest_id}/cabrillo")
+@batch_excluded
+@db_policy("admin_read")
+async def export_contest_cabrillo(contest_id: str, callsign: str = Depends(station_scope)):
+    """Stream a contest log as Cabrillo 3.0 for submission (admin endpoint)"""
+    contest = await contests_collection.find_one({"_id": contest_id, "station": callsign})
+    if not contest:
+        raise HTTPException(status_code=404, detail="Contest not found")
+    cursor = qsos_collection.find(qso_query(callsign, contest_id)).sort("timestamp", 1)
+    body = encode(cursor, cabrillo_header(contest, datetime.utcnow()), cabrillo_line, CABRILLO_FOOTER)
+    return logbook_response(body, f"{callsign}-{contest_id}.log", "text/plain; charset=utf-8")
+
+# Background Job Endpoints
+@api_router.get("/jobs/stats")
+@db_policy("admin_read")
+async def get_job_stats():
+    """Get job queue counts by status (admin endpoint)"""
+    return await job_queue.stats()
+
+@api_router.get("/jobs/dead")
+@db_policy("admin_read")
+async def get_dead_jobs(limit: int = Query(50, ge=1, le=100)):
+    """Get jobs that exhausted their retries (admin endpoint)"""
+    docs = await dead_jobs_collection.find().sort("failed_at", -1).limit(limit).to_list(limit)
+    return serialize_docs(docs)
+
+@api_router.post("/jobs/dead/{job_id}/retry", response_model=SuccessResponse)
+async def retry_dead_job(job_id: str):
+    """Requeue a dead-lettered job (admin endpoint)"""
+    if not await job_queue.retry_dead(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return SuccessResponse(message="Job requeued")
+
+# DX Cluster Spot Endpoints
+SPOT_KEEPALIVE_SECONDS = 15
+
+@api_router.get("/spots", response_model=List[DXSpot])
+async def get_spots(
+    band: Optional[str] = None,
+    mode: Optional[str] = None,
+    callsign: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get the most recent DX cluster spots, optionally filtered by band, mode and spotted callsign"""
+    query = SpotFilter(band, mode, callsign).query()
+    docs = await dx_spots_collection.find(query).sort("received_at", -1).limit(limit).to_list(limit)
+    return docs
+
+@api_router.get("/spots/stream")
+@batch_excluded
+@route_limits(limited=False)
+async def stream_spots(
+    request: Request,
+    band: Optional[str] = None,
+    mode: Optional[str] = None,
+    callsign: Optional[str] = None
+):
+    """Live DX cluster spots as server-sent events, fanned out in memory"""
+    subscription = spot_hub.subscribe(SpotFilter(band, mode, callsign))
+    
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    spot = await asyncio.wait_for(subscription.queue.get(), SPOT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: spot\nid: {spot['_id']}\ndata: {json.dumps(spot)}\n\n"
+        finally:
+            spot_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Profiling Endpoints
+def require_profiling_admin(token: Optional[str]):
+    if not is_profiling_admin(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@api_router.get("/profiles")
+async def get_profiles(token: Optional[str] = Header(None, alias=PROFILE_HEADER)):
+    """List stored request profiles, slowest first (admin endpoint)"""
+    require_profiling_admin(token)
+    return profile_store.list()
+
+@api_router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, token: Optional[str] = Header(None, alias=PROFILE_HEADER)):
+    """Get one request profile as collapsed stacks for flamegraph tools (admin endpoint)"""
+    require_profiling_admin(token)
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded(profile)
+
+# Batch Endpoint
+batch_dispatcher = BatchDispatcher(api_router, excluded_paths=["/api/batch"])
+
+@api_router.post("/batch", response_model=BatchResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """Run several GET requests against the API in one round trip"""
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"Batch is limited to {BATCH_MAX_REQUESTS} requests")
+    
+    responses = await batch_dispatcher.run(request, [sub.dict() for sub in batch.requests])
+    return {"responses": responses}
+
+# Metrics Endpoints
+@api_router.get("/metrics")
+@route_limits(limited=False)
+async def get_metrics():
+    """Get in-process request metrics, per station"""
+    return {
+        "single_flight": {scope: single_flight.metrics(scope) for scope in single_flight.scopes()},
+        "dx_cluster": dx_cluster.stats(),
+        "concurrency": concurrency_limiter.stats(),
+        "contest_log": contest_log.stats(),
+        "dxcc": dxcc_resolver.stats()
+    }
+
+@station_router.get("/metrics")
+@route_limits(limited=False)
+async def get_station_metrics(callsign: str = Depends(station_scope)):
+    """Get in-process request metrics for one station"""
+    return {
+        "single_flight": single_flight.metrics(callsign)
+    }
+
 # Health check endpoint
 @api_router.get("/")
 async def root():
     return {"message": "4K6AG Radio Station API is running", "version": "1.0.0"}
 
-# Include the router in the main app
+# Static snapshots of the public read endpoints
+snapshot_publisher.register("station", get_station_info, StationInfo)
+snapshot_publisher.register("equipment", get_equipment, List[Equipment])
+snapshot_publisher.register("qsl-cards", get_qsl_cards, List[QSLCard])
+snapshot_publisher.register("achievements", get_achievements, List[Achievement])
+snapshot_publisher.register("news", get_news, NewsResponse, limit=10, offset=0)
+snapshot_publisher.register("gallery", get_gallery, List[Gallery])
+
+# Include the routers in the main app; fixed /api paths are matched first, then the unprefixed
+# single-station paths for DEFAULT_CALLSIGN, then /api/{callsign}/...
+api_router.include_router(default_station_router(station_router))
+api_router.include_router(station_router)
 app.include_router(api_router)
 
 if __name__ == "__main__":
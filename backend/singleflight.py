@@ -0,0 +1,81 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+import asyncio
+import functools
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so they share one in-flight execution and its result"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        # Counted per (station, name) so each station's traffic is visible on its own
+        self.stats: Dict[tuple, Dict[str, int]] = {}
+
+    async def do(self, name: str, key: Hashable, func: Callable[[], Awaitable[Any]], scope: Optional[str] = None) -> Any:
+        stats = self.stats.setdefault((scope, name), {"calls": 0, "executions": 0, "coalesced": 0})
+        stats["calls"] += 1
+
+        key = (scope, name, key)
+        task = self._calls.get(key)
+        if task is not None:
+            stats["coalesced"] += 1
+        else:
+            stats["executions"] += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key) if self._calls.get(key) is done else None)
+
+        # Shield the shared task so one caller disconnecting doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    def __call__(self, name: str):
+        """Decorator for read handlers; calls with the same arguments share one execution.
+
+        The shared result is returned to every caller, so handlers must not mutate it afterwards.
+        Station-scoped handlers (taking `callsign`) are counted per station.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = (_freeze(args), _freeze(sorted(kwargs.items())))
+                return await self.do(name, key, lambda: func(*args, **kwargs), scope=kwargs.get("callsign"))
+            return wrapper
+        return decorator
+
+    def invalidates(self, func):
+        """Decorator for write handlers: forget the station's reads in flight once the handler succeeds"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            self.forget(kwargs["callsign"])
+            return result
+        return wrapper
+
+    def forget(self, scope: Optional[str]):
+        """Stop new callers from joining reads in flight for a station, e.g. once a write to it finished.
+
+        Callers already waiting keep their result; the next call starts a fresh execution.
+        """
+        for key in [key for key in self._calls if key[0] == scope]:
+            del self._calls[key]
+
+    def metrics(self, scope: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        return {
+            name: dict(stats, in_flight=sum(1 for key in self._calls if key[:2] == (scope, name)))
+            for (stats_scope, name), stats in self.stats.items() if stats_scope == scope
+        }
+
+    def scopes(self) -> List[str]:
+        return sorted({scope for scope, _ in self.stats if scope is not None})
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+single_flight = SingleFlight()
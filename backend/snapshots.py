@@ -0,0 +1,159 @@
+from pydantic import TypeAdapter
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from pathlib import Path
+from datetime import datetime
+import asyncio
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+
+from singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+class SnapshotPublisher:
+    """Renders public read endpoints to content-hashed static JSON files plus a manifest.
+
+    Each station gets its own directory (`<output_dir>/<callsign>/`) and manifest.
+    """
+
+    def __init__(self, output_dir: Optional[str]):
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.renderers: Dict[str, tuple] = {}
+        self.manifests: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._dirty: set = set()
+        self._manifest_locks: Dict[str, asyncio.Lock] = {}
+        # Renders are numbered as they start; a slower, older render never replaces a newer live one
+        self._render_seq: Dict[tuple, int] = {}
+        self._live_seq: Dict[tuple, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_dir is not None
+
+    def register(self, name: str, handler: Callable[..., Awaitable[Any]], response_model: Any, **kwargs):
+        """Register a station-scoped read handler whose response is published as snapshot `name`"""
+        # Unwrap single_flight, so a render after a write never joins a read that started before it
+        self.renderers[name] = (inspect.unwrap(handler), TypeAdapter(response_model), kwargs)
+
+    def publishes(self, *names: str):
+        """Decorator for write handlers: re-render the named snapshots once the handler succeeds"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                # Readers after this write must not get the result of a read that started before it
+                single_flight.forget(kwargs["callsign"])
+                for name in names:
+                    self.schedule(name, kwargs["callsign"])
+                return result
+            return wrapper
+        return decorator
+
+    def schedule(self, name: str, callsign: str):
+        """Re-render a station's snapshot in the background, coalescing bursts of writes"""
+        if not self.enabled or name not in self.renderers:
+            return
+        key = (callsign, name)
+        task = self._tasks.get(key)
+        if task and not task.done():
+            self._dirty.add(key)
+            return
+        # A fresh context, so the render isn't bound by the triggering request's deadline or database policy
+        self._tasks[key] = asyncio.create_task(self._run(name, callsign), context=contextvars.Context())
+
+    async def _run(self, name: str, callsign: str):
+        key = (callsign, name)
+        while True:
+            self._dirty.discard(key)
+            try:
+                await self.publish(name, callsign)
+            except Exception:
+                logger.exception("Failed to publish snapshot %s for %s", name, callsign)
+            if key not in self._dirty:
+                break
+
+    async def render(self, name: str, callsign: str) -> bytes:
+        handler, adapter, kwargs = self.renderers[name]
+        result = await handler(callsign=callsign, **kwargs)
+        # Serialize exactly as FastAPI would for the route's response_model
+        payload = adapter.dump_python(adapter.validate_python(result), mode="json", by_alias=True)
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    async def publish(self, name: str, callsign: str) -> Dict[str, Any]:
+        """Render one station's snapshot, write it under its content hash and update the manifest"""
+        key = (callsign, name)
+        seq = self._render_seq[key] = self._render_seq.get(key, 0) + 1
+        body = await self.render(name, callsign)
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        filename = f"{name}.{digest}.json"
+        output_dir = self.output_dir / callsign
+        manifest = self.manifests.setdefault(callsign, {})
+
+        async with self._manifest_locks.setdefault(callsign, asyncio.Lock()):
+            current = manifest.get(name)
+            if self._live_seq.get(key, 0) > seq:
+                return current
+            self._live_seq[key] = seq
+            if current and current["hash"] == digest:
+                return current
+
+            output_dir.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(self._write_atomic, output_dir / filename, body)
+
+            entry = {
+                "file": filename,
+                "hash": digest,
+                "size": len(body),
+                "generated_at": datetime.utcnow().isoformat(),
+                "previous": current["file"] if current else None,
+            }
+            manifest[name] = entry
+            await asyncio.to_thread(
+                self._write_atomic,
+                output_dir / "manifest.json",
+                json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+            )
+
+            # Keep the previous file so clients holding the old manifest don't 404
+            if current and current.get("previous"):
+                stale = output_dir / current["previous"]
+                if stale.name != filename:
+                    stale.unlink(missing_ok=True)
+
+        logger.info("Published snapshot %s/%s -> %s", callsign, name, filename)
+        return entry
+
+    async def publish_all(self, callsigns: Iterable[str]):
+        """Render every registered snapshot for each station (used on startup)"""
+        if not self.enabled:
+            return
+        for callsign in callsigns:
+            await self._load_manifest(callsign)
+            for name in self.renderers:
+                try:
+                    await self.publish(name, callsign)
+                except Exception:
+                    logger.exception("Failed to publish snapshot %s for %s", name, callsign)
+
+    async def _load_manifest(self, callsign: str):
+        path = self.output_dir / callsign / "manifest.json"
+        self.manifests[callsign] = {}
+        if path.exists():
+            try:
+                self.manifests[callsign] = json.loads(await asyncio.to_thread(path.read_text, encoding="utf-8"))
+            except ValueError:
+                logger.warning("Ignoring unreadable snapshot manifest %s", path)
+
+    @staticmethod
+    def _write_atomic(path: Path, body: bytes):
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+snapshot_publisher = SnapshotPublisher(os.environ.get('SNAPSHOT_DIR'))
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException, Path
+from pymongo import ReadPreference
+from typing import Callable, Dict, List
+import functools
+import inspect
+import os
+import re
+import time
+
+from database import station_collection, DEFAULT_CALLSIGN
+
+STATION_CACHE_SECONDS = float(os.environ.get('STATION_CACHE_SECONDS', 60))
+
+# Callsigns always contain a digit, which keeps them apart from fixed /api paths like /api/jobs
+CALLSIGN_RE = re.compile(r"^(?=.*[0-9])[A-Z0-9]{3,12}$")
+
+class StationRegistry:
+    """Caches which station callsigns exist so scoped routes don't look the station up per request"""
+
+    def __init__(self):
+        self._known: Dict[str, float] = {}
+
+    async def exists(self, callsign: str) -> bool:
+        expires = self._known.get(callsign)
+        if expires and expires > time.monotonic():
+            return True
+        # Always on the primary, so a station created a moment ago is not reported missing by a lagging secondary
+        primary = station_collection.with_options(read_preference=ReadPreference.PRIMARY)
+        if await primary.find_one({"callsign": callsign}, {"_id": 1}) is None:
+            self._known.pop(callsign, None)
+            return False
+        self.add(callsign)
+        return True
+
+    def add(self, callsign: str):
+        self._known[callsign] = time.monotonic() + STATION_CACHE_SECONDS
+
+    async def callsigns(self) -> List[str]:
+        callsigns = sorted(await station_collection.distinct("callsign"))
+        for callsign in callsigns:
+            self.add(callsign)
+        return callsigns
+
+station_registry = StationRegistry()
+
+def normalize_callsign(callsign: str) -> str:
+    callsign = callsign.strip().upper()
+    if not CALLSIGN_RE.match(callsign):
+        raise HTTPException(status_code=404, detail="Station not found")
+    return callsign
+
+async def station_scope(callsign: str = Path(..., description="Station callsign")) -> str:
+    """Dependency for /api/{callsign}/... routes: the normalized callsign of an existing station"""
+    callsign = normalize_callsign(callsign)
+    if not await station_registry.exists(callsign):
+        raise HTTPException(status_code=404, detail="Station not found")
+    return callsign
+
+def _bind_callsign(endpoint: Callable, callsign: str) -> Callable:
+    """The endpoint without its `callsign` parameter, always called for `callsign`"""
+    @functools.wraps(endpoint)
+    async def bound(*args, **kwargs):
+        return await endpoint(*args, callsign=callsign, **kwargs)
+
+    signature = inspect.signature(endpoint)
+    bound.__signature__ = signature.replace(
+        parameters=[parameter for parameter in signature.parameters.values() if parameter.name != "callsign"]
+    )
+    bound.bound_callsign = callsign
+    return bound
+
+def default_station_router(station_router: APIRouter) -> APIRouter:
+    """The station routes without the /{callsign} prefix, serving DEFAULT_CALLSIGN.
+
+    Keeps the single-station paths (/api/news, /api/equipment, ...) working for existing clients.
+    """
+    router = APIRouter(route_class=station_router.route_class)
+    for route in station_router.routes:
+        router.add_api_route(
+            route.path[len(station_router.prefix):],
+            _bind_callsign(route.endpoint, DEFAULT_CALLSIGN),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            methods=route.methods,
+            name=route.name,
+            response_class=route.response_class,
+            include_in_schema=False,
+        )
+    return router
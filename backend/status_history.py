@@ -0,0 +1,216 @@
+from pymongo import UpdateOne, InsertOne
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+from datetime import datetime, timedelta
+
+from bands import band_for_frequency
+from database import db, station_collection, status_history_collection, status_rollups_collection
+
+GRANULARITIES = ("hour", "day")
+
+def truncate(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    if granularity == "day":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def bucket_step(granularity: str) -> timedelta:
+    return timedelta(days=1) if granularity == "day" else timedelta(hours=1)
+
+def split_interval(start: datetime, end: datetime, granularity: str) -> Iterator[Tuple[datetime, float]]:
+    """Split [start, end) into (bucket, seconds) pieces along bucket boundaries"""
+    step = bucket_step(granularity)
+    bucket = truncate(start, granularity)
+    while start < end:
+        boundary = min(bucket + step, end)
+        yield bucket, (boundary - start).total_seconds()
+        start = boundary
+        bucket += step
+
+def _mode_key(mode: Optional[str]) -> Optional[str]:
+    # Rollup maps use modes as field names, so keep them dot/dollar free
+    if not mode:
+        return None
+    return mode.strip().upper().replace(".", "_").replace("$", "_") or None
+
+def _interval_increments(event: dict, end: datetime) -> Dict[Tuple[str, datetime], Dict[str, float]]:
+    """On-air seconds contributed by an event lasting until `end`, per rollup bucket"""
+    increments: Dict[Tuple[str, datetime], Dict[str, float]] = {}
+    if event.get("status") != "online" or event["timestamp"] >= end:
+        return increments
+
+    band = event.get("band")
+    mode = _mode_key(event.get("mode"))
+    for granularity in GRANULARITIES:
+        for bucket, seconds in split_interval(event["timestamp"], end, granularity):
+            fields = increments.setdefault((granularity, bucket), {})
+            fields["on_air_seconds"] = fields.get("on_air_seconds", 0) + seconds
+            if band:
+                fields[f"bands.{band}"] = fields.get(f"bands.{band}", 0) + seconds
+            if mode:
+                fields[f"modes.{mode}"] = fields.get(f"modes.{mode}", 0) + seconds
+    return increments
+
+def _merge_increments(target: dict, increments: dict):
+    for key, fields in increments.items():
+        merged = target.setdefault(key, {})
+        for field, value in fields.items():
+            merged[field] = merged.get(field, 0) + value
+
+class StatusHistory:
+    _window_functions: Optional[bool] = None
+
+    @staticmethod
+    async def _supports_window_functions() -> bool:
+        # $setWindowFields needs MongoDB 5.0+
+        if StatusHistory._window_functions is None:
+            build_info = await db.command("buildInfo")
+            StatusHistory._window_functions = build_info.get("versionArray", [0])[:2] >= [5, 0]
+        return StatusHistory._window_functions
+
+    @staticmethod
+    async def _intervals(callsign: str) -> AsyncIterator[dict]:
+        """A station's events in time order, each with the timestamp of the next one (None for the last)"""
+        if await StatusHistory._supports_window_functions():
+            # Pair every event with the next one on the server
+            async for event in status_history_collection.aggregate([
+                {"$match": {"callsign": callsign}},
+                {"$setWindowFields": {
+                    "sortBy": {"timestamp": 1},
+                    "output": {"next_timestamp": {"$shift": {"output": "$timestamp", "by": 1}}}
+                }},
+                {"$project": {"_id": 0, "timestamp": 1, "next_timestamp": 1, "status": 1, "band": 1, "mode": 1}},
+            ], allowDiskUse=True):
+                yield event
+            return
+
+        # Older servers group the sorted events per day; only pairs across a day boundary are joined here
+        days = status_history_collection.aggregate([
+            {"$match": {"callsign": callsign}},
+            {"$sort": {"timestamp": 1}},
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                "events": {"$push": {"timestamp": "$timestamp", "status": "$status", "band": "$band", "mode": "$mode"}},
+            }},
+            {"$sort": {"_id": 1}},
+        ], allowDiskUse=True)
+        previous = None
+        async for day in days:
+            for event in day["events"]:
+                if previous is not None:
+                    yield dict(previous, next_timestamp=event["timestamp"])
+                previous = event
+        if previous is not None:
+            yield dict(previous, next_timestamp=None)
+
+    @staticmethod
+    async def record(station_doc: dict):
+        """Append a status change event and roll the previous interval up into hour/day buckets.
+
+        The station document holds its latest event, swapped atomically for the new one, so
+        concurrent updates each roll up a different interval instead of the same one twice.
+        """
+        callsign = station_doc.get("callsign")
+        timestamp = station_doc.get("updated_at") or datetime.utcnow()
+
+        event = {
+            "callsign": callsign,
+            "timestamp": timestamp,
+            "status": station_doc.get("status"),
+            "frequency": station_doc.get("frequency"),
+            "band": band_for_frequency(station_doc.get("frequency")),
+            "mode": station_doc.get("mode"),
+        }
+        before = await station_collection.find_one_and_update(
+            {"callsign": callsign}, {"$set": {"last_status_event": event}}, {"last_status_event": 1}
+        )
+        previous = (before or {}).get("last_status_event")
+        if previous is None:
+            # Stations updated before the latest event was kept on them
+            previous = await status_history_collection.find_one(
+                {"callsign": callsign, "timestamp": {"$lte": timestamp}}, sort=[("timestamp", -1)]
+            )
+        await status_history_collection.insert_one(event)
+
+        increments = _interval_increments(previous, timestamp) if previous else {}
+        for granularity in GRANULARITIES:
+            fields = increments.setdefault((granularity, truncate(timestamp, granularity)), {})
+            fields["changes"] = fields.get("changes", 0) + 1
+
+        await status_rollups_collection.bulk_write([
+            UpdateOne(
+                {"callsign": callsign, "granularity": granularity, "bucket": bucket},
+                {"$inc": fields},
+                upsert=True
+            )
+            for (granularity, bucket), fields in increments.items()
+        ], ordered=False)
+
+    @staticmethod
+    async def query(callsign: str, granularity: str, start: datetime, end: datetime) -> dict:
+        """Return dense buckets for [start, end) from the precomputed rollups"""
+        start = truncate(start, granularity)
+        buckets = {}
+        bucket = start
+        while bucket < end:
+            buckets[bucket] = {"bucket": bucket, "on_air_seconds": 0, "changes": 0, "bands": {}, "modes": {}}
+            bucket += bucket_step(granularity)
+
+        cursor = status_rollups_collection.find(
+            {"callsign": callsign, "granularity": granularity, "bucket": {"$gte": start, "$lt": end}},
+            {"_id": 0, "callsign": 0, "granularity": 0}
+        ).sort("bucket", 1)
+        async for doc in cursor:
+            buckets[doc["bucket"]].update(doc)
+
+        # The current interval is still open, so it is not in the rollups yet
+        last = await status_history_collection.find_one({"callsign": callsign}, sort=[("timestamp", -1)])
+        if last:
+            open_end = min(datetime.utcnow(), end)
+            last = dict(last, timestamp=max(last["timestamp"], start))
+            for (bucket_granularity, bucket), fields in _interval_increments(last, open_end).items():
+                if bucket_granularity != granularity or bucket not in buckets:
+                    continue
+                target = buckets[bucket]
+                for field, value in fields.items():
+                    if "." in field:
+                        group, key = field.split(".", 1)
+                        target[group][key] = target[group].get(key, 0) + value
+                    else:
+                        target[field] += value
+
+        on_air_seconds = sum(b["on_air_seconds"] for b in buckets.values())
+        return {
+            "callsign": callsign,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "on_air_hours": round(on_air_seconds / 3600, 2),
+            "buckets": list(buckets.values()),
+        }
+
+    @staticmethod
+    async def rebuild(callsign: str) -> int:
+        """Recompute all rollups for a station from the raw status events"""
+        rollups: Dict[Tuple[str, datetime], Dict[str, float]] = {}
+        async for event in StatusHistory._intervals(callsign):
+            for granularity in GRANULARITIES:
+                _merge_increments(rollups, {(granularity, truncate(event["timestamp"], granularity)): {"changes": 1}})
+            if event.get("next_timestamp"):
+                _merge_increments(rollups, _interval_increments(event, event["next_timestamp"]))
+
+        await status_rollups_collection.delete_many({"callsign": callsign})
+        if not rollups:
+            return 0
+
+        documents = []
+        for (granularity, bucket), fields in rollups.items():
+            doc = {"callsign": callsign, "granularity": granularity, "bucket": bucket, "bands": {}, "modes": {}}
+            for field, value in fields.items():
+                if "." in field:
+                    group, key = field.split(".", 1)
+                    doc[group][key] = value
+                else:
+                    doc[field] = value
+            documents.append(InsertOne(doc))
+        await status_rollups_collection.bulk_write(documents, ordered=False)
+        return len(documents)
@@ -0,0 +1,309 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+from typing import Any, Callable, Dict, List, Optional
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Spans are exported to a JSON-lines file and/or an OTLP/HTTP JSON collector (e.g. http://localhost:4318/v1/traces)
+TRACE_EXPORT_FILE = os.environ.get('TRACE_EXPORT_FILE')
+TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT')
+# Off unless an exporter is configured; spans that go nowhere only cost request time
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', str(bool(TRACE_EXPORT_FILE or TRACE_OTLP_ENDPOINT))).lower() == 'true'
+TRACE_SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', '4k6ag-api')
+TRACE_EXPORT_BATCH = int(os.environ.get('TRACE_EXPORT_BATCH', 512))
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], start_ns: Optional[int] = None, **attributes):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes
+
+    def end(self, end_ns: Optional[int] = None):
+        self.end_ns = end_ns or time.time_ns()
+        self.trace.add(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+class Trace:
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        # Spans from background work that outlives the request are dropped
+        with self._lock:
+            if not self.finished:
+                self.spans.append(span)
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+        exporter.export(self.spans)
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span else None
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Record a child span of the current span; a no-op outside a traced request"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(parent.trace, name, parent.span_id, **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+class TracedRoute(APIRoute):
+    """APIRoute that splits each request into validation, handler and serialization spans"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router re-creates routes from already traced endpoints
+        if getattr(endpoint, "_traced", False):
+            super().__init__(path, endpoint, **kwargs)
+            return
+
+        @functools.wraps(endpoint)
+        async def traced_endpoint(*args, **kw):
+            parent = _current_span.get()
+            if parent is None:
+                return await endpoint(*args, **kw)
+            span = Span(parent.trace, f"handler {endpoint.__name__}", parent.span_id)
+            # Everything between the route starting and the handler starting is request validation
+            Span(parent.trace, "request.validate", parent.span_id, start_ns=parent.start_ns).end(span.start_ns)
+            token = _current_span.set(span)
+            try:
+                return await endpoint(*args, **kw)
+            finally:
+                _current_span.reset(token)
+                span.end()
+                parent.attributes["handler_end_ns"] = span.end_ns
+
+        traced_endpoint._traced = True
+        super().__init__(path, traced_endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route_path = self.path
+
+        async def traced_handler(request):
+            parent = _current_span.get()
+            if parent is None:
+                return await handler(request)
+            span = Span(parent.trace, f"route {route_path}", parent.span_id)
+            token = _current_span.set(span)
+            try:
+                return await handler(request)
+            finally:
+                _current_span.reset(token)
+                span.end()
+                handler_end_ns = span.attributes.pop("handler_end_ns", None)
+                if handler_end_ns:
+                    # ...and everything after it is response model validation and JSON encoding
+                    Span(span.trace, "response.serialize", span.span_id, start_ns=handler_end_ns).end(span.end_ns)
+
+        return traced_handler
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """Records a span for every Mongo command; Motor copies the request context into its executor"""
+
+    def __init__(self):
+        self._pending: Dict[tuple, Dict[str, Any]] = {}
+
+    def started(self, event):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        collection = event.command.get(event.command_name)
+        self._pending[(event.request_id, event.connection_id)] = {
+            "parent": parent,
+            "collection": collection if isinstance(collection, str) else None,
+        }
+
+    def _finish(self, event, **attributes):
+        pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None:
+            return
+        parent = pending["parent"]
+        end_ns = time.time_ns()
+        span = Span(
+            parent.trace, f"mongo {event.command_name}", parent.span_id,
+            start_ns=end_ns - event.duration_micros * 1000,
+            command=event.command_name, collection=pending["collection"], database=event.database_name,
+            **attributes
+        )
+        span.end(end_ns)
+
+    def succeeded(self, event):
+        reply = event.reply or {}
+        cursor = reply.get("cursor") or {}
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if batch is not None:
+            returned = len(batch)
+        elif "value" in reply:
+            returned = int(reply["value"] is not None)
+        else:
+            returned = reply.get("n")
+        self._finish(event, docs_returned=returned)
+
+    def failed(self, event):
+        self._finish(event, error=str(event.failure.get("errmsg", event.failure)))
+
+class SpanExporter:
+    """Exports finished spans from a background thread so requests never wait on I/O"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=100_000)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(TRACE_EXPORT_FILE or TRACE_OTLP_ENDPOINT)
+
+    def export(self, spans: List[Span]):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="span-exporter")
+            self._thread.start()
+        for span in spans:
+            try:
+                self._queue.put_nowait(span.to_dict())
+            except queue.Full:
+                break
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < TRACE_EXPORT_BATCH:
+                try:
+                    batch.append(self._queue.get(timeout=0.5))
+                except queue.Empty:
+                    break
+            try:
+                if TRACE_EXPORT_FILE:
+                    with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(span, default=str) + "\n" for span in batch)
+                if TRACE_OTLP_ENDPOINT:
+                    self._post_otlp(batch)
+            except Exception:
+                logger.exception("Failed to export %d spans", len(batch))
+
+    @staticmethod
+    def _post_otlp(batch: List[Dict[str, Any]]):
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", TRACE_SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "4k6ag.tracing"},
+                "spans": [
+                    {
+                        "traceId": span["trace_id"],
+                        "spanId": span["span_id"],
+                        "parentSpanId": span["parent_id"] or "",
+                        "name": span["name"],
+                        "kind": 2 if span["parent_id"] is None else 1,
+                        "startTimeUnixNano": str(span["start_ns"]),
+                        "endTimeUnixNano": str(span["end_ns"]),
+                        "attributes": [attribute(k, v) for k, v in span["attributes"].items() if v is not None],
+                    }
+                    for span in batch
+                ],
+            }],
+        }]}
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+class TracingMiddleware:
+    """ASGI middleware starting a trace per request and returning its id in the response headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = None, None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                match = _TRACEPARENT_RE.match(value.decode("latin-1").strip())
+                if match:
+                    trace_id, parent_id = match.groups()
+                break
+
+        trace = Trace(trace_id)
+        span = Span(trace, f"{scope.get('method')} {scope.get('path')}", parent_id,
+                    method=scope.get("method"), path=scope.get("path"))
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                span.attributes["status_code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                headers.append((b"traceparent", f"00-{trace.trace_id}-{span.span_id}-01".encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        token = _current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_span.reset(token)
+            span.end()
+            trace.finish()
+
+command_tracer = MongoCommandTracer()
+exporter = SpanExporter()
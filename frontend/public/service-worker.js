@@ -0,0 +1,144 @@
+/* eslint-disable no-restricted-globals */
+// Offline cache for the 4K6AG site.
+// - App shell (index.html + entrypoint chunks from asset-manifest.json) is precached on install;
+//   navigations go to the network first, so a deploy's index.html never points at removed chunks,
+//   and fall back to the cached shell offline
+// - Hashed build assets are served cache-first
+// - Public /api/{callsign}/... read endpoints go to the network first and are cached per station
+//   only as an offline fallback, so the client's own revalidation (If-None-Match) sees fresh data
+// - Images (gallery, QSL cards) are served cache-first with bounded, oldest-first eviction; only
+//   successful non-opaque responses are cached
+
+const VERSION = 'v3';
+const SHELL_CACHE = `shell-${VERSION}`;
+const STATIC_CACHE = `static-${VERSION}`;
+const API_CACHE = `api-${VERSION}`;
+const IMAGE_CACHE = `images-${VERSION}`;
+
+const MAX_IMAGE_ENTRIES = 80;
+const MAX_IMAGE_BYTES = 30 * 1024 * 1024;
+// Per station, so one busy station can't evict the others' entries
+const MAX_API_ENTRIES = 50;
+
+// Public read endpoints only; admin endpoints always go to the network
+const CACHEABLE_API = /\/api\/([A-Z0-9]+)\/(station|status|equipment|qsl-cards|achievements|news|gallery|guestbook)\/?$/;
+
+self.addEventListener('install', (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(SHELL_CACHE);
+    const manifest = await fetch('asset-manifest.json', { cache: 'no-cache' }).then((r) => r.json());
+    const shell = ['./', ...(manifest.entrypoints || [])];
+    await cache.addAll(shell);
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    const current = [SHELL_CACHE, STATIC_CACHE, API_CACHE, IMAGE_CACHE];
+    const names = await caches.keys();
+    await Promise.all(names.filter((name) => !current.includes(name)).map((name) => caches.delete(name)));
+    await self.clients.claim();
+  })());
+});
+
+const trimCache = async (cacheName, maxEntries, maxBytes = Infinity, belongs = () => true) => {
+  const cache = await caches.open(cacheName);
+  const keys = (await cache.keys()).filter(belongs);
+  let excess = keys.length - maxEntries;
+  let bytes = 0;
+  const sizes = [];
+
+  if (maxBytes !== Infinity) {
+    for (const key of keys) {
+      const response = await cache.match(key);
+      let size = 0;
+      if (response) {
+        size = Number(response.headers.get('content-length')) || (await response.blob()).size;
+      }
+      sizes.push(size);
+      bytes += size;
+    }
+  }
+
+  // Keys are returned in insertion order, so the oldest entries go first
+  for (let i = 0; i < keys.length && (excess > 0 || bytes > maxBytes); i += 1) {
+    await cache.delete(keys[i]);
+    excess -= 1;
+    bytes -= sizes[i] || 0;
+  }
+};
+
+// The cached copy is only used when the network is unreachable
+const networkFirst = async (event, cacheName, maxEntries, belongs) => {
+  const cache = await caches.open(cacheName);
+  try {
+    const response = await fetch(event.request);
+    if (response.ok) {
+      await cache.put(event.request, response.clone());
+      event.waitUntil(trimCache(cacheName, maxEntries, Infinity, belongs));
+    }
+    return response;
+  } catch (error) {
+    const cached = await cache.match(event.request);
+    if (cached) {
+      return cached;
+    }
+    throw error;
+  }
+};
+
+const cacheFirst = async (event, cacheName, maxEntries, maxBytes) => {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(event.request);
+  if (cached) {
+    return cached;
+  }
+
+  const response = await fetch(event.request);
+  // Opaque (cross-origin no-cors) responses may be error pages and don't expose their size
+  if (response.ok) {
+    await cache.put(event.request, response.clone());
+    event.waitUntil(trimCache(cacheName, maxEntries, maxBytes));
+  }
+  return response;
+};
+
+// Navigations load the current index.html; the cached shell is the offline fallback
+const appShell = async (event) => {
+  const cache = await caches.open(SHELL_CACHE);
+  try {
+    const response = await fetch(event.request);
+    if (response.ok) {
+      await cache.put('./', response.clone());
+    }
+    return response;
+  } catch (error) {
+    const cached = await cache.match('./');
+    if (cached) {
+      return cached;
+    }
+    throw error;
+  }
+};
+
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  if (request.method !== 'GET') {
+    return;
+  }
+  const url = new URL(request.url);
+  const api = url.pathname.match(CACHEABLE_API);
+
+  if (request.mode === 'navigate') {
+    event.respondWith(appShell(event));
+  } else if (api) {
+    const station = `/api/${api[1]}/`;
+    const sameStation = (key) => new URL(key.url).pathname.includes(station);
+    event.respondWith(networkFirst(event, API_CACHE, MAX_API_ENTRIES, sameStation));
+  } else if (request.destination === 'image') {
+    event.respondWith(cacheFirst(event, IMAGE_CACHE, MAX_IMAGE_ENTRIES, MAX_IMAGE_BYTES));
+  } else if (url.origin === self.location.origin && url.pathname.includes('/static/')) {
+    event.respondWith(cacheFirst(event, STATIC_CACHE, 200, Infinity));
+  }
+});
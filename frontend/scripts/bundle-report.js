@@ -0,0 +1,45 @@
+// Bundle size report for the production build.
+// Prints the initial (entrypoint) JS payload and every lazily loaded chunk,
+// writes build/bundle-report.json and fails when BUNDLE_BUDGET_KB is exceeded.
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const buildDir = path.resolve(__dirname, '..', 'build');
+const manifest = JSON.parse(fs.readFileSync(path.join(buildDir, 'asset-manifest.json'), 'utf8'));
+
+const sizeOf = (file) => {
+  const content = fs.readFileSync(path.join(buildDir, file));
+  return { bytes: content.length, gzip: zlib.gzipSync(content, { level: 9 }).length };
+};
+
+const entrypoints = new Set(manifest.entrypoints || []);
+const assets = Object.values(manifest.files)
+  .map((url) => url.replace(/^\//, '').replace(/^.*?static\//, 'static/'))
+  .filter((file) => file.endsWith('.js') || file.endsWith('.css'))
+  .map((file) => ({ file, initial: entrypoints.has(file), ...sizeOf(file) }))
+  .sort((a, b) => Number(b.initial) - Number(a.initial) || b.gzip - a.gzip);
+
+const total = (filter) => assets.filter(filter).reduce((sum, asset) => sum + asset.gzip, 0);
+const kb = (bytes) => `${(bytes / 1024).toFixed(1)} kB`;
+
+const report = {
+  generatedAt: new Date().toISOString(),
+  initialJsGzip: total((asset) => asset.initial && asset.file.endsWith('.js')),
+  initialCssGzip: total((asset) => asset.initial && asset.file.endsWith('.css')),
+  lazyJsGzip: total((asset) => !asset.initial && asset.file.endsWith('.js')),
+  assets,
+};
+fs.writeFileSync(path.join(buildDir, 'bundle-report.json'), JSON.stringify(report, null, 2));
+
+console.log('\nBundle size report (gzip):');
+for (const asset of assets) {
+  console.log(`  ${asset.initial ? 'initial' : 'lazy   '}  ${kb(asset.gzip).padStart(10)}  ${asset.file}`);
+}
+console.log(`\n  Initial JS: ${kb(report.initialJsGzip)}  Initial CSS: ${kb(report.initialCssGzip)}  Lazy JS: ${kb(report.lazyJsGzip)}\n`);
+
+const budget = Number(process.env.BUNDLE_BUDGET_KB);
+if (budget && report.initialJsGzip > budget * 1024) {
+  console.error(`Initial JS ${kb(report.initialJsGzip)} exceeds budget of ${budget} kB`);
+  process.exit(1);
+}
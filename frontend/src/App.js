@@ -1,20 +1,28 @@
-import React from "react";
+import React, { useEffect } from "react";
 import "./App.css";
 import { BrowserRouter } from "react-router-dom";
 import { LanguageProvider } from "./components/LanguageContext";
 import Header from "./components/Header";
 import Hero from "./components/Hero";
 import About from "./components/About";
-import Equipment from "./components/Equipment";
-import QSL from "./components/QSL";
-import Gallery from "./components/Gallery";
-import Achievements from "./components/Achievements";
-import News from "./components/News";
-import Contacts from "./components/Contacts";
 import Footer from "./components/Footer";
+import LazySection, { lazyWithPreload, preloadWhenIdle } from "./components/LazySection";
 import { Toaster } from "./components/ui/sonner";
 
+// Sections below the fold are split into their own chunks
+const Equipment = lazyWithPreload(() => import("./components/Equipment"));
+const QSL = lazyWithPreload(() => import("./components/QSL"));
+const Gallery = lazyWithPreload(() => import("./components/Gallery"));
+const Achievements = lazyWithPreload(() => import("./components/Achievements"));
+const News = lazyWithPreload(() => import("./components/News"));
+const Contacts = lazyWithPreload(() => import("./components/Contacts"));
+
 function App() {
+  useEffect(
+    () => preloadWhenIdle([Equipment, QSL, Gallery, Achievements, News, Contacts]),
+    []
+  );
+
   return (
     <div className="App">
       <BrowserRouter>
@@ -23,12 +31,12 @@ function App() {
           <main>
             <Hero />
             <About />
-            <Equipment />
-            <QSL />
-            <Gallery />
-            <Achievements />
-            <News />
-            <Contacts />
+            <LazySection id="equipment" component={Equipment} />
+            <LazySection id="qsl" component={QSL} />
+            <LazySection id="gallery" component={Gallery} />
+            <LazySection id="achievements" component={Achievements} />
+            <LazySection id="news" component={News} />
+            <LazySection id="contacts" component={Contacts} />
           </main>
           <Footer />
           <Toaster />
@@ -38,4 +46,4 @@ function App() {
   );
 }
 
-export default App;
\ No newline at end of file
+export default App;
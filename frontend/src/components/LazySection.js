@@ -0,0 +1,77 @@
+import React, { Suspense, lazy, useEffect, useRef, useState } from 'react';
+import { LoadingSection } from './Loading';
+
+// React.lazy component that can also be fetched ahead of time
+export const lazyWithPreload = (factory) => {
+  let promise = null;
+  const load = () => {
+    if (!promise) {
+      promise = factory();
+    }
+    return promise;
+  };
+  const Component = lazy(load);
+  Component.preload = load;
+  return Component;
+};
+
+// Prefetch section chunks once the browser is idle after first render
+export const preloadWhenIdle = (components) => {
+  const preload = () => components.forEach((component) => component.preload());
+  if (typeof window === 'undefined') {
+    return () => {};
+  }
+  if ('requestIdleCallback' in window) {
+    const handle = window.requestIdleCallback(preload, { timeout: 5000 });
+    return () => window.cancelIdleCallback(handle);
+  }
+  const handle = window.setTimeout(preload, 2000);
+  return () => window.clearTimeout(handle);
+};
+
+// Renders a placeholder (keeping the section id for anchor navigation)
+// until the section approaches the viewport, then loads its chunk
+const LazySection = ({ id, component: Component, rootMargin = '600px', minHeight = '400px' }) => {
+  const placeholderRef = useRef(null);
+  const [visible, setVisible] = useState(false);
+
+  useEffect(() => {
+    if (visible) {
+      return undefined;
+    }
+    if (!('IntersectionObserver' in window)) {
+      setVisible(true);
+      return undefined;
+    }
+
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) {
+          Component.preload?.();
+          setVisible(true);
+        }
+      },
+      { rootMargin }
+    );
+    observer.observe(placeholderRef.current);
+    return () => observer.disconnect();
+  }, [visible, rootMargin, Component]);
+
+  const placeholder = (
+    <div id={id} ref={placeholderRef} className="container mx-auto px-4 py-20">
+      <LoadingSection height={minHeight} />
+    </div>
+  );
+
+  if (!visible) {
+    return placeholder;
+  }
+
+  return (
+    <Suspense fallback={placeholder}>
+      <Component />
+    </Suspense>
+  );
+};
+
+export default LazySection;
@@ -0,0 +1,21 @@
+// Registers public/service-worker.js in production builds
+export const register = () => {
+  if (process.env.NODE_ENV !== 'production' || !('serviceWorker' in navigator)) {
+    return;
+  }
+
+  window.addEventListener('load', () => {
+    const swUrl = `${process.env.PUBLIC_URL}/service-worker.js`;
+    navigator.serviceWorker.register(swUrl).catch((error) => {
+      console.error('Service worker registration failed:', error);
+    });
+  });
+};
+
+export const unregister = () => {
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.ready
+      .then((registration) => registration.unregister())
+      .catch(() => {});
+  }
+};
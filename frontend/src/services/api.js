@@ -3,6 +3,10 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API_BASE = `${BACKEND_URL}/api`;
 
+// Station whose content this site shows; station content lives under /api/{callsign}/...
+export const STATION_CALLSIGN = (process.env.REACT_APP_CALLSIGN || '4K6AG').toUpperCase();
+const STATION = `/${STATION_CALLSIGN}`;
+
 // Create axios instance with base configuration
 const api = axios.create({
   baseURL: API_BASE,
@@ -11,16 +15,18 @@ const api = axios.create({
   },
 });
 
-// Request interceptor for logging (optional)
-api.interceptors.request.use(
-  (config) => {
-    console.log(`API Request: ${config.method?.toUpperCase()} ${config.url}`);
-    return config;
-  },
-  (error) => {
-    return Promise.reject(error);
-  }
-);
+// Request interceptor for logging (development only)
+if (process.env.NODE_ENV === 'development') {
+  api.interceptors.request.use(
+    (config) => {
+      console.log(`API Request: ${config.method?.toUpperCase()} ${config.url}`);
+      return config;
+    },
+    (error) => {
+      return Promise.reject(error);
+    }
+  );
+}
 
 // Response interceptor for error handling
 api.interceptors.response.use(
@@ -33,56 +39,147 @@ api.interceptors.response.use(
   }
 );
 
+// Client cache: fresh for `ttl`, then served stale while revalidating until `maxStale`
+const CACHE_POLICIES = {
+  station: { ttl: 60 * 1000, maxStale: 24 * 60 * 60 * 1000 },
+  status: { ttl: 15 * 1000, maxStale: 5 * 60 * 1000 },
+  equipment: { ttl: 5 * 60 * 1000, maxStale: 24 * 60 * 60 * 1000 },
+  qslCards: { ttl: 5 * 60 * 1000, maxStale: 24 * 60 * 60 * 1000 },
+  achievements: { ttl: 5 * 60 * 1000, maxStale: 24 * 60 * 60 * 1000 },
+  news: { ttl: 60 * 1000, maxStale: 60 * 60 * 1000 },
+  gallery: { ttl: 5 * 60 * 1000, maxStale: 24 * 60 * 60 * 1000 },
+  guestbook: { ttl: 30 * 1000, maxStale: 10 * 60 * 1000 },
+  guestbookPending: { ttl: 10 * 1000, maxStale: 60 * 1000 },
+  contactRequests: { ttl: 10 * 1000, maxStale: 60 * 1000 },
+};
+
+// url -> { resource, response, etag, fetchedAt, pending }
+const responseCache = new Map();
+
+const fetchAndStore = (resource, url) => {
+  const entry = responseCache.get(url) || { resource };
+  responseCache.set(url, entry);
+
+  // Identical in-flight requests share one promise
+  if (entry.pending) {
+    return entry.pending;
+  }
+
+  const headers = entry.etag ? { 'If-None-Match': entry.etag } : {};
+  entry.pending = api
+    .get(url, { headers, validateStatus: (status) => (status >= 200 && status < 300) || status === 304 })
+    .then((response) => {
+      if (response.status !== 304 || !entry.response) {
+        entry.response = response;
+        entry.etag = response.headers?.etag;
+      }
+      entry.fetchedAt = Date.now();
+      return entry.response;
+    })
+    .finally(() => {
+      entry.pending = null;
+    });
+
+  return entry.pending;
+};
+
+const cachedGet = (resource, url) => {
+  const policy = CACHE_POLICIES[resource];
+  const entry = responseCache.get(url);
+  const age = entry?.response ? Date.now() - entry.fetchedAt : Infinity;
+
+  if (age < policy.ttl) {
+    return Promise.resolve(entry.response);
+  }
+  if (age < policy.maxStale) {
+    fetchAndStore(resource, url).catch(() => {});
+    return Promise.resolve(entry.response);
+  }
+  return fetchAndStore(resource, url);
+};
+
+export const invalidateCache = (...resources) => {
+  for (const [url, entry] of responseCache) {
+    if (resources.length === 0 || resources.includes(entry.resource)) {
+      responseCache.delete(url);
+    }
+  }
+};
+
+// Run a write and drop the cached reads it affects
+const mutate = (request, ...resources) => request.then((response) => {
+  invalidateCache(...resources);
+  return response;
+});
+
 // Station Information API
 export const stationAPI = {
-  getStationInfo: () => api.get('/station'),
-  updateStationInfo: (data) => api.put('/station', data),
-  getStationStatus: () => api.get('/status'),
-  updateStationStatus: (data) => api.put('/status', data),
+  getStationInfo: () => cachedGet('station', `${STATION}/station`),
+  updateStationInfo: (data) => mutate(api.put(`${STATION}/station`, data), 'station', 'status'),
+  getStationStatus: () => cachedGet('status', `${STATION}/status`),
+  updateStationStatus: (data) => mutate(api.put(`${STATION}/status`, data), 'status', 'station'),
 };
 
 // Equipment API
 export const equipmentAPI = {
-  getEquipment: () => api.get('/equipment'),
-  createEquipment: (data) => api.post('/equipment', data),
-  updateEquipment: (id, data) => api.put(`/equipment/${id}`, data),
-  deleteEquipment: (id) => api.delete(`/equipment/${id}`),
+  getEquipment: () => cachedGet('equipment', `${STATION}/equipment`),
+  createEquipment: (data) => mutate(api.post(`${STATION}/equipment`, data), 'equipment'),
+  updateEquipment: (id, data) => mutate(api.put(`${STATION}/equipment/${id}`, data), 'equipment'),
+  deleteEquipment: (id) => mutate(api.delete(`${STATION}/equipment/${id}`), 'equipment'),
 };
 
 // QSL Cards API
 export const qslAPI = {
-  getQSLCards: () => api.get('/qsl-cards'),
-  createQSLCard: (data) => api.post('/qsl-cards', data),
+  getQSLCards: () => cachedGet('qslCards', `${STATION}/qsl-cards`),
+  createQSLCard: (data) => mutate(api.post(`${STATION}/qsl-cards`, data), 'qslCards'),
 };
 
 // Achievements API
 export const achievementsAPI = {
-  getAchievements: () => api.get('/achievements'),
-  createAchievement: (data) => api.post('/achievements', data),
+  getAchievements: () => cachedGet('achievements', `${STATION}/achievements`),
+  createAchievement: (data) => mutate(api.post(`${STATION}/achievements`, data), 'achievements'),
 };
 
 // News API
 export const newsAPI = {
-  getNews: (limit = 10, offset = 0) => api.get(`/news?limit=${limit}&offset=${offset}`),
-  createNews: (data) => api.post('/news', data),
+  getNews: (limit = 10, offset = 0) => cachedGet('news', `${STATION}/news?limit=${limit}&offset=${offset}`),
+  createNews: (data) => mutate(api.post(`${STATION}/news`, data), 'news'),
 };
 
 // Gallery API
 export const galleryAPI = {
-  getGallery: () => api.get('/gallery'),
-  createGalleryItem: (data) => api.post('/gallery', data),
+  getGallery: () => cachedGet('gallery', `${STATION}/gallery`),
+  createGalleryItem: (data) => mutate(api.post(`${STATION}/gallery`, data), 'gallery'),
 };
 
 // Guestbook API
 export const guestbookAPI = {
-  getGuestbook: (limit = 20, offset = 0) => api.get(`/guestbook?limit=${limit}&offset=${offset}`),
-  createGuestbookEntry: (data) => api.post('/guestbook', data),
+  getGuestbook: (limit = 20, offset = 0) => cachedGet('guestbook', `${STATION}/guestbook?limit=${limit}&offset=${offset}`),
+  createGuestbookEntry: (data) => mutate(api.post(`${STATION}/guestbook`, data), 'guestbook', 'guestbookPending'),
+  getPendingEntries: (limit = 20, offset = 0) =>
+    cachedGet('guestbookPending', `${STATION}/guestbook/pending?limit=${limit}&offset=${offset}`),
+  approveEntry: (id) => mutate(api.put(`${STATION}/guestbook/${id}/approve`), 'guestbook', 'guestbookPending'),
+  rejectEntry: (id) => mutate(api.put(`${STATION}/guestbook/${id}/reject`), 'guestbook', 'guestbookPending'),
+  moderateEntries: (approve = [], reject = []) =>
+    mutate(api.post(`${STATION}/guestbook/moderate`, { approve, reject }), 'guestbook', 'guestbookPending'),
 };
 
 // Contact API
 export const contactAPI = {
-  submitContactForm: (data) => api.post('/contact', data),
-  getContactRequests: (limit = 50) => api.get(`/contact-requests?limit=${limit}`),
+  submitContactForm: (data) => mutate(api.post(`${STATION}/contact`, data), 'contactRequests'),
+  getContactRequests: (limit = 50) => cachedGet('contactRequests', `${STATION}/contact-requests?limit=${limit}`),
+};
+
+// DX Cluster Spots API
+export const spotsAPI = {
+  getSpots: (filters = {}) => api.get('/spots', { params: filters }),
+  // Live spots over server-sent events; returns a function that closes the stream
+  subscribe: (filters, onSpot) => {
+    const params = new URLSearchParams(Object.entries(filters).filter(([, value]) => value));
+    const source = new EventSource(`${API_BASE}/spots/stream?${params}`);
+    source.addEventListener('spot', (event) => onSpot(JSON.parse(event.data)));
+    return () => source.close();
+  },
 };
 
 // Generic API functions
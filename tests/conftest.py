@@ -0,0 +1,29 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "radio_station_test")
+os.environ.setdefault("DXCC_FETCH_ON_STARTUP", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# The backend modules create their Motor client at import time; point it at an in-memory server
+import motor.motor_asyncio
+import mongomock_motor
+
+motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+import database
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def db():
+    """An empty database for the test"""
+    await database.client.drop_database(database.db.name)
+    yield database.db
+    await database.client.drop_database(database.db.name)
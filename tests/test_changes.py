@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from changes import ChangeLog, SEQUENCE_ID
+from database import changes_collection, counters_collection, guestbook_collection, news_collection
+from moderation import GuestbookModeration
+
+pytestmark = pytest.mark.anyio
+
+STATION = "4K6AG"
+
+@pytest.fixture
+async def news(db):
+    await news_collection.insert_many([
+        {"_id": "n1", "station": STATION, "title": "QRV on 6m"},
+        {"_id": "n2", "station": STATION, "title": "New antenna"},
+        {"_id": "n3", "station": "DL1ABC", "title": "Field day"},
+    ])
+
+async def test_feed_returns_the_current_state_of_changed_documents(news):
+    await ChangeLog.record(STATION, "news", ["n1", "n2"])
+    await ChangeLog.record("DL1ABC", "news", ["n3"])
+    await news_collection.delete_one({"_id": "n2"})
+    await ChangeLog.record(STATION, "news", ["n2", "n1"])
+
+    feed = await ChangeLog.changes(0, STATION, 100)
+    assert feed["token"] == "5" and not feed["reset"] and not feed["more"]
+    assert [(change["seq"], change["id"], change["op"]) for change in feed["changes"]] == [
+        (4, "n2", "delete"), (5, "n1", "upsert"),
+    ]
+    assert feed["changes"][1]["document"]["title"] == "QRV on 6m"
+
+    assert (await ChangeLog.changes(5, STATION, 100))["changes"] == []
+
+async def test_feed_pages_with_more(news):
+    await ChangeLog.record(STATION, "news", ["n1", "n2"])
+    first = await ChangeLog.changes(0, None, 1)
+    assert first["token"] == "1" and first["more"]
+    second = await ChangeLog.changes(int(first["token"]), None, 1)
+    assert second["token"] == "2" and not second["more"]
+
+async def test_unknown_or_expired_tokens_reset(news):
+    await ChangeLog.record(STATION, "news", ["n1"])
+    assert (await ChangeLog.changes(None, None, 10))["reset"]
+    assert (await ChangeLog.changes(7, None, 10)) == {"token": "1", "reset": True, "more": False, "changes": []}
+
+async def test_feed_stops_before_a_recent_gap_and_skips_an_old_one(news):
+    await ChangeLog.record(STATION, "news", ["n1"])
+    # A sequence number taken by a write whose entry is not stored yet
+    await counters_collection.update_one({"_id": SEQUENCE_ID}, {"$inc": {"seq": 1}})
+    await ChangeLog.record(STATION, "news", ["n2"])
+
+    feed = await ChangeLog.changes(0, None, 10)
+    assert feed["token"] == "1" and feed["more"]
+    assert [change["id"] for change in feed["changes"]] == ["n1"]
+
+    await changes_collection.update_one({"_id": 3}, {"$set": {"at": datetime.utcnow() - timedelta(minutes=5)}})
+    feed = await ChangeLog.changes(1, None, 10)
+    assert feed["token"] == "3" and [change["id"] for change in feed["changes"]] == ["n2"]
+
+async def test_prune_raises_the_low_water_mark(news):
+    await ChangeLog.record(STATION, "news", ["n1", "n2"])
+    await changes_collection.update_one({"_id": 1}, {"$set": {"at": datetime.utcnow() - timedelta(days=365)}})
+    await ChangeLog.record(STATION, "news", ["n1"])
+
+    assert await ChangeLog.prune(datetime.utcnow()) == 1
+    assert await ChangeLog.state() == {"seq": 3, "pruned": 1}
+    assert (await ChangeLog.changes(0, None, 10))["reset"]
+    feed = await ChangeLog.changes(1, None, 10)
+    assert [change["seq"] for change in feed["changes"]] == [2, 3]
+    assert await ChangeLog.prune(datetime.utcnow()) == 0
+
+async def test_only_published_guestbook_entries_are_fed(db):
+    await guestbook_collection.insert_many([
+        {"_id": "g1", "station": STATION, "approved": False},
+        {"_id": "g2", "station": STATION, "approved": True},
+        {"_id": "g3", "station": STATION, "approved": False},
+    ])
+
+    assert await GuestbookModeration.approve(STATION, ["g1", "g2", "missing"]) == 1
+    assert await GuestbookModeration.reject(STATION, ["g2", "g3"]) == 2
+
+    feed = await ChangeLog.changes(0, STATION, 10)
+    assert [(change["id"], change["op"]) for change in feed["changes"]] == [("g1", "upsert"), ("g2", "delete")]
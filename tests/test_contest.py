@@ -0,0 +1,78 @@
+import pytest
+
+from contest import ContestLog, DupeIndex, normalize_qso, wpx_prefix
+from database import qsos_collection
+
+pytestmark = pytest.mark.anyio
+
+STATION = "4K6AG"
+
+def contest(**fields):
+    return dict({"_id": "cq-wpx", "station": STATION, "multipliers": ["prefix"], "multipliers_per_band": True}, **fields)
+
+def qso(call, band="20m", mode="CW", **fields):
+    return dict({"call": call, "band": band, "mode": mode, "contest": "cq-wpx"}, **fields)
+
+@pytest.mark.parametrize("call, prefix", [
+    ("4K6AG", "4K6"),
+    ("N8AAA", "N8"),
+    ("RA9AAA", "RA9"),
+    ("K1ABC/P", "K1"),
+    ("K1ABC/7", "K7"),
+    ("DL/K1ABC", "DL0"),
+    ("K1ABC/DL2", "DL2"),
+    ("LX", "LX0"),
+])
+def test_wpx_prefix(call, prefix):
+    assert wpx_prefix(call) == prefix
+
+def test_normalize_qso_maps_mode_category_and_band():
+    normalized = normalize_qso({"call": " dl1abc ", "frequency": 14250, "mode": "usb", "exchange": " 001 "})
+    assert normalized["call"] == "DL1ABC"
+    assert normalized["band"] == "20m"
+    assert normalized["mode"] == "PH" and normalized["logged_mode"] == "USB"
+    assert normalized["exchange"] == "001"
+
+    with pytest.raises(ValueError):
+        normalize_qso({"call": "DL1ABC", "frequency": 14250, "mode": "SSTV"})
+
+def test_dupes_are_counted_per_call_band_and_mode():
+    index = DupeIndex(contest())
+    assert index.add(qso("DL1ABC")) == (False, ["prefix:DL1:20m"])
+    assert index.add(qso("DL1ABC")) == (True, [])
+    assert index.add(qso("DL1ABC", mode="PH")) == (False, [])
+    assert index.add(qso("DL1ABC", band="40m")) == (False, ["prefix:DL1:40m"])
+    assert index.add(qso("DL1XYZ")) == (False, [])
+    assert index.stats() == {"qsos": 5, "dupes": 1, "multipliers": 2}
+
+def test_multipliers_once_per_contest():
+    index = DupeIndex(contest(multipliers=["prefix", "exchange"], multipliers_per_band=False))
+    assert index.add(qso("DL1ABC", exchange="14")) == (False, ["prefix:DL1:*", "exchange:14:*"])
+    assert index.add(qso("DL1ABC", band="40m", exchange="14")) == (False, [])
+    assert index.add(qso("DL2ABC", band="40m", exchange="14")) == (False, ["prefix:DL2:*"])
+
+async def test_logged_qsos_are_stored_and_reloaded(db):
+    log = ContestLog()
+    index = await log.index(contest())
+    results = await log.log(index, [qso("DL1ABC"), qso("DL1ABC"), qso("K1ABC")])
+
+    assert [result["dupe"] for result in results] == [False, True, False]
+    assert await qsos_collection.count_documents({"contest": "cq-wpx"}) == 3
+
+    reloaded = await ContestLog().index(contest())
+    assert reloaded.stats() == {"qsos": 3, "dupes": 1, "multipliers": 2}
+
+async def test_rejected_qsos_come_back_with_an_error_and_leave_the_index(db):
+    await qsos_collection.create_index("call", unique=True)
+    await qsos_collection.insert_one({"_id": "elsewhere", "station": STATION, "contest": "other", "call": "DL1ABC"})
+
+    log = ContestLog()
+    index = await log.index(contest())
+    results = await log.log(index, [qso("K1ABC"), qso("DL1ABC")])
+
+    assert "error" not in results[0] and results[1]["error"]
+    assert log.stats()["write_errors"] == 1
+    # The index counted both QSOs; it is rebuilt from what got stored
+    rebuilt = await log.index(contest())
+    assert rebuilt is not index
+    assert not rebuilt.is_dupe("DL1ABC", "20m", "CW") and rebuilt.is_dupe("K1ABC", "20m", "CW")
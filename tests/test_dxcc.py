@@ -0,0 +1,77 @@
+import pytest
+
+from dxcc import PrefixResolver
+
+CTY = """\
+Azerbaijan:               21:  29:  AS:   40.45:   -47.37:    -4.0:  4J:
+    4J,4K;
+Fed. Rep. of Germany:     14:  28:  EU:   51.00:   -10.00:    -1.0:  DL:
+    DA,DB,DC,DD,DE,DF,DG,DH,DI,DJ,DK,DL,DM,DN,DO,DP,DQ,DR;
+European Russia:          16:  29:  EU:   53.65:   -41.37:    -4.0:  UA:
+    R,U,=R9XX/1;
+Asiatic Russia:           17:  30:  AS:   55.88:   -84.08:    -7.0:  UA9:
+    R9,UA9,RA9(18)[31];
+United States:            05:  08:  NA:   37.53:    91.67:     5.0:  K:
+    AA,K,N,W;
+Hawaii:                   31:  61:  OC:   21.12:   157.48:    10.0:  KH6:
+    KH6;
+Sicily:                   15:  28:  EU:   37.50:   -14.00:    -1.0:  *IT9:
+    IT9;
+Italy:                    15:  28:  EU:   42.82:   -12.58:    -1.0:  I:
+    I;
+"""
+
+@pytest.fixture
+def cty_file(tmp_path):
+    path = tmp_path / "cty.dat"
+    path.write_text(CTY, encoding="latin-1")
+    return path
+
+@pytest.fixture
+def resolver(cty_file):
+    resolver = PrefixResolver()
+    resolver.load(cty_file, cty_file.with_suffix(".cache"))
+    return resolver
+
+@pytest.mark.parametrize("call, prefix", [
+    ("4K6AG", "4J"),
+    ("dl1abc", "DL"),
+    ("4K6AG/P", "4J"),
+    ("4K6AG/QRP", "4J"),
+    ("UA9/DL1ABC", "UA9"),
+    ("DL1ABC/UA9", "UA9"),
+    ("UA1ABC/9", "UA9"),
+    ("K1ABC/KH6", "KH6"),
+    ("KH6/K1ABC", "KH6"),
+    ("R9XX/1", "UA"),
+    ("IT9ABC", "I"),
+])
+def test_resolves_portable_calls(resolver, call, prefix):
+    assert resolver.resolve(call)["prefix"] == prefix
+
+@pytest.mark.parametrize("call", ["DL1ABC/MM", "K1ABC/AM", "QQ1ABC", "", None])
+def test_calls_without_an_entity(resolver, call):
+    assert resolver.resolve(call) is None
+
+def test_alias_zone_overrides(resolver):
+    assert resolver.resolve("UA9AAA")["cq_zone"] == 17
+    entity = resolver.resolve("RA9AAA")
+    assert (entity["country"], entity["cq_zone"], entity["itu_zone"]) == ("Asiatic Russia", 18, 31)
+
+def test_cache_is_used_until_the_file_changes(cty_file, resolver):
+    cache = cty_file.with_suffix(".cache")
+    assert cache.exists()
+
+    cached = PrefixResolver()
+    cached.load(cty_file, cache)
+    assert cached.stats() == resolver.stats()
+
+    cty_file.write_text(CTY.replace("    KH6;", "    KH6,KH7;"), encoding="latin-1")
+    reloaded = PrefixResolver()
+    reloaded.load(cty_file, cache)
+    assert reloaded.resolve("KH7ABC")["prefix"] == "KH6"
+
+def test_missing_file_leaves_the_resolver_empty(tmp_path):
+    resolver = PrefixResolver()
+    resolver.load(tmp_path / "missing.dat", None)
+    assert not resolver.loaded and resolver.resolve("4K6AG") is None
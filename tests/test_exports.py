@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import exports
+from database import exports_collection, qsos_collection
+from exports import ExportManager, open_export
+
+pytestmark = pytest.mark.anyio
+
+STATION = "4K6AG"
+
+@pytest.fixture
+async def qsos(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", tmp_path)
+    monkeypatch.setattr(exports, "EXPORT_BATCH_ROWS", 4)
+    start = datetime(2024, 5, 30, 12)
+    await qsos_collection.insert_many([
+        {"_id": f"q{i}", "station": STATION, "call": f"DL{i}ABC", "timestamp": start + timedelta(hours=12 * i),
+         "band": "20m", "frequency": 14025.0, "mode": "CW", "dupe": False}
+        for i in range(10)
+    ])
+
+async def create(**request):
+    request = dict({"dataset": "qso_log", "format": "parquet", "columns": None, "partition": None}, **request)
+    return await ExportManager.create(STATION, request)
+
+async def test_export_writes_every_row_by_partition(qsos):
+    export = await create(partition="month", columns=["id", "call", "timestamp"])
+    await ExportManager.run(export["_id"])
+
+    stored = await exports_collection.find_one({"_id": export["_id"]})
+    assert stored["status"] == "done" and stored["rows"] == 10
+    assert {file["path"].split("/")[0] for file in stored["files"]} == {"month=2024-05", "month=2024-06"}
+
+    table = open_export(ExportManager.directory(STATION, export["_id"]), "parquet", partitioned=True).to_table()
+    assert sorted(table.column("id").to_pylist()) == sorted(f"q{i}" for i in range(10))
+
+async def test_failed_attempt_leaves_no_files_and_the_retry_completes(qsos, monkeypatch):
+    export = await create(format="arrow")
+    to_batch = exports._to_batch
+    calls = []
+
+    def flaky(docs, schema):
+        calls.append(len(docs))
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return to_batch(docs, schema)
+
+    monkeypatch.setattr(exports, "_to_batch", flaky)
+    with pytest.raises(OSError):
+        await ExportManager.run(export["_id"])
+    assert (await exports_collection.find_one({"_id": export["_id"]}))["status"] == "failed"
+    assert list(exports.EXPORT_DIR.joinpath(STATION).iterdir()) == []
+
+    await ExportManager.run(export["_id"])
+    stored = await exports_collection.find_one({"_id": export["_id"]})
+    assert stored["status"] == "done" and stored["error"] is None
+    assert open_export(ExportManager.directory(STATION, export["_id"]), "arrow").count_rows() == 10
+
+async def test_rerun_replaces_the_previous_attempt(qsos):
+    export = await create()
+    directory = ExportManager.directory(STATION, export["_id"])
+    # Left behind by an attempt that lost its job lease after renaming its files into place
+    directory.mkdir(parents=True)
+    (directory / "stale.parquet").write_bytes(b"partial")
+
+    await ExportManager.run(export["_id"])
+
+    assert not (directory / "stale.parquet").exists()
+    assert open_export(directory, "parquet").count_rows() == 10
+    assert [path.name for path in directory.parent.iterdir()] == [export["_id"]]
+
+async def test_finished_export_is_not_run_again(qsos):
+    export = await create()
+    await ExportManager.run(export["_id"])
+    files = (await exports_collection.find_one({"_id": export["_id"]}))["files"]
+
+    await qsos_collection.insert_one({"_id": "late", "station": STATION, "call": "K1ABC", "timestamp": datetime(2024, 7, 1)})
+    await ExportManager.run(export["_id"])
+
+    stored = await exports_collection.find_one({"_id": export["_id"]})
+    assert stored["rows"] == 10 and stored["files"] == files
+
+async def test_delete_removes_files_and_scratch_directories(qsos):
+    export = await create()
+    await ExportManager.run(export["_id"])
+    scratch = ExportManager.directory(STATION, f"{export['_id']}.abc.tmp")
+    scratch.mkdir()
+
+    assert await ExportManager.delete(STATION, export["_id"])
+    assert list(exports.EXPORT_DIR.joinpath(STATION).iterdir()) == []
+    assert not await ExportManager.delete(STATION, export["_id"])
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+
+import jobs
+from database import contact_requests_collection, dead_jobs_collection, jobs_collection
+from jobs import JobQueue, OUTBOX_FIELD
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def queue(db):
+    queue = JobQueue(workers=1)
+    queue.calls = []
+
+    @queue.handler("ok")
+    async def ok(payload):
+        queue.calls.append(payload)
+
+    @queue.handler("fail")
+    async def fail(payload):
+        raise RuntimeError("smtp down")
+
+    return queue
+
+async def test_processed_job_is_done(queue):
+    job_id = await queue.enqueue("ok", {"n": 1})
+    job = await queue.claim()
+    assert job["_id"] == job_id and job["status"] == "running" and job["attempts"] == 1
+
+    await queue.process(job)
+
+    assert queue.calls == [{"n": 1}]
+    stored = await jobs_collection.find_one({"_id": job_id})
+    assert stored["status"] == "done" and stored["locked_until"] is None
+
+async def test_failed_job_is_retried_with_backoff(queue):
+    job_id = await queue.enqueue("fail", {}, max_attempts=3)
+    await queue.process(await queue.claim())
+
+    stored = await jobs_collection.find_one({"_id": job_id})
+    assert stored["status"] == "pending"
+    assert stored["last_error"] == "RuntimeError: smtp down"
+    assert stored["run_at"] > datetime.utcnow()
+    # Not due again until the backoff has passed
+    assert await queue.claim() is None
+
+async def test_job_is_dead_lettered_after_its_last_attempt(queue):
+    job_id = await queue.enqueue("fail", {}, max_attempts=1)
+    await queue.process(await queue.claim())
+
+    assert await jobs_collection.find_one({"_id": job_id}) is None
+    dead = await dead_jobs_collection.find_one({"_id": job_id})
+    assert dead["status"] == "dead" and dead["last_error"] == "RuntimeError: smtp down"
+
+    assert await queue.retry_dead(job_id)
+    assert await dead_jobs_collection.find_one({"_id": job_id}) is None
+    assert (await jobs_collection.find_one({"_id": job_id}))["attempts"] == 0
+
+async def test_expired_lease_is_reclaimed(queue):
+    job_id = await queue.enqueue("ok", {})
+    first = await queue.claim()
+    await jobs_collection.update_one({"_id": job_id}, {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}})
+
+    second = await queue.claim()
+    assert second["_id"] == job_id and second["attempts"] == 2
+
+    # The first worker lost its lease, so finishing late does not touch the job
+    await queue.process(first)
+    assert (await jobs_collection.find_one({"_id": job_id}))["status"] == "running"
+    await queue.process(second)
+    assert (await jobs_collection.find_one({"_id": job_id}))["status"] == "done"
+
+async def test_running_job_keeps_its_lease(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 1)
+    monkeypatch.setattr(jobs, "JOB_LEASE_RENEW_SECONDS", 0.05)
+
+    @queue.handler("slow")
+    async def slow(payload):
+        # Past the one-second lease, which the heartbeat keeps extending
+        await asyncio.sleep(1.2)
+        assert await queue.claim() is None
+
+    await queue.enqueue("slow", {})
+    job = await queue.claim()
+    await queue.process(job)
+    assert (await jobs_collection.find_one({"_id": job["_id"]}))["status"] == "done"
+
+async def test_staged_job_is_relayed_once(queue):
+    queue.outbox(contact_requests_collection)
+    doc = queue.stage({"_id": "request-1", "name": "Op"}, "ok", {"_id": "request-1"})
+    await contact_requests_collection.insert_one(doc)
+
+    assert await queue.relay() == 1
+    assert await queue.relay() == 0
+    assert await jobs_collection.count_documents({}) == 1
+    assert OUTBOX_FIELD not in await contact_requests_collection.find_one({"_id": "request-1"})
+
+    await queue.process(await queue.claim())
+    assert queue.calls == [{"_id": "request-1"}]
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import limiter
+from limiter import AdaptiveLimiter, Overloaded, StationLimiter
+
+pytestmark = pytest.mark.anyio
+
+def adaptive(initial=2, minimum=1, maximum=4, queue_size=2, queue_timeout=1.0):
+    return AdaptiveLimiter(initial, minimum, maximum, 0.5, queue_size, queue_timeout)
+
+async def test_requests_over_the_limit_wait_for_a_slot_in_order():
+    gate = adaptive()
+    await gate.acquire()
+    await gate.acquire()
+
+    first = asyncio.ensure_future(gate.acquire())
+    second = asyncio.ensure_future(gate.acquire())
+    await asyncio.sleep(0)
+    assert gate.stats()["waiting"] == 2 and not first.done()
+
+    gate.release(overloaded=False, sample=False)
+    await first
+    assert not second.done() and gate.inflight == 2
+
+    gate.release(overloaded=False, sample=False)
+    await second
+    assert gate.counters["queued"] == 2 and gate.counters["accepted"] == 4
+
+async def test_full_queue_sheds_immediately():
+    gate = adaptive(initial=1, queue_size=1)
+    await gate.acquire()
+    waiting = asyncio.ensure_future(gate.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded):
+        await gate.acquire()
+    assert gate.counters["rejected"] == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert gate.stats()["waiting"] == 0
+
+async def test_queued_request_times_out():
+    gate = adaptive(initial=1, queue_timeout=0.01)
+    await gate.acquire()
+
+    with pytest.raises(Overloaded):
+        await gate.acquire()
+    assert gate.counters["queue_timeouts"] == 1 and gate.stats()["waiting"] == 0
+    assert gate.inflight == 1
+
+async def test_limit_backs_off_on_overload_and_grows_under_load():
+    gate = adaptive(initial=4, minimum=1, maximum=6)
+    for _ in range(4):
+        await gate.acquire()
+
+    gate.release(overloaded=True)
+    assert gate.limit == 2
+    for _ in range(3):
+        gate.release(overloaded=True)
+    assert gate.limit == 1 and gate.counters["overloads"] == 4
+
+    await gate.acquire()
+    gate.release(overloaded=False)
+    assert gate.limit == 2
+
+async def test_limit_only_grows_while_it_is_in_use():
+    gate = adaptive(initial=4, maximum=5)
+    await gate.acquire()
+    gate.release(overloaded=False)
+    assert gate.limit == 4
+
+    await gate.acquire()
+    await gate.acquire()
+    gate.release(overloaded=False)
+    assert gate.limit == 5
+    await gate.acquire()
+    await gate.acquire()
+    await gate.acquire()
+    gate.release(overloaded=False)
+    assert gate.limit == 5
+
+async def test_busy_station_queues_without_blocking_other_stations(monkeypatch):
+    monkeypatch.setattr(limiter, "CONCURRENCY_LIMIT_INITIAL", 10)
+    monkeypatch.setattr(limiter, "CONCURRENCY_STATION_LIMIT_MAX", 2)
+    monkeypatch.setattr(limiter, "CONCURRENCY_LIMIT_MIN", 1)
+    monkeypatch.setattr(limiter, "CONCURRENCY_QUEUE_SIZE", 1)
+    gates = StationLimiter()
+
+    await gates.acquire("4K6AG")
+    await gates.acquire("4K6AG")
+    queued = asyncio.ensure_future(gates.acquire("4K6AG"))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await gates.acquire("4K6AG")
+
+    await gates.acquire("DL1ABC")
+    await gates.acquire(None)
+    assert gates.total.inflight == 4
+
+    gates.release("4K6AG", overloaded=False)
+    await queued
+    stations = gates.stats()["stations"]
+    assert stations["4K6AG"]["inflight"] == 2 and stations["4K6AG"]["rejected"] == 1
+
+    # Idle station limiters back at their initial limit are dropped
+    gates.release("DL1ABC", overloaded=False)
+    assert "DL1ABC" not in gates.stations